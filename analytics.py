@@ -0,0 +1,294 @@
+"""Vectorized analytics over completed orders.
+
+Works on columnar frames (see DatabaseOperations.get_analytics, which loads
+and caches them per date range); every computation is a pandas group-by or a
+NumPy array operation, with no loop over rows:
+
+    revenue      per day, per hour of day and per weekday, plus a
+                 weekday x hour heatmap
+    table turns  minutes between consecutive orders on a table on the same
+                 day, and orders per table per open day
+    party size   average ticket by party size; the party comes from the
+                 reservation the order falls in, or else the table's seats
+    baskets      item co-occurrence counts, support, confidence and lift
+"""
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+# Longer gaps between two orders on a table are idle time, not a turn
+MAX_TURN_MINUTES = 240
+# Orders per block when building basket matrices (block x items float32)
+BASKET_BLOCK = 65536
+# Pairs bought together fewer times than this are left out of top_pairs
+MIN_PAIR_ORDERS = 5
+
+
+def timestamps(values):
+    """datetime64 array from ISO timestamp strings or datetimes"""
+    # NumPy's cast parses ISO strings several times faster than to_datetime
+    # does on pandas string columns
+    return np.asarray(values, dtype=object).astype('datetime64[us]')
+
+
+def _seconds(values):
+    """Seconds since the epoch as int64"""
+    return timestamps(values).astype('datetime64[s]').astype(np.int64)
+
+
+def prepare_orders(orders):
+    """Orders as arrays: ORDER_ID, TABLE_NUMBER, TOTAL_AMOUNT, SECONDS
+    (since the epoch), DAY (days since the epoch), HOUR and WEEKDAY"""
+    seconds = _seconds(orders['ORDER_TIME'])
+    day = seconds // 86400
+    return {
+        'ORDER_ID': orders['ORDER_ID'].to_numpy(dtype=np.int64),
+        'TABLE_NUMBER': orders['TABLE_NUMBER'].to_numpy(dtype=np.int64),
+        'TOTAL_AMOUNT': orders['TOTAL_AMOUNT'].to_numpy(dtype=float),
+        'SECONDS': seconds,
+        'DAY': day,
+        'HOUR': seconds % 86400 // 3600,
+        # 1970-01-01 was a Thursday
+        'WEEKDAY': (day + 3) % 7,
+    }
+
+
+def _revenue(codes, amounts, size):
+    """ORDERS, REVENUE and AVG_TICKET for codes 0..size-1"""
+    orders = np.bincount(codes, minlength=size)
+    revenue = np.bincount(codes, weights=amounts, minlength=size)
+    return pd.DataFrame({
+        'ORDERS': orders,
+        'REVENUE': revenue,
+        'AVG_TICKET': revenue / np.maximum(orders, 1),
+    })
+
+
+def revenue_by_day(orders):
+    """Per calendar day, including days without orders"""
+    day = orders['DAY']
+    first = day.min() if len(day) else 0
+    size = day.max() - first + 1 if len(day) else 0
+    frame = _revenue(day - first, orders['TOTAL_AMOUNT'], size)
+    frame.index = pd.Index((first + np.arange(size)).astype('datetime64[D]'), name='DATE')
+    return frame
+
+
+def revenue_by_hour(orders):
+    frame = _revenue(orders['HOUR'], orders['TOTAL_AMOUNT'], 24)
+    frame.index.name = 'HOUR'
+    return frame
+
+
+def revenue_by_weekday(orders):
+    frame = _revenue(orders['WEEKDAY'], orders['TOTAL_AMOUNT'], 7)
+    frame.index = pd.Index(WEEKDAYS, name='WEEKDAY')
+    return frame
+
+
+def revenue_heatmap(orders):
+    """Revenue with weekdays as rows and hours of the day as columns"""
+    revenue = np.bincount(orders['WEEKDAY'] * 24 + orders['HOUR'],
+                          weights=orders['TOTAL_AMOUNT'], minlength=7 * 24)
+    return pd.DataFrame(revenue.reshape(7, 24), index=pd.Index(WEEKDAYS, name='WEEKDAY'),
+                        columns=pd.Index(range(24), name='HOUR'))
+
+
+def seats(tables, numbers):
+    """SEATING_CAPACITY for each table number (NaN for unknown tables)"""
+    known = tables['TABLE_NUMBER'].to_numpy(dtype=np.int64)
+    size = max(int(known.max()) if len(known) else 0, int(numbers.max()) if len(numbers) else 0)
+    # Table numbers are small, so a dense lookup array beats a hash join
+    lookup = np.full(size + 1, np.nan)
+    lookup[known] = tables['SEATING_CAPACITY'].to_numpy(dtype=float)
+    return lookup[numbers]
+
+
+def group_quantiles(codes, values, groups, qs):
+    """{q: per-code q-quantile (linear interpolation)} of non-negative
+    values for codes 0..groups-1; NaN for codes without values"""
+    counts = np.bincount(codes, minlength=groups)
+    result = {q: np.full(groups, np.nan) for q in qs}
+    if not len(values):
+        return result
+    # One sort of code * span + value orders by code, then by value
+    span = float(values.max()) + 1
+    values = np.sort(codes * span + values) - np.repeat(np.arange(groups) * span, counts)
+    present = counts > 0
+    starts = (np.cumsum(counts) - counts)[present]
+    for q in qs:
+        position = starts + (counts[present] - 1) * q
+        lo = np.floor(position).astype(np.int64)
+        hi = np.ceil(position).astype(np.int64)
+        result[q][present] = values[lo] + (values[hi] - values[lo]) * (position - lo)
+    return result
+
+
+def table_turns(orders, tables):
+    """Per table: seats, orders, orders per open day and turn minutes.
+
+    A turn is the time from one order on a table to the next one on the same
+    day, if at most MAX_TURN_MINUTES. tables has TABLE_NUMBER and
+    SEATING_CAPACITY.
+    """
+    order = np.argsort((orders['TABLE_NUMBER'] << 32) | orders['SECONDS'])
+    table, day = orders['TABLE_NUMBER'][order], orders['DAY'][order]
+    new_table = np.ones(len(table), dtype=bool)
+    new_table[1:] = table[1:] != table[:-1]
+    numbers, codes = table[new_table], np.cumsum(new_table) - 1
+    same_day = ~new_table[1:] & (day[1:] == day[:-1])
+    gap = np.diff(orders['SECONDS'][order]) / 60
+    turn = same_day & (gap <= MAX_TURN_MINUTES)
+    turn_codes = codes[1:][turn]
+    quantiles = group_quantiles(turn_codes, gap[turn], len(numbers), (0.5, 0.9))
+
+    counts = np.bincount(codes, minlength=len(numbers))
+    # Orders are sorted by table then time, so each new (table, day) opens a day
+    opens = np.ones(len(table), dtype=bool)
+    opens[1:] = ~same_day
+    days = np.bincount(codes[opens], minlength=len(numbers))
+    return pd.DataFrame({
+        'SEATING_CAPACITY': seats(tables, numbers),
+        'ORDERS': counts,
+        'ORDERS_PER_DAY': counts / np.maximum(days, 1),
+        'TURNS': np.bincount(turn_codes, minlength=len(numbers)),
+        'MEDIAN_TURN_MINUTES': quantiles[0.5],
+        'P90_TURN_MINUTES': quantiles[0.9],
+    }, index=pd.Index(numbers, name='TABLE_NUMBER'))
+
+
+def party_sizes(orders, reservations, tables):
+    """Party size per order: NUMBER_OF_PEOPLE of the reservation on the
+    order's table whose window contains the order time, else the table's
+    SEATING_CAPACITY (NaN for unknown tables). Returns (sizes, reserved)
+    arrays aligned with orders."""
+    table, seconds = orders['TABLE_NUMBER'], orders['SECONDS']
+    sizes = seats(tables, table)
+    reserved = np.zeros(len(table), dtype=bool)
+    if not len(table) or not len(reservations):
+        return sizes, reserved
+
+    # Bookings on one table never overlap, so the only one that can contain
+    # an order is the last one on its table starting at or before it: one
+    # searchsorted over (table, start) keys
+    booked = reservations['TABLE_NUMBER'].to_numpy(dtype=np.int64)
+    start = _seconds(reservations['RESERVATION_TIME'])
+    end = start + reservations['DURATION_MINUTES'].to_numpy(dtype=np.int64) * 60
+    people = reservations['NUMBER_OF_PEOPLE'].to_numpy(dtype=float)
+    keys = (booked << 32) | start
+    order = np.argsort(keys)
+    keys, booked, end, people = keys[order], booked[order], end[order], people[order]
+    match = np.searchsorted(keys, (table << 32) | seconds, side='right') - 1
+    candidate = np.maximum(match, 0)
+    inside = (match >= 0) & (booked[candidate] == table) & (seconds < end[candidate])
+    sizes[inside] = people[candidate[inside]]
+    reserved[inside] = True
+    return sizes, reserved
+
+
+def ticket_by_party(orders, reservations, tables):
+    """ORDERS, RESERVED share, AVG_TICKET and PER_HEAD per party size"""
+    sizes, reserved = party_sizes(orders, reservations, tables)
+    known = ~np.isnan(sizes)
+    sizes = sizes[known].astype(np.int64)
+    amounts = orders['TOTAL_AMOUNT'][known]
+    frame = _revenue(sizes, amounts, sizes.max() + 1 if len(sizes) else 0)
+    frame['RESERVED'] = np.bincount(sizes, weights=reserved[known],
+                                    minlength=len(frame)) / np.maximum(frame['ORDERS'], 1)
+    frame['PER_HEAD'] = frame['AVG_TICKET'] / np.maximum(np.arange(len(frame)), 1)
+    frame.index.name = 'PARTY_SIZE'
+    return frame[frame['ORDERS'] > 0][['ORDERS', 'RESERVED', 'AVG_TICKET', 'PER_HEAD']]
+
+
+def co_occurrence(order_ids, item_ids):
+    """(items, counts, baskets) for line items given as parallel arrays.
+
+    counts[i, j] is the number of orders containing both items[i] and
+    items[j]; the diagonal is the number of orders containing each item, and
+    baskets the number of orders. Baskets are built as dense 0/1 blocks of
+    BASKET_BLOCK orders and multiplied, so memory stays bounded by the block
+    size.
+    """
+    # Codes follow first appearance, so they only need sorting when an
+    # order's lines are not together
+    order_codes, _ = pd.factorize(np.asarray(order_ids))
+    item_codes, items = pd.factorize(np.asarray(item_ids), sort=True)
+    items = np.asarray(items)
+    counts = np.zeros((len(items), len(items)))
+    if not len(order_codes):
+        return items, counts.astype(np.int64), 0
+    if np.any(order_codes[1:] < order_codes[:-1]):
+        order = np.argsort(order_codes, kind='stable')
+        order_codes, item_codes = order_codes[order], item_codes[order]
+    baskets = int(order_codes[-1]) + 1
+    bounds = np.searchsorted(order_codes, np.arange(0, baskets + BASKET_BLOCK, BASKET_BLOCK))
+    for block, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if lo == hi:
+            continue
+        first = block * BASKET_BLOCK
+        matrix = np.zeros((min(BASKET_BLOCK, baskets - first), len(items)), dtype=np.float32)
+        matrix[order_codes[lo:hi] - first, item_codes[lo:hi]] = 1
+        counts += matrix.T @ matrix
+    return items, np.rint(counts).astype(np.int64), baskets
+
+
+def top_pairs(items, counts, baskets, names=None, min_orders=MIN_PAIR_ORDERS, limit=50):
+    """Item pairs bought together, highest lift first.
+
+    names maps item ids to display names. Confidence A->B is the share of
+    orders with A that also have B.
+    """
+    first, second = np.triu_indices(len(items), 1)
+    together = counts[first, second]
+    keep = together >= min_orders
+    first, second, together = first[keep], second[keep], together[keep]
+    alone = np.diag(counts)
+    frame = pd.DataFrame({
+        'ITEM_A': items[first],
+        'ITEM_B': items[second],
+        'ORDERS': together,
+        'SUPPORT': together / max(baskets, 1),
+        'CONFIDENCE_A_B': together / alone[first],
+        'CONFIDENCE_B_A': together / alone[second],
+        'LIFT': together * baskets / (alone[first] * alone[second]),
+    })
+    if names is not None:
+        frame['ITEM_A'] = frame['ITEM_A'].map(names)
+        frame['ITEM_B'] = frame['ITEM_B'].map(names)
+    return frame.sort_values(['LIFT', 'ORDERS'], ascending=False).head(limit).reset_index(drop=True)
+
+
+def lift_matrix(items, counts, baskets, names=None):
+    """items x items lift (NaN on the diagonal)"""
+    alone = np.diag(counts).astype(float)
+    lift = counts * baskets / np.outer(alone, alone)
+    np.fill_diagonal(lift, np.nan)
+    labels = [names.get(item, item) for item in items] if names is not None else items
+    return pd.DataFrame(lift, index=labels, columns=labels)
+
+
+def summarize(orders, items, reservations, tables, menu):
+    """Every analysis for one date range as a dict of frames.
+
+    orders has ORDER_ID, TABLE_NUMBER, ORDER_TIME and TOTAL_AMOUNT; items has
+    ORDER_ID and MENUITEM_NUMBER; reservations has TABLE_NUMBER,
+    RESERVATION_TIME, NUMBER_OF_PEOPLE and DURATION_MINUTES; tables has
+    TABLE_NUMBER and SEATING_CAPACITY; menu has MENUITEM_NUMBER and ITEM_NAME.
+    """
+    orders = prepare_orders(orders)
+    names = dict(zip(menu['MENUITEM_NUMBER'], menu['ITEM_NAME']))
+    item_ids, counts, baskets = co_occurrence(items['ORDER_ID'].to_numpy(),
+                                              items['MENUITEM_NUMBER'].to_numpy())
+    return {
+        'orders': len(orders['ORDER_ID']),
+        'revenue': float(orders['TOTAL_AMOUNT'].sum()),
+        'line_items': len(items),
+        'by_day': revenue_by_day(orders),
+        'by_hour': revenue_by_hour(orders),
+        'by_weekday': revenue_by_weekday(orders),
+        'heatmap': revenue_heatmap(orders),
+        'table_turns': table_turns(orders, tables),
+        'by_party_size': ticket_by_party(orders, reservations, tables),
+        'top_pairs': top_pairs(item_ids, counts, baskets, names),
+        'lift': lift_matrix(item_ids, counts, baskets, names),
+    }
@@ -0,0 +1,442 @@
+"""Headless JSON API over DatabaseOperations for POS terminals and kitchen
+displays.
+
+Standard library only (ThreadingHTTPServer, HTTP/1.1 keep-alive). Requests go
+through the same pooled, cached data layer as the Streamlit app. Menu and
+table listings carry an ETag and answer If-None-Match with 304 Not Modified.
+The menu tag is the MENU_VERSION counter, so an unchanged menu is confirmed
+without serializing it.
+
+    python api.py [--host 127.0.0.1] [--port 8080] [--db restaurant.db]
+
+    GET  /menu[?category=STARTER]
+    GET  /tables
+    GET  /tables/available?party_size=4
+    GET  /orders?status=PENDING&after=120&limit=50
+    GET  /orders/<id>
+    POST /orders     {"customer_id": 1, "items": [[3, 2]], "table_number": 2}
+                     (omit table_number and pass party_size to auto-seat)
+    POST /payments   {"order_id": 7, "payment_mode": "CARD", "amount": 42.5}
+                     (an Idempotency-Key header or "idempotency_key" makes
+                     retries safe; the default key is one per order, so pass
+                     a distinct key per part to split a bill)
+    POST /payments/batch  {"payments": [{"order_id": 7, ...}, ...]}
+    GET  /reports/summary?start=2024-01-01&end=2024-12-31
+    GET  /reports/revenue?period=Last 7 Days
+    GET  /reports/<sales|menu>?start=...&end=...[&format=csv]
+    GET  /events?after=<cursor>&entity=ORDERS,PAYMENT&limit=500
+    GET  /kitchen/tickets?station=STARTER,MAIN
+    GET  /kitchen/events?after=<cursor>&station=MAIN&wait=25
+    GET  /kitchen/stream?station=MAIN   (Server-Sent Events)
+    GET  /metrics    (Prometheus text; DB_PROFILE=1 adds latency histograms)
+
+Errors come back as {"error": message}: 400 for bad input, 404 for unknown
+paths or ids, 409 when the restaurant can't take the request (no free table,
+a booked slot, a reused idempotency key), and 500 with a fixed message (the
+details are logged).
+
+Kitchen displays load open tickets once, then follow /kitchen/events (long
+poll: answers as soon as there are events, or with an empty list after wait
+seconds) or /kitchen/stream, passing the returned cursor (or Last-Event-ID)
+back to resume. Both are served from the shared in-process TicketFeed, so
+connected displays add no database queries of their own.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import re
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import database
+import eventlog
+import exports
+import kitchen
+from database import DatabaseOperations
+
+db = DatabaseOperations()
+logger = logging.getLogger('api')
+
+ROUTES = []
+
+# Longest long-poll wait, and seconds between SSE keep-alive comments
+MAX_WAIT = 60
+HEARTBEAT = 15
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def route(method, pattern):
+    """Register handler(request, *groups) for method and a path regex"""
+    def decorator(fn):
+        ROUTES.append((method, re.compile(f'^{pattern}$'), fn))
+        return fn
+    return decorator
+
+
+def to_json(value):
+    """Records become objects keyed by field, rows by column"""
+    if hasattr(value, '_asdict'):
+        return {k: to_json(v) for k, v in value._asdict().items()}
+    if hasattr(value, 'keys') and not isinstance(value, dict):
+        return {k.lower(): to_json(value[k]) for k in value.keys()}
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _int(query, name, default=None):
+    value = query.get(name, default)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be an integer")
+
+
+def _required(data, *names):
+    missing = [name for name in names if data.get(name) is None]
+    if missing:
+        raise HTTPError(400, f"Missing field(s): {', '.join(missing)}")
+    return [data[name] for name in names]
+
+
+def _stations(query):
+    station = query.get('station')
+    return {s.strip().upper() for s in station.split(',') if s.strip()} if station else None
+
+
+def _date_range(query):
+    start, end = query.get('start'), query.get('end')
+    if not start or not end:
+        raise HTTPError(400, "start and end (YYYY-MM-DD) are required")
+    return start, end
+
+
+@route('GET', '/menu')
+def list_menu(request):
+    with database.get_db_connection() as conn:
+        version = database.menu_catalog.current_version(conn)
+    category = request.query.get('category')
+    etag = f'"menu-{version}-{category or ""}"' if version is not None else None
+    if etag and request.not_modified(etag):
+        return
+    if category:
+        items = db.get_menu_items_by_category(category)
+    else:
+        items = db.get_all_menu_items()
+    request.send_json(items, etag=etag)
+
+
+@route('GET', '/tables')
+def list_tables(request):
+    request.send_json(db.get_all_tables(), etag=True)
+
+
+@route('GET', '/tables/available')
+def available_tables(request):
+    party_size = _int(request.query, 'party_size', 1)
+    tables = [
+        {'table_number': number, 'seating_capacity': capacity}
+        for number, capacity in db.get_available_tables(party_size)
+    ]
+    request.send_json(tables, etag=True)
+
+
+@route('GET', '/orders')
+def list_orders(request):
+    query = request.query
+    filters = {'status': query['status']} if query.get('status') else None
+    orders, next_cursor = db.get_orders_page(
+        _int(query, 'after'), min(_int(query, 'limit', 50), 500), filters
+    )
+    request.send_json({'orders': orders, 'next': next_cursor})
+
+
+@route('GET', r'/orders/(\d+)')
+def get_order(request, order_id):
+    order, items = db.get_order_details(int(order_id))
+    if order is None:
+        raise HTTPError(404, f"Order {order_id} not found")
+    request.send_json({'order': order, 'items': items})
+
+
+@route('POST', '/orders')
+def create_order(request):
+    data = request.json()
+    customer_id, items = _required(data, 'customer_id', 'items')
+    items = [(int(item_id), int(quantity)) for item_id, quantity in items]
+    if data.get('table_number') is not None:
+        table_number = int(data['table_number'])
+        order_id = db.create_order(int(customer_id), table_number, items)
+    else:
+        order_id, table_number = db.seat_party(
+            int(customer_id), int(data.get('party_size', 1)), items
+        )
+    request.send_json({'order_id': order_id, 'table_number': table_number}, status=201)
+
+
+def _payment(data, default_key=None):
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Each payment must be a JSON object")
+    order_id, payment_mode, amount = _required(data, 'order_id', 'payment_mode', 'amount')
+    return int(order_id), payment_mode, float(amount), data.get('idempotency_key') or default_key
+
+
+@route('POST', '/payments')
+def create_payment(request):
+    order_id, payment_mode, amount, key = _payment(
+        request.json(), request.headers.get('Idempotency-Key')
+    )
+    transaction_id = db.process_payment(order_id, payment_mode, amount, key)
+    request.send_json({'order_id': order_id, 'transaction_id': transaction_id,
+                       'status': 'COMPLETED'}, status=201)
+
+
+@route('POST', '/payments/batch')
+def create_payments(request):
+    payments = [_payment(data) for data in _required(request.json(), 'payments')[0]]
+    transaction_ids = db.process_payments(payments)
+    request.send_json({'transaction_ids': transaction_ids}, status=201)
+
+
+@route('GET', '/reports/summary')
+def sales_summary(request):
+    request.send_json(db.get_sales_summary(*_date_range(request.query)))
+
+
+@route('GET', '/reports/revenue')
+def revenue(request):
+    request.send_json(db.get_revenue_metrics(request.query.get('period', 'Last 7 Days')))
+
+
+@route('GET', r'/reports/(sales|menu)')
+def report(request, name):
+    start, end = _date_range(request.query)
+    if request.query.get('format') == 'csv':
+        request.send_stream(exports.iter_csv(name, start, end), 'text/csv')
+        return
+    fetch = db.get_sales_report if name == 'sales' else db.get_menu_performance
+    request.send_json(fetch(start, end))
+
+
+@route('GET', '/events')
+def list_events(request):
+    query = request.query
+    entities = [e.strip().upper() for e in query['entity'].split(',')] if query.get('entity') else None
+    events, cursor = db.get_events(
+        _int(query, 'after'), entities, min(_int(query, 'limit', 500), 5000)
+    )
+    request.send_json({'events': [eventlog.as_dict(e) for e in events], 'cursor': cursor})
+
+
+@route('GET', '/kitchen/tickets')
+def kitchen_tickets(request):
+    tickets, cursor = db.get_kitchen_tickets(_stations(request.query))
+    request.send_json({'tickets': [kitchen.ticket(e) for e in tickets], 'cursor': cursor})
+
+
+@route('GET', '/kitchen/events')
+def kitchen_events(request):
+    query = request.query
+    wait = min(max(_int(query, 'wait', 25), 0), MAX_WAIT)
+    events, cursor = db.wait_kitchen_events(_int(query, 'after'), _stations(query), wait)
+    request.send_json({'events': [kitchen.ticket(e) for e in events], 'cursor': cursor})
+
+
+@route('GET', '/kitchen/stream')
+def kitchen_stream(request):
+    stations = _stations(request.query)
+    after = _int(request.headers, 'Last-Event-ID', request.query.get('after'))
+    request.send_response(200)
+    request.send_header('Content-Type', 'text/event-stream')
+    request.send_header('Cache-Control', 'no-cache')
+    request.send_header('Connection', 'close')
+    request.end_headers()
+    request.close_connection = True
+    request.wfile.flush()
+    try:
+        while True:
+            events, after = db.wait_kitchen_events(after, stations, HEARTBEAT)
+            if events:
+                for event in events:
+                    data = json.dumps(to_json(kitchen.ticket(event)), separators=(',', ':'))
+                    request.wfile.write(
+                        f'id: {event.event_id}\nevent: {event.event_type}\ndata: {data}\n\n'.encode()
+                    )
+            else:
+                request.wfile.write(f': {int(time.time())}\n\n'.encode())
+            request.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+
+
+@route('GET', '/metrics')
+def metrics(request):
+    request.send_text(database.get_prometheus_metrics(), 'text/plain; version=0.0.4')
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'RestaurantAPI/1.0'
+    # Headers and body leave in one write (flushed after each request) with
+    # Nagle off, so keep-alive clients don't stall on delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    quiet = False
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        # Read the body up front so an early error leaves the keep-alive
+        # connection in a clean state
+        self.body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            allowed = False
+            for route_method, pattern, handler in ROUTES:
+                match = pattern.match(url.path)
+                if match is None:
+                    continue
+                allowed = True
+                if route_method == method:
+                    handler(self, *match.groups())
+                    return
+            if allowed:
+                raise HTTPError(405, f"{method} not allowed on {url.path}")
+            raise HTTPError(404, f"No route for {url.path}")
+        except HTTPError as e:
+            self.send_json({'error': str(e)}, status=e.status)
+        except database.ConflictError as e:
+            self.send_json({'error': str(e)}, status=409)
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+        except Exception:
+            # Driver messages can carry SQL and paths: keep them in the log
+            logger.exception("%s %s failed", method, url.path)
+            self.send_json({'error': 'Internal server error'}, status=500)
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return data
+
+    def not_modified(self, etag):
+        """Send 304 and return True when the client already has etag"""
+        if etag not in self.headers.get('If-None-Match', ''):
+            return False
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        return True
+
+    def send_json(self, value, status=200, etag=None):
+        """Send value as JSON; etag=True derives the tag from the body"""
+        body = json.dumps(to_json(value), separators=(',', ':')).encode('utf-8')
+        if etag is True:
+            etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+            if self.not_modified(etag):
+                return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, text, content_type='text/plain'):
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, chunks, content_type):
+        """Send an iterable of byte chunks with chunked transfer encoding.
+
+        The first chunk is produced before the headers, so errors up to then
+        get a normal error response. A later error can't change the status
+        already sent: it is logged and the connection closed without the
+        final chunk, so the client sees a truncated response.
+        """
+        chunks = iter(chunks)
+        first = next(chunks, b'')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for chunk in itertools.chain([first], chunks):
+                if chunk:
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception:
+            logger.exception("Stream for %s failed", self.path)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8080, quiet=False):
+    APIHandler.quiet = quiet
+    server = ThreadingHTTPServer((host, port), APIHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the restaurant JSON API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--db', help='database path or URL (default: DB_FILE)')
+    parser.add_argument('--quiet', action='store_true', help='no per-request log lines')
+    args = parser.parse_args()
+
+    if args.db:
+        database.configure(db_path=args.db)
+    database.ensure_schema()
+    server = make_server(args.host, args.port, args.quiet)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        database.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""asyncio front end to DatabaseOperations.
+
+Every DatabaseOperations method is available as a coroutine that runs the
+blocking call on a shared worker thread pool, so independent reads overlap:
+
+    adb = AsyncDatabaseOperations()
+    customers, tables, menu = await adb.gather(
+        adb.get_all_customers(),
+        adb.get_available_tables(),
+        adb.get_all_menu_items(),
+    )
+
+Synchronous callers such as Streamlit scripts use adb.run(...) instead of
+await adb.gather(...). The pool is sized to the connection pool, since a
+worker holding no connection would only wait in ConnectionPool.acquire.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+from database import DatabaseOperations
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = get_script_run_ctx = None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=database.DB_POOL_SIZE,
+                    thread_name_prefix='db-async'
+                )
+    return _executor
+
+
+def shutdown():
+    """Stop the worker pool; it is recreated on the next call"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _in_context(func, ctx):
+    # Let st.error() from get_db_connection reach the calling session
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+    return func()
+
+
+class AsyncDatabaseOperations:
+    """DatabaseOperations whose methods return awaitables"""
+
+    def __init__(self, executor=None):
+        self.executor = executor
+
+    def __getattr__(self, name):
+        method = getattr(DatabaseOperations, name)
+        if name.startswith('_') or not callable(method):
+            raise AttributeError(name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor or get_executor(),
+                _in_context, functools.partial(method, *args, **kwargs), ctx
+            )
+
+        # Cache on the instance so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+    @staticmethod
+    async def gather(*calls):
+        """Await calls concurrently and return their results in order"""
+        return list(await asyncio.gather(*calls))
+
+    def run(self, *calls):
+        """gather() for synchronous code; must not be called from a running loop"""
+        return asyncio.run(self.gather(*calls))
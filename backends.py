@@ -0,0 +1,358 @@
+"""Storage backends behind DatabaseOperations.
+
+DB_FILE (see config.py) or DB_PATH picks the backend: a file path or
+sqlite:///path opens SQLite, a postgresql:// URL opens PostgreSQL through
+psycopg (3, or 2 as a fallback). Connections from either backend speak the
+sqlite3 API the data layer is written against -- qmark placeholders,
+conn.execute, cursor.lastrowid, row_factory, in_transaction -- so queries in
+database.py run unchanged.
+
+DB-API connections are wrapped: placeholders are translated to the driver's
+paramstyle, the few SQLite-only constructs in our SQL are rewritten, and
+INSERTs into tables with a surrogate key get RETURNING so lastrowid works.
+"""
+import csv
+import io
+import os
+import re
+import sqlite3
+import tempfile
+from functools import lru_cache
+
+# Tables whose INSERTs report the new key through cursor.lastrowid
+PRIMARY_KEYS = {
+    'CUSTOMER': 'CUSTOMER_ID',
+    'REST_TABLE': 'TABLE_NUMBER',
+    'MENU_ITEM': 'MENUITEM_NUMBER',
+    'ORDERS': 'ORDER_ID',
+    'PAYMENT': 'TRANSACTION_ID',
+    'RESERVATION': 'RESERVATION_ID',
+    'STAFF': 'STAFF_ID',
+}
+
+# SQLite-only SQL used by the app and migrations, and its PostgreSQL spelling
+POSTGRES_REWRITES = [
+    (re.compile(r'INTEGER PRIMARY KEY AUTOINCREMENT', re.I), 'SERIAL PRIMARY KEY'),
+    (re.compile(r"\(date\('now'\)\)", re.I), 'CURRENT_DATE'),
+    (re.compile(r"datetime\((\w+), '\+' \|\| (\w+) \|\| ' minutes'\)", re.I),
+     r"(CAST(\1 AS TIMESTAMP) + \2 * INTERVAL '1 minute')"),
+    (re.compile(r'^(\s*)BEGIN IMMEDIATE', re.I), r'\1BEGIN'),
+    (re.compile(r'^(\s*)INSERT OR IGNORE INTO (.*?)\s*$', re.I | re.S),
+     r'\1INSERT INTO \2 ON CONFLICT DO NOTHING'),
+]
+
+_INSERT = re.compile(r'^\s*INSERT\s+INTO\s+(\w+)', re.I)
+
+
+def insert_sql(table, columns):
+    return (f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})")
+
+
+@lru_cache(maxsize=1024)
+def translate_placeholders(sql, paramstyle):
+    """Rewrite qmark placeholders for a driver using another paramstyle.
+
+    Quoted strings and identifiers are left alone; for the format styles a
+    literal % is doubled so the driver does not read it as a placeholder.
+    """
+    if paramstyle == 'qmark':
+        return sql
+    if paramstyle not in ('format', 'pyformat', 'numeric'):
+        raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+    out = []
+    quote = None
+    count = 0
+    for ch in sql:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '?':
+            count += 1
+            out.append(f':{count}' if paramstyle == 'numeric' else '%s')
+            continue
+        if ch == '%' and paramstyle != 'numeric':
+            ch = '%%'
+        out.append(ch)
+    return ''.join(out)
+
+
+class SQLiteBackend:
+    """Connections to one SQLite file, with per-connection PRAGMAs"""
+
+    dialect = 'sqlite'
+    Error = sqlite3.Error
+    # SQLite allows one writer at a time, so WAL mode funnels writes through
+    # the writer thread (see database.WriteQueue)
+    single_writer = True
+
+    def __init__(self, path, pragmas=(), cached_statements=256):
+        self.pragmas = list(pragmas)
+        self.cached_statements = cached_statements
+        self._tempfile = None
+        if path == ':memory:':
+            # An in-memory database is private to one connection; pooled
+            # connections need a file they can all open
+            fd, path = tempfile.mkstemp(prefix='restaurant-', suffix='.db')
+            os.close(fd)
+            self._tempfile = path
+        self.path = path
+
+    def connect(self, autocommit=False):
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None if autocommit else '',
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def bulk_insert(self, cursor, table, columns, rows):
+        cursor.executemany(insert_sql(table, columns), rows)
+
+    def close(self):
+        if self._tempfile:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(self._tempfile + suffix)
+                except OSError:
+                    pass
+            self._tempfile = None
+
+
+class Row(tuple):
+    """sqlite3.Row stand-in: a tuple that also answers row['COLUMN']"""
+
+    def __new__(cls, cursor, values):
+        row = tuple.__new__(cls, values)
+        row._index = cursor._index
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key.upper()]
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._index)
+
+
+class Cursor:
+    """sqlite3-style cursor over a DB-API cursor"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.row_factory = connection.row_factory
+        self.description = None
+        self.lastrowid = None
+        self._raw = connection.raw.cursor()
+        self._index = {}
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    def execute(self, sql, params=()):
+        backend = self.connection.backend
+        self.connection._track(sql)
+        key = backend.returning_column(sql)
+        if key:
+            sql = f"{sql.rstrip().rstrip(';')} RETURNING {key}"
+        self._raw.execute(*backend.translate(sql, params))
+        self.lastrowid = self._raw.fetchone()[0] if key else None
+        self._describe(None if key else self._raw.description)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        if seq_of_params:
+            sql, _ = self.connection.backend.translate(sql, seq_of_params[0])
+            self._raw.executemany(sql, seq_of_params)
+        self.lastrowid = None
+        self._describe(None)
+        return self
+
+    def _describe(self, raw_description):
+        # Column names come back upper-case as they do from SQLite (PostgreSQL
+        # folds unquoted identifiers to lower case)
+        if raw_description is None:
+            self.description = None
+            self._index = {}
+            return
+        names = [column[0].upper() for column in raw_description]
+        self.description = tuple((name,) + (None,) * 6 for name in names)
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def _rows(self, rows):
+        factory = self.row_factory
+        if factory is None:
+            return [tuple(row) for row in rows]
+        return [factory(self, tuple(row)) for row in rows]
+
+    def fetchone(self):
+        row = self._raw.fetchone()
+        return None if row is None else self._rows([row])[0]
+
+    def fetchmany(self, size=None):
+        return self._rows(self._raw.fetchmany(size or self._raw.arraysize))
+
+    def fetchall(self):
+        return self._rows(self._raw.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._raw.close()
+
+
+class Connection:
+    """sqlite3-style connection over a DB-API connection in autocommit mode.
+
+    Transactions are opened and closed with explicit BEGIN/COMMIT statements,
+    as the data layer already does for SQLite, and tracked for in_transaction.
+    """
+
+    def __init__(self, backend, raw):
+        self.backend = backend
+        self.raw = raw
+        self.dialect = backend.dialect
+        self.row_factory = Row
+        self.isolation_level = None
+        self.in_transaction = False
+
+    def _track(self, sql):
+        words = sql.split(None, 2)
+        verb = words[0].upper() if words else ''
+        if verb in ('BEGIN', 'START'):
+            self.in_transaction = True
+        elif verb in ('COMMIT', 'END') or (
+                verb == 'ROLLBACK' and (len(words) < 2 or words[1].upper() != 'TO')):
+            self.in_transaction = False
+
+    def cursor(self):
+        return Cursor(self)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        if self.in_transaction:
+            self.execute('COMMIT')
+
+    def rollback(self):
+        if self.in_transaction:
+            self.execute('ROLLBACK')
+
+    def close(self):
+        self.raw.close()
+
+
+class DBAPIBackend:
+    """Any DB-API 2.0 driver whose connections can run in autocommit mode"""
+
+    dialect = 'generic'
+    single_writer = False
+    rewrites = ()
+
+    def __init__(self, driver, *connect_args, **connect_kwargs):
+        self.driver = driver
+        self.Error = driver.Error
+        self.paramstyle = driver.paramstyle
+        self.connect_args = connect_args
+        self.connect_kwargs = connect_kwargs
+
+    def connect(self, autocommit=False):
+        raw = self.driver.connect(*self.connect_args, **self.connect_kwargs)
+        if hasattr(raw, 'autocommit'):
+            raw.autocommit = True
+        return Connection(self, raw)
+
+    def translate(self, sql, params):
+        """(sql, params) ready for the driver's execute"""
+        for pattern, replacement in self.rewrites:
+            sql = pattern.sub(replacement, sql)
+        if not params:
+            return (sql,)
+        return translate_placeholders(sql, self.paramstyle), params
+
+    @staticmethod
+    def returning_column(sql):
+        match = _INSERT.match(sql)
+        if match is None or 'RETURNING' in sql.upper():
+            return None
+        return PRIMARY_KEYS.get(match.group(1).upper())
+
+    def bulk_insert(self, cursor, table, columns, rows):
+        cursor.executemany(insert_sql(table, columns), rows)
+
+    def close(self):
+        pass
+
+
+class PostgresBackend(DBAPIBackend):
+    """PostgreSQL through psycopg 3 (or psycopg2); bulk inserts use COPY"""
+
+    dialect = 'postgresql'
+    rewrites = POSTGRES_REWRITES
+
+    def __init__(self, url):
+        try:
+            import psycopg as driver
+        except ImportError:
+            try:
+                import psycopg2 as driver
+            except ImportError:
+                raise ImportError(
+                    "PostgreSQL support requires psycopg: pip install 'psycopg[binary]'"
+                ) from None
+        super().__init__(driver, url)
+
+    def bulk_insert(self, cursor, table, columns, rows):
+        copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        raw = cursor._raw
+        if hasattr(raw, 'copy'):
+            # psycopg 3
+            with raw.copy(copy_sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            raw.copy_expert(f"{copy_sql} WITH (FORMAT csv)", buffer)
+
+
+def error_class(conn):
+    """Base exception raised by conn's driver (sqlite3.Error for SQLite)"""
+    backend = getattr(conn, 'backend', None)
+    return backend.Error if backend is not None else sqlite3.Error
+
+
+def reset_sequences(cursor, keys):
+    """After INSERTs with explicit ids, move PostgreSQL SERIAL sequences past
+    them; keys maps table to key column. SQLite needs nothing."""
+    if getattr(cursor.connection, 'dialect', 'sqlite') != 'postgresql':
+        return
+    for table, key in keys.items():
+        cursor.execute(f'''
+            SELECT setval(pg_get_serial_sequence('{table.lower()}', '{key.lower()}'),
+                          COALESCE((SELECT MAX({key}) FROM {table}), 0) + 1, false)
+        ''')
+
+
+def get_backend(target, pragmas=(), cached_statements=256):
+    """Backend for a DB_FILE value: a SQLite path or a postgresql:// URL"""
+    if target.startswith(('postgres://', 'postgresql://')):
+        return PostgresBackend(target)
+    if target.startswith('sqlite:///'):
+        target = target[len('sqlite:///'):]
+    return SQLiteBackend(target, pragmas, cached_statements)
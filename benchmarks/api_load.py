@@ -0,0 +1,181 @@
+"""Load test for the JSON API (api.py).
+
+Starts the API in-process against a scratch copy of the database (or targets
+a running server with --url). Client threads on keep-alive connections
+replay a POS-like mix: menu and table polls with If-None-Match, order
+listings, new orders and payments. It reports p50/p99 latency and requests
+per second for each endpoint and overall.
+
+    python -m benchmarks.api_load [--clients 8] [--seconds 10] [--url http://host:8080]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, weight)
+MIX = [
+    ('GET /menu (etag)', 30),
+    ('GET /tables (etag)', 20),
+    ('GET /tables/available', 10),
+    ('GET /orders', 15),
+    ('GET /orders/<id>', 10),
+    ('POST /orders', 10),
+    ('POST /payments', 5),
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Client:
+    def __init__(self, host, port, rng):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.rng = rng
+        self.etags = {}
+        self.orders = []
+
+    def request(self, method, path, body=None, etag_key=None):
+        headers = {}
+        if etag_key and etag_key in self.etags:
+            headers['If-None-Match'] = self.etags[etag_key]
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        self.conn.request(method, path, payload, headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        if etag_key and response.getheader('ETag'):
+            self.etags[etag_key] = response.getheader('ETag')
+        return response.status, data
+
+    def step(self, name):
+        if name == 'GET /menu (etag)':
+            return self.request('GET', '/menu', etag_key='menu')
+        if name == 'GET /tables (etag)':
+            return self.request('GET', '/tables', etag_key='tables')
+        if name == 'GET /tables/available':
+            return self.request('GET', f'/tables/available?party_size={self.rng.randint(1, 6)}')
+        if name == 'GET /orders':
+            return self.request('GET', '/orders?limit=50')
+        if name == 'GET /orders/<id>':
+            order_id = self.rng.choice(self.orders) if self.orders else 1
+            return self.request('GET', f'/orders/{order_id}')
+        if name == 'POST /orders':
+            status, data = self.request('POST', '/orders', {
+                'customer_id': 1,
+                'table_number': self.rng.randint(1, 4),
+                'items': [[self.rng.randint(1, 17), self.rng.randint(1, 3)]],
+            })
+            if status == 201:
+                self.orders.append(json.loads(data)['order_id'])
+            return status, data
+        order_id = self.orders.pop() if self.orders else 1
+        return self.request('POST', '/payments', {
+            'order_id': order_id, 'payment_mode': 'CARD', 'amount': 10,
+        })
+
+
+def run_client(host, port, seed, deadline, results, errors):
+    rng = random.Random(seed)
+    client = Client(host, port, rng)
+    names = [name for name, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            status, _ = client.step(name)
+        except (OSError, http.client.HTTPException):
+            errors[name] += 1
+            client.conn.close()
+            continue
+        elapsed = time.perf_counter() - started
+        if status >= 400:
+            errors[name] += 1
+        results[name].append(elapsed)
+
+
+def start_local_server(db_path):
+    import database
+    import api
+
+    database.configure(db_path=db_path)
+    if not api.db.get_all_customers():
+        api.db.add_customer('Load', None, 'Test', '000-LOAD', 'load@test', None)
+    server = api.make_server('127.0.0.1', 0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--url', help='target a running server instead')
+    parser.add_argument('--db', default=os.path.join(ROOT, 'restaurant.db'),
+                        help='database copied for the in-process server')
+    args = parser.parse_args()
+
+    workdir = server = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        workdir = tempfile.mkdtemp()
+        db_path = os.path.join(workdir, 'restaurant.db')
+        shutil.copy(args.db, db_path)
+        server = start_local_server(db_path)
+        host, port = server.server_address[:2]
+
+    results = defaultdict(list)
+    errors = defaultdict(int)
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=run_client,
+                         args=(host, port, seed, deadline, results, errors))
+        for seed in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.clients} clients, {elapsed:.1f}s")
+    print(f"{'endpoint':<24}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    everything = []
+    for name, _ in MIX:
+        samples = results[name]
+        everything.extend(samples)
+        if not samples:
+            continue
+        print(f"{name:<24}{len(samples):>10}{errors[name]:>8}{len(samples) / elapsed:>10.0f}"
+              f"{percentile(samples, 50) * 1e3:>10.2f}{percentile(samples, 99) * 1e3:>10.2f}")
+    if everything:
+        print(f"{'total':<24}{len(everything):>10}{sum(errors.values()):>8}"
+              f"{len(everything) / elapsed:>10.0f}{statistics.median(everything) * 1e3:>10.2f}"
+              f"{percentile(everything, 99) * 1e3:>10.2f}")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
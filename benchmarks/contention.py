@@ -0,0 +1,87 @@
+"""Write-contention benchmark: orders/sec with N concurrent POS terminals.
+
+Runs the same workload against the classic rollback journal (every terminal
+writes on its own connection) and against WAL with the single writer thread,
+on a scratch copy of the schema.
+
+    python -m benchmarks.contention --writers 1 2 4 8 --orders 200
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import database
+from database import DatabaseOperations
+
+
+def run_case(mode, writers, orders_per_writer, workdir):
+    path = os.path.join(workdir, f'contention_{mode}_{writers}.db')
+    database.configure(db_path=path, pool_size=writers + 1, storage_mode=mode)
+
+    customer_id = DatabaseOperations.add_customer(
+        'Bench', None, 'Terminal', None, None, None
+    )
+    tables = [t.table_number for t in DatabaseOperations.get_all_tables()]
+    menu = [m.menuitem_number for m in DatabaseOperations.get_all_menu_items()]
+
+    errors = []
+    done = []
+    start_gate = threading.Event()
+
+    def terminal(seed):
+        rng = random.Random(seed)
+        start_gate.wait()
+        ok = 0
+        for _ in range(orders_per_writer):
+            items = [(item, rng.randint(1, 3)) for item in rng.sample(menu, 3)]
+            try:
+                DatabaseOperations.create_order(customer_id, rng.choice(tables), items)
+                ok += 1
+            except Exception as e:
+                errors.append(str(e))
+        done.append(ok)
+
+    threads = [threading.Thread(target=terminal, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    started = time.perf_counter()
+    start_gate.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    committed = sum(done)
+    return {
+        'mode': mode,
+        'writers': writers,
+        'orders': committed,
+        'errors': len(errors),
+        'seconds': elapsed,
+        'orders_per_sec': committed / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--orders', type=int, default=200,
+                        help='orders submitted by each writer')
+    parser.add_argument('--modes', nargs='+', default=['rollback', 'wal'])
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'writers':>8}{'orders':>8}{'errors':>8}{'orders/s':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for writers in args.writers:
+            for mode in args.modes:
+                result = run_case(mode, writers, args.orders, workdir)
+                print(f"{result['mode']:<10}{result['writers']:>8}"
+                      f"{result['orders']:>8}{result['errors']:>8}"
+                      f"{result['orders_per_sec']:>12.1f}")
+        database.shutdown()
+
+
+if __name__ == '__main__':
+    main()
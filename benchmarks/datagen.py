@@ -0,0 +1,238 @@
+"""Seeded synthetic dataset: months of customers, orders, ORDER_ITEMs,
+payments and reservations.
+
+The same --seed, --orders and --end always produce the same rows. Orders
+follow lunch and dinner peaks and busier weekends; customers are drawn with a
+long tail of regulars. Orders are paid (a few cancelled) and rolled into
+DAILY_REVENUE, except the latest few, which stay PENDING with their tables
+OCCUPIED. Rows are bulk-loaded in chunks (COPY on PostgreSQL), so they are
+not written to EVENT_LOG.
+
+    python -m benchmarks.datagen --db bench.db --orders 1000000 [--months 6] [--seed 42] [--end 2024-06-30]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import backends
+import rollups
+from create_database import init_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orders written per transaction
+CHUNK = 50000
+PAYMENT_MODES = (['CARD'] * 55) + (['CASH'] * 30) + (['UPI'] * 15)
+# Relative order volume per hour of day (lunch and dinner peaks)
+HOURLY = {11: 4, 12: 10, 13: 9, 14: 4, 15: 2, 16: 2, 17: 4, 18: 8, 19: 10, 20: 9, 21: 6, 22: 3}
+FIRST_NAMES = ['Asha', 'Ben', 'Chen', 'Divya', 'Elena', 'Farid', 'Grace', 'Hiro',
+               'Ines', 'Jonas', 'Kiran', 'Lena', 'Mateo', 'Nia', 'Omar', 'Priya']
+LAST_NAMES = ['Patel', 'Smith', 'Garcia', 'Kim', 'Nguyen', 'Okafor', 'Rossi',
+              'Silva', 'Sato', 'Kowalski', 'Haddad', 'Brown']
+
+
+def scale(orders, months):
+    """Customers, tables and reservations for a dataset of this size"""
+    return {
+        'customers': max(100, orders // 20),
+        'tables': max(20, min(200, orders // 5000)),
+        'reservations': max(50, orders // 20),
+        'days': max(1, round(months * 30.4)),
+    }
+
+
+def _order_times(rng, count, start, end):
+    """count order timestamps in [start, end], oldest first"""
+    hours = list(HOURLY)
+    weights = list(HOURLY.values())
+    span = (end - start).total_seconds()
+    times = []
+    for _ in range(count):
+        day = start + timedelta(seconds=rng.random() * span)
+        # Fridays to Sundays end up about a third busier than other days
+        if day.weekday() < 4 and rng.random() < 0.25:
+            day = start + timedelta(seconds=rng.random() * span)
+        hour = rng.choices(hours, weights)[0]
+        stamp = day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60),
+                            microsecond=0)
+        while stamp > end:
+            stamp -= timedelta(days=1)
+        times.append(max(stamp, start))
+    times.sort()
+    return times
+
+
+def _next_id(cursor, table, key):
+    cursor.execute(f'SELECT COALESCE(MAX({key}), 0) FROM {table}')
+    return cursor.fetchone()[0] + 1
+
+
+def generate(conn, backend, orders, months=6, seed=42, end=None, log=print):
+    """Load a synthetic dataset into conn (schema must be current)"""
+    rng = random.Random(seed)
+    sizes = scale(orders, months)
+    end = (end or datetime.now()).replace(microsecond=0)
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT MENUITEM_NUMBER, PRICE FROM MENU_ITEM')
+    menu = [(item_id, float(price)) for item_id, price in cursor.fetchall()]
+
+    cursor.execute('BEGIN')
+    customer_id = _next_id(cursor, 'CUSTOMER', 'CUSTOMER_ID')
+    customers = []
+    for n in range(sizes['customers']):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        customers.append((customer_id + n, first, None, last, f'555-{seed:03d}-{customer_id + n:07d}',
+                          f'{first}.{last}.{customer_id + n}@example.com'.lower(), None))
+    backend.bulk_insert(cursor, 'CUSTOMER', (
+        'CUSTOMER_ID', 'FIRST_NAME', 'MIDDLE_NAME', 'LAST_NAME', 'PHONE', 'EMAIL', 'ADDRESS'
+    ), customers)
+    customer_ids = [c[0] for c in customers]
+
+    cursor.execute('SELECT COUNT(*), COALESCE(MAX(BOOKING_ID), 0) FROM REST_TABLE')
+    existing, booking_id = cursor.fetchone()
+    table_number = _next_id(cursor, 'REST_TABLE', 'TABLE_NUMBER')
+    backend.bulk_insert(cursor, 'REST_TABLE', (
+        'TABLE_NUMBER', 'BOOKING_ID', 'SEATING_CAPACITY', 'BOOKING_STATUS'
+    ), [(table_number + n, booking_id + n + 1, rng.choice((2, 2, 4, 4, 4, 6, 8)), 'AVAILABLE')
+        for n in range(max(0, sizes['tables'] - existing))])
+    cursor.execute('SELECT TABLE_NUMBER, SEATING_CAPACITY FROM REST_TABLE')
+    tables = [tuple(row) for row in cursor.fetchall()]
+    conn.commit()
+
+    # Regulars: a fifth of the customers place most of the orders
+    regulars = customer_ids[:max(1, len(customer_ids) // 5)]
+    order_id = None
+    period = timedelta(days=sizes['days'])
+    # About one open order for every other table
+    pending_from = orders - len(tables) // 2
+    occupied = set()
+    loaded = 0
+    started = time.perf_counter()
+    for chunk_start in range(0, orders, CHUNK):
+        count = min(CHUNK, orders - chunk_start)
+        cursor.execute('BEGIN')
+        if order_id is None:
+            order_id = _next_id(cursor, 'ORDERS', 'ORDER_ID')
+            transaction_id = _next_id(cursor, 'PAYMENT', 'TRANSACTION_ID')
+        # Each chunk covers its share of the period, so ids follow time
+        chunk_from = end - period * (orders - chunk_start) / orders
+        chunk_to = end - period * (orders - chunk_start - count) / orders
+        order_rows, item_rows, payment_rows = [], [], []
+        for n, stamp in enumerate(_order_times(rng, count, chunk_from, chunk_to), chunk_start):
+            customer = rng.choice(regulars) if rng.random() < 0.6 else rng.choice(customer_ids)
+            table, _ = rng.choice(tables)
+            lines = rng.sample(menu, rng.choice((1, 2, 2, 3, 3, 4, 5)))
+            total = 0.0
+            for item_id, price in lines:
+                quantity = rng.choice((1, 1, 1, 2, 2, 3))
+                item_total = round(price * quantity, 2)
+                total += item_total
+                item_rows.append((order_id, item_id, quantity, item_total))
+            if n >= pending_from:
+                status = 'PENDING'
+                occupied.add(table)
+            elif rng.random() < 0.02:
+                status = 'CANCELLED'
+            else:
+                status = 'COMPLETED'
+                payment_rows.append((transaction_id, order_id, stamp.date().isoformat(),
+                                     rng.choice(PAYMENT_MODES), round(total, 2),
+                                     f'order-{order_id}'))
+                transaction_id += 1
+            order_rows.append((order_id, customer, table, stamp.date().isoformat(),
+                               stamp.isoformat(sep=' '), round(total, 2), status))
+            order_id += 1
+        backend.bulk_insert(cursor, 'ORDERS', (
+            'ORDER_ID', 'CUSTOMER_ID', 'TABLE_NUMBER', 'ORDER_DATE', 'ORDER_TIME',
+            'TOTAL_AMOUNT', 'ORDER_STATUS'
+        ), order_rows)
+        backend.bulk_insert(cursor, 'ORDER_ITEM', (
+            'ORDER_ID', 'MENUITEM_NUMBER', 'QUANTITY', 'ITEM_TOTAL'
+        ), item_rows)
+        backend.bulk_insert(cursor, 'PAYMENT', (
+            'TRANSACTION_ID', 'ORDER_ID', 'PAYMENT_DATE', 'PAYMENT_MODE', 'AMOUNT_PAID',
+            'IDEMPOTENCY_KEY'
+        ), payment_rows)
+        conn.commit()
+        loaded += count
+        log(f"  {loaded:>10,} orders  ({loaded / (time.perf_counter() - started):,.0f}/s)")
+
+    cursor.execute('BEGIN')
+    cursor.executemany('''
+        UPDATE REST_TABLE SET BOOKING_STATUS = 'OCCUPIED' WHERE TABLE_NUMBER = ?
+    ''', [(table,) for table in occupied])
+
+    # Two seatings a night per table, so bookings never overlap
+    reservation_id = _next_id(cursor, 'RESERVATION', 'RESERVATION_ID')
+    slots = set()
+    reservation_rows = []
+    first_day = end.date() - timedelta(days=sizes['days'])
+    span = sizes['days'] + 14
+    for _ in range(sizes['reservations']):
+        table, capacity = rng.choice(tables)
+        day = first_day + timedelta(days=rng.randrange(span))
+        hour = rng.choice((18, 20))
+        if (table, day, hour) in slots:
+            continue
+        slots.add((table, day, hour))
+        start = datetime.combine(day, datetime.min.time()).replace(hour=hour)
+        reservation_rows.append((reservation_id, rng.choice(customer_ids), table, day.isoformat(),
+                                 start.isoformat(sep=' '), rng.randint(1, capacity), 120))
+        reservation_id += 1
+    backend.bulk_insert(cursor, 'RESERVATION', (
+        'RESERVATION_ID', 'CUSTOMER_ID', 'TABLE_NUMBER', 'RESERVATION_DATE', 'RESERVATION_TIME',
+        'NUMBER_OF_PEOPLE', 'DURATION_MINUTES'
+    ), reservation_rows)
+
+    rollups.rebuild(cursor)
+    backends.reset_sequences(cursor, {
+        table: backends.PRIMARY_KEYS[table]
+        for table in ('CUSTOMER', 'REST_TABLE', 'ORDERS', 'PAYMENT', 'RESERVATION')
+    })
+    conn.commit()
+    return {
+        'orders': orders,
+        'customers': len(customers),
+        'tables': len(tables),
+        'reservations': len(reservation_rows),
+        'seed': seed,
+        'months': months,
+        'end': end.isoformat(sep=' '),
+    }
+
+
+def create(target, orders, months=6, seed=42, end=None, log=print):
+    """Create a fresh database at target (path or URL) holding the dataset"""
+    backend = backends.get_backend(target)
+    conn = backend.connect()
+    try:
+        init_database(conn)
+        if backend.dialect == 'sqlite':
+            # Bulk load: a crash only loses a scratch dataset
+            conn.execute('PRAGMA synchronous = OFF')
+        return generate(conn, backend, orders, months, seed, end, log)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', required=True, help='new database path or URL')
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--months', type=float, default=6)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=datetime.fromisoformat, help='last order time (default: now)')
+    args = parser.parse_args()
+
+    if '://' not in args.db and os.path.exists(args.db):
+        parser.error(f"{args.db} already exists")
+    started = time.perf_counter()
+    stats = create(args.db, args.orders, args.months, args.seed, args.end)
+    print(f"Generated {stats} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Submit-to-screen latency of the kitchen ticket feed.
+
+Starts the API in-process against a scratch copy of the database, connects
+--displays long-poll clients spread across the menu categories (stations) and
+posts orders through POST /orders. For every display that should see an
+order it records the time from submitting the order to receiving its ticket,
+and reports p50/p99/max against the 100 ms target together with how many
+database reads the shared feed made per second.
+
+    python -m benchmarks.kitchen_latency [--displays 12] [--orders 200] [--rate 20]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+from benchmarks.api_load import ROOT, percentile, start_local_server
+
+TARGET_MS = 100
+
+
+def run_display(port, station, cursor, received, stop):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while not stop.is_set():
+        conn.request('GET', f'/kitchen/events?after={cursor}&station={quote(station)}&wait=1')
+        data = json.loads(conn.getresponse().read())
+        now = time.perf_counter()
+        cursor = data['cursor']
+        # Tickets can arrive before the POST response, so match them up later
+        received[station].extend(
+            (event['order_id'], now) for event in data['events']
+            if event['event_type'] == 'NEW'
+        )
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--displays', type=int, default=12)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=20, help='orders per second')
+    parser.add_argument('--db', default=os.path.join(ROOT, 'restaurant.db'),
+                        help='database copied for the in-process server')
+    args = parser.parse_args()
+
+    import database
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'restaurant.db')
+    shutil.copy(args.db, db_path)
+    server = start_local_server(db_path)
+    port = server.server_address[1]
+    db = database.DatabaseOperations()
+
+    menu = db.get_all_menu_items()
+    stations = sorted({item.item_category for item in menu})
+    _, cursor = db.get_kitchen_tickets()
+
+    submitted = {}
+    received = defaultdict(list)
+    stop = threading.Event()
+    displays = [
+        threading.Thread(target=run_display,
+                         args=(port, stations[i % len(stations)], cursor,
+                               received, stop))
+        for i in range(args.displays)
+    ]
+    for thread in displays:
+        thread.start()
+    time.sleep(0.5)
+
+    rng = random.Random(0)
+    client = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    expected = 0
+    polls_before = database.kitchen_feed.stats['polls']
+    started = time.perf_counter()
+    for n in range(args.orders):
+        items = [[item.menuitem_number, rng.randint(1, 3)] for item in rng.sample(menu, 2)]
+        categories = {item.item_category for item in menu
+                      if item.menuitem_number in {i for i, _ in items}}
+        expected += sum(1 for i in range(args.displays)
+                        if stations[i % len(stations)] in categories)
+        body = json.dumps({'customer_id': 1, 'table_number': rng.randint(1, 4), 'items': items})
+        sent = time.perf_counter()
+        client.request('POST', '/orders', body, {'Content-Type': 'application/json'})
+        order_id = json.loads(client.getresponse().read())['order_id']
+        submitted[order_id] = sent
+        time.sleep(max(0.0, started + (n + 1) / args.rate - time.perf_counter()))
+    time.sleep(0.5)
+    elapsed = time.perf_counter() - started
+    polls = database.kitchen_feed.stats['polls'] - polls_before
+
+    stop.set()
+    for thread in displays:
+        thread.join()
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = {
+        station: [now - submitted[order_id] for order_id, now in received[station]
+                  if order_id in submitted]
+        for station in stations
+    }
+    samples = [s for station in stations for s in latencies[station]]
+    print(f"{args.displays} displays on {len(stations)} stations, "
+          f"{args.orders} orders at {args.rate:g}/s")
+    print(f"{'station':<16}{'tickets':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for station in stations + ['all']:
+        rows = samples if station == 'all' else latencies[station]
+        if rows:
+            print(f"{station:<16}{len(rows):>9}{percentile(rows, 50) * 1e3:>10.2f}"
+                  f"{percentile(rows, 99) * 1e3:>10.2f}{max(rows) * 1e3:>10.2f}")
+    print(f"delivered {len(samples)}/{expected} tickets; "
+          f"feed read the database {polls / elapsed:.1f} times/s for all displays")
+    if samples:
+        verdict = 'within' if percentile(samples, 99) * 1e3 < TARGET_MS else 'OVER'
+        print(f"p99 {verdict} the {TARGET_MS} ms target")
+
+
+if __name__ == '__main__':
+    main()
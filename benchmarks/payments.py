@@ -0,0 +1,119 @@
+"""Payment throughput and correctness under retries.
+
+Creates --orders orders on a scratch database, then settles them two ways:
+POS terminals calling process_payment concurrently, where every payment is
+submitted twice as a double-click or network retry would, and end-of-night
+close-out through process_payments in batches (also replayed once). Reports
+payments per second and checks that each order has exactly one PAYMENT row
+and is counted once in DAILY_REVENUE.
+
+    python -m benchmarks.payments [--orders 2000] [--terminals 4] [--batch 200]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import database
+from database import DatabaseOperations
+
+
+def create_orders(count):
+    customer_id = DatabaseOperations.add_customer('Bench', None, 'Payments', None, None, None)
+    tables = [t.table_number for t in DatabaseOperations.get_all_tables()]
+    menu = DatabaseOperations.get_all_menu_items()
+    orders = [
+        (customer_id, tables[n % len(tables)], [(menu[n % len(menu)].menuitem_number, 1 + n % 3)])
+        for n in range(count)
+    ]
+    order_ids = DatabaseOperations.create_orders(orders)
+    return [(order_id, menu[n % len(menu)].price * (1 + n % 3))
+            for n, order_id in enumerate(order_ids)]
+
+
+def check(order_ids):
+    with database.get_db_connection() as conn:
+        marks = ', '.join('?' * len(order_ids))
+        payments = conn.execute(f'''
+            SELECT COUNT(*), COUNT(DISTINCT ORDER_ID) FROM PAYMENT
+            WHERE ORDER_ID IN ({marks})
+        ''', order_ids).fetchone()
+        pending = conn.execute(f'''
+            SELECT COUNT(*) FROM ORDERS
+            WHERE ORDER_ID IN ({marks}) AND ORDER_STATUS <> 'COMPLETED'
+        ''', order_ids).fetchone()[0]
+        counted = conn.execute('''
+            SELECT COALESCE(SUM(ORDER_COUNT), 0) FROM DAILY_REVENUE
+        ''').fetchone()[0]
+    return payments[0], payments[1], pending, counted
+
+
+def run_case(name, workdir, orders, settle):
+    database.configure(db_path=os.path.join(workdir, f'payments_{name}.db'))
+    with database.get_db_connection() as conn:
+        counted_before = conn.execute(
+            'SELECT COALESCE(SUM(ORDER_COUNT), 0) FROM DAILY_REVENUE'
+        ).fetchone()[0]
+    created = create_orders(orders)
+    started = time.perf_counter()
+    submitted = settle(created)
+    elapsed = time.perf_counter() - started
+    rows, paid, pending, counted = check([order_id for order_id, _ in created])
+    ok = rows == paid == orders and pending == 0 and counted - counted_before == orders
+    print(f"{name:<28}{submitted:>10}{submitted / elapsed:>12.0f}{rows:>10}"
+          f"{'ok' if ok else 'MISMATCH':>10}")
+
+
+def settle_terminals(terminals):
+    def settle(created):
+        errors = []
+
+        def terminal(share):
+            for order_id, amount in share:
+                for _ in range(2):
+                    try:
+                        DatabaseOperations.process_payment(order_id, 'CARD', amount)
+                    except Exception as e:
+                        errors.append(e)
+
+        threads = [threading.Thread(target=terminal, args=(created[i::terminals],))
+                   for i in range(terminals)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            print(f"  {len(errors)} errors, e.g. {errors[0]}")
+        return 2 * len(created)
+    return settle
+
+
+def settle_batches(batch_size):
+    def settle(created):
+        batch = [(order_id, 'CASH', amount) for order_id, amount in created]
+        for _ in range(2):
+            for start in range(0, len(batch), batch_size):
+                DatabaseOperations.process_payments(batch[start:start + batch_size])
+        return 2 * len(batch)
+    return settle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--terminals', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'case':<28}{'submitted':>10}{'payments/s':>12}{'rows':>10}{'check':>10}")
+        run_case(f'{args.terminals} terminals, x2 retries', workdir, args.orders,
+                 settle_terminals(args.terminals))
+        run_case(f'batches of {args.batch}, replayed', workdir, args.orders,
+                 settle_batches(args.batch))
+        database.shutdown()
+
+
+if __name__ == '__main__':
+    main()
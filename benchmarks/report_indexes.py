@@ -0,0 +1,153 @@
+"""Report queries before and after the covering indexes of migration 10.
+
+Takes a benchmarks.suite dataset and makes a "before" copy with the
+migration's indexes swapped back for IDX_PAYMENT_ORDER. It runs
+index_advisor on that copy and prints what it proposes for ORDERS and
+PAYMENT. Then it times the report reads cold on both copies and prints
+their plans, checking that every report reads ORDERS with a single range
+seek on ORDER_STATUS and ORDER_DATE.
+
+    python -m benchmarks.report_indexes [--scale 100k] [--repeat 5] [--no-advise]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+
+import backends
+import database
+import index_advisor
+from benchmarks import suite
+from profiling import explain, normalize, profiler, statement_id
+
+REPORTS = ('get_sales_summary', 'get_sales_report', 'get_sales_report_page',
+           'get_menu_performance', 'get_daily_revenue', 'get_orders_page')
+# The other reports are timed to catch regressions only: get_daily_revenue
+# reads DAILY_REVENUE, and the keyset pages walk IDX_ORDERS_STATUS by ORDER_ID
+RANGE_SEEK = 'ORDER_STATUS=? AND ORDER_DATE>? AND ORDER_DATE<?'
+RANGED = ('get_sales_summary', 'get_sales_report', 'get_menu_performance')
+
+
+def make_before(path):
+    """Undo migration 10's indexes in the database at path"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript('''
+            DROP INDEX IF EXISTS IDX_ORDERS_STATUS_DATE;
+            DROP INDEX IF EXISTS IDX_PAYMENT_ORDER_PAID;
+            CREATE INDEX IF NOT EXISTS IDX_PAYMENT_ORDER ON PAYMENT(ORDER_ID);
+        ''')
+    finally:
+        conn.close()
+
+
+def measure(path, repeat):
+    """{method: (timing, {statement: plan})} for the report reads on path"""
+    DatabaseOperations = database.DatabaseOperations
+    database.configure(db_path=path)
+    try:
+        fixture = suite.Fixture(DatabaseOperations)
+        timings = {
+            name: suite.time_case(lambda _, read=suite.READS[name]: read(DatabaseOperations, fixture),
+                                  repeat)
+            for name in REPORTS
+        }
+        enabled, slow_ms = profiler.enabled, profiler.slow_ms
+        profiler.reset()
+        profiler.slow_ms = 0
+        profiler.enable()
+        try:
+            for name in REPORTS:
+                suite.READS[name](DatabaseOperations, fixture)
+            samples = dict(profiler.samples)
+            callers = {key: set(methods) for key, methods in profiler.callers.items()}
+        finally:
+            profiler.enabled, profiler.slow_ms = enabled, slow_ms
+            profiler.reset()
+        with database.get_db_connection() as conn:
+            plans = {
+                name: {key: explain(conn, sql, params) for key, (sql, params) in samples.items()
+                       if name in callers.get(key, ())}
+                for name in REPORTS
+            }
+    finally:
+        database.shutdown()
+    return {name: (timings[name], plans[name]) for name in REPORTS}
+
+
+def advise(path):
+    statements = index_advisor.collect(path, log=lambda _: None)
+    conn = backends.get_backend(path).connect()
+    try:
+        _, results = index_advisor.advise(conn, statements)
+    finally:
+        conn.close()
+    for result in results:
+        if result['verified'] and result['table'] in ('ORDERS', 'PAYMENT'):
+            methods = sorted({m for key in result['fixed'] for m in statements[key]['methods']})
+            print(f"  {index_advisor.index_sql(result['table'], result['columns'])}")
+            print(f"    fixes {', '.join(methods)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=list(suite.SCALES), default='100k')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join(suite.ROOT, '.bench-data'))
+    parser.add_argument('--no-advise', action='store_true', help='skip the index advisor run')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    source, _ = suite.dataset(args.data_dir, args.scale, args.seed)
+    paths = {name: os.path.join(args.data_dir, f'report_indexes_{name}.db')
+             for name in ('before', 'after')}
+    results = {}
+    try:
+        for name, path in paths.items():
+            shutil.copy(source, path)
+        # Bring both copies to the current schema before undoing the indexes
+        for path in paths.values():
+            database.configure(db_path=path)
+            database.shutdown()
+        make_before(paths['before'])
+
+        if not args.no_advise:
+            print(f"index_advisor on the {args.scale} 'before' copy (ORDERS and PAYMENT):")
+            advise(paths['before'])
+
+        for name, path in paths.items():
+            results[name] = measure(path, args.repeat)
+    finally:
+        for path in paths.values():
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    print(f"\n{args.scale} orders, cold median of {args.repeat} runs")
+    print(f"  {'method':<24}{'before ms':>11}{'after ms':>11}")
+    for method in REPORTS:
+        before = results['before'][method][0]['median_ms']
+        after = results['after'][method][0]['median_ms']
+        print(f"  {method:<24}{before:>11.2f}{after:>11.2f}   x{before / after:.2f}")
+
+    failed = []
+    for method in REPORTS:
+        for name in ('before', 'after'):
+            for key, plan in results[name][method][1].items():
+                print(f"\n  {name} {method} [{statement_id(key)}] {normalize(key)[:90]}")
+                for line in plan:
+                    print(f"    {line}")
+        if method in RANGED:
+            orders = [line for plan in results['after'][method][1].values() for line in plan
+                      if line.startswith('SEARCH O ')]
+            if not orders or not all(RANGE_SEEK in line for line in orders):
+                failed.append(method)
+    if failed:
+        print(f"\nORDERS is not read with a range seek by: {', '.join(failed)}")
+        raise SystemExit(1)
+    print(f"\nEvery report reads ORDERS with a range seek ({RANGE_SEEK})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Reservation load benchmark.
+
+Books tens of thousands of future reservations, then times the availability
+search ("which tables seating >= N are free from 19:00 to 21:00") through the
+ReservationBook interval index against the equivalent SQL query, plus
+create_reservation throughput.
+
+    python -m benchmarks.reservations --tables 200 --bookings 50000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import database
+import reservations
+from database import DatabaseOperations
+
+SQL_SEARCH = '''
+    SELECT T.TABLE_NUMBER, T.SEATING_CAPACITY
+    FROM REST_TABLE T
+    WHERE T.SEATING_CAPACITY >= ?
+    AND NOT EXISTS (
+        SELECT 1 FROM RESERVATION R
+        WHERE R.TABLE_NUMBER = T.TABLE_NUMBER
+        AND R.RESERVATION_TIME < ?
+        AND datetime(R.RESERVATION_TIME, '+' || R.DURATION_MINUTES || ' minutes') > ?
+    )
+    ORDER BY T.SEATING_CAPACITY, T.TABLE_NUMBER
+'''
+
+
+def build(path, tables, bookings, days, seed=7):
+    rng = random.Random(seed)
+    database.configure(db_path=path)
+    conn = sqlite3.connect(path)
+    conn.execute('DELETE FROM REST_TABLE')
+    conn.executemany('''
+        INSERT INTO REST_TABLE (TABLE_NUMBER, BOOKING_ID, SEATING_CAPACITY)
+        VALUES (?, ?, ?)
+    ''', [(n, n, rng.choice([2, 4, 4, 6, 8])) for n in range(1, tables + 1)])
+    conn.execute("INSERT INTO CUSTOMER (FIRST_NAME, LAST_NAME) VALUES ('Bench', 'Guest')")
+
+    # Non-overlapping two-hour slots per table over the coming days
+    base = datetime.now().replace(hour=11, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slots = [(t, d, h) for t in range(1, tables + 1) for d in range(days) for h in range(0, 12, 2)]
+    rows = []
+    for table_number, day, hour in rng.sample(slots, min(bookings, len(slots))):
+        start = base + timedelta(days=day, hours=hour)
+        rows.append((table_number, start.date().isoformat(),
+                     reservations.format_time(start), rng.randint(1, 4)))
+    conn.executemany('''
+        INSERT INTO RESERVATION (CUSTOMER_ID, TABLE_NUMBER, RESERVATION_DATE,
+                                 RESERVATION_TIME, NUMBER_OF_PEOPLE, DURATION_MINUTES)
+        VALUES (1, ?, ?, ?, ?, 120)
+    ''', rows)
+    conn.commit()
+    conn.close()
+    database.configure(db_path=path)
+    return base, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tables', type=int, default=200)
+    parser.add_argument('--bookings', type=int, default=50000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as workdir:
+        base, booked = build(os.path.join(workdir, 'reservations.db'),
+                             args.tables, args.bookings, args.days)
+        queries = [
+            (rng.randint(1, 8), base + timedelta(days=rng.randrange(args.days),
+                                                 hours=rng.choice([1, 8, 9])))
+            for _ in range(args.queries)
+        ]
+
+        started = time.perf_counter()
+        DatabaseOperations.find_available_tables(1, base)
+        load_ms = (time.perf_counter() - started) * 1e3
+
+        started = time.perf_counter()
+        for party_size, start in queries:
+            DatabaseOperations.find_available_tables(party_size, start, 120)
+        index_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        started = time.perf_counter()
+        with database.get_db_connection() as conn:
+            for party_size, start in queries:
+                end = start + timedelta(minutes=120)
+                conn.execute(SQL_SEARCH, (party_size, reservations.format_time(end),
+                                          reservations.format_time(start))).fetchall()
+        sql_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        created = 0
+        started = time.perf_counter()
+        for party_size, start in queries:
+            try:
+                DatabaseOperations.create_reservation(1, party_size, start + timedelta(minutes=30), 90)
+                created += 1
+            except ValueError:
+                pass
+        create_us = (time.perf_counter() - started) / len(queries) * 1e6
+        database.shutdown()
+
+    print(f"tables={args.tables} bookings={booked}")
+    print(f"index load:               {load_ms:10.1f} ms")
+    print(f"availability (index):     {index_us:10.1f} us/query")
+    print(f"availability (SQL):       {sql_us:10.1f} us/query")
+    print(f"create_reservation:       {create_us:10.1f} us/call ({created} booked)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Cold-start benchmark: import time and first paint per page.
+
+Each measurement runs in a fresh interpreter against a scratch copy of the
+database, so module imports and the once-per-process schema check are paid
+exactly as a new app worker would pay them.
+
+    python -m benchmarks.startup [--db restaurant.db] [--runs 3]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import restaurant
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "pandas": "pandas" in sys.modules,
+    "plotly_express": "plotly.express" in sys.modules,
+}))
+'''
+
+PAGE_PROBE = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+from restaurant import PAGES
+page = sys.argv[1]
+at = AppTest.from_file(sys.argv[2], default_timeout=60)
+started = time.perf_counter()
+at.run()
+first = time.perf_counter() - started
+started = time.perf_counter()
+if page != "Dashboard":
+    at.sidebar.radio[0].set_value(page).run()
+paint = time.perf_counter() - started
+print(json.dumps({"first_run": first, "page": paint,
+                  "errors": len(at.exception)}))
+'''
+
+
+def probe(code, workdir, *args):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    out = subprocess.run(
+        [sys.executable, '-c', code, *args],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=os.path.join(ROOT, 'restaurant.db'))
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from restaurant import PAGES
+
+    with tempfile.TemporaryDirectory() as workdir:
+        def fresh_db():
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            shutil.copy(args.db, os.path.join(workdir, 'restaurant.db'))
+
+        imports = []
+        for _ in range(args.runs):
+            fresh_db()
+            imports.append(probe(IMPORT_PROBE, workdir))
+        print(f"import restaurant: {statistics.median(r['seconds'] for r in imports) * 1e3:8.1f} ms "
+              f"(pandas loaded: {imports[0]['pandas']}, plotly.express loaded: {imports[0]['plotly_express']})")
+
+        print(f"{'page':<14}{'app start ms':>14}{'first paint ms':>16}")
+        script = os.path.join(ROOT, 'restaurant.py')
+        for page in PAGES:
+            runs = []
+            for _ in range(args.runs):
+                fresh_db()
+                runs.append(probe(PAGE_PROBE, workdir, page, script))
+            start_ms = statistics.median(r['first_run'] for r in runs) * 1e3
+            paint_ms = statistics.median(r['page'] for r in runs) * 1e3
+            flag = '  (errors)' if any(r['errors'] for r in runs) else ''
+            print(f"{page:<14}{start_ms:>14.1f}{paint_ms:>16.1f}{flag}")
+
+
+if __name__ == '__main__':
+    main()
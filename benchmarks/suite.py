@@ -0,0 +1,211 @@
+"""End-to-end benchmark suite: every DatabaseOperations method and every
+page's queries at several dataset sizes, written to JSON.
+
+Datasets come from benchmarks.datagen and are cached in --data-dir by size
+and seed; each run works on a fresh copy. Reads are timed cold (the query
+cache is cleared before every call) and writes run after them. Results carry
+the git commit, so two runs can be compared:
+
+    python -m benchmarks.suite [--scales 10k 1m 10m] [--repeat 5] [--out results.json]
+    python -m benchmarks.suite --scales 10k --compare baseline.json
+
+The cases come from workload.py. Methods that load whole tables (see
+UNBOUNDED) are skipped above UNBOUNDED_LIMIT orders. A 10m dataset takes
+about ten minutes to generate.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks import datagen
+from workload import PAGE_QUERIES, READS, UNBOUNDED, UNBOUNDED_LIMIT, WRITES, Fixture
+
+ROOT = datagen.ROOT
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+# Slower than this ratio against --compare counts as a regression, unless the
+# median moved by less than MIN_DELTA_MS (timer noise on sub-millisecond reads)
+REGRESSION_RATIO = 1.2
+MIN_DELTA_MS = 0.5
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(samples),
+        'min_ms': ordered[0] * 1e3,
+        'median_ms': statistics.median(ordered) * 1e3,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e3,
+        'mean_ms': statistics.fmean(ordered) * 1e3,
+    }
+
+
+def time_case(fn, repeat, setup=None):
+    from query_cache import query_cache
+
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        query_cache.clear()
+        started = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def dataset(data_dir, scale, seed):
+    """(path, stats) of the cached dataset for scale, generating it if needed"""
+    path = os.path.join(data_dir, f'orders_{scale}_seed{seed}.db')
+    if not os.path.exists(path):
+        print(f"generating {scale} dataset -> {path}")
+        partial = path + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        started = time.perf_counter()
+        stats = datagen.create(partial, SCALES[scale], seed=seed, log=lambda _: None)
+        stats['generate_s'] = round(time.perf_counter() - started, 1)
+        with open(path + '.json', 'w') as f:
+            json.dump(stats, f, indent=2)
+        os.replace(partial, path)
+    with open(path + '.json') as f:
+        return path, json.load(f)
+
+
+def run_scale(path, orders, repeat):
+    import database
+    from database import DatabaseOperations as db
+
+    database.configure(db_path=path)
+    database.ensure_schema()
+    fixture = Fixture(db)
+    results = {'methods': {}, 'pages': {}}
+
+    def record(name, fn, setup=None):
+        if name in UNBOUNDED and orders > UNBOUNDED_LIMIT:
+            results['methods'][name] = {'skipped': f'loads all rows above {UNBOUNDED_LIMIT:,} orders'}
+            return
+        try:
+            results['methods'][name] = time_case(fn, repeat, setup)
+        except Exception as e:
+            results['methods'][name] = {'error': str(e)}
+        print(f"  {name:<28}{_fmt(results['methods'][name])}")
+
+    for name, fn in READS.items():
+        record(name, lambda _, fn=fn: fn(db, fixture))
+    for page, names in PAGE_QUERIES.items():
+        calls = [READS[name] for name in names]
+        try:
+            results['pages'][page] = time_case(
+                lambda _: [call(db, fixture) for call in calls], repeat
+            )
+        except Exception as e:
+            results['pages'][page] = {'error': str(e)}
+        print(f"  page {page:<23}{_fmt(results['pages'][page])}")
+    for name, (setup, fn) in WRITES.items():
+        record(name, lambda arg, fn=fn: fn(db, fixture, arg),
+               (lambda setup=setup: setup(fixture)) if setup else None)
+
+    database.shutdown()
+    return results
+
+
+def _fmt(result):
+    if 'median_ms' in result:
+        return f"{result['median_ms']:>10.2f} ms median {result['p95_ms']:>10.2f} ms p95"
+    return f"  {result.get('skipped') or 'ERROR: ' + result['error']}"
+
+
+def compare(current, baseline_path):
+    """Print cases that got slower than REGRESSION_RATIO; returns their count"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"\nagainst {baseline_path} ({baseline.get('commit')})")
+    for scale, result in current['scales'].items():
+        before = baseline.get('scales', {}).get(scale)
+        if not before:
+            continue
+        for kind in ('methods', 'pages'):
+            for name, now in result[kind].items():
+                old = before.get(kind, {}).get(name, {})
+                if 'median_ms' not in now or 'median_ms' not in old:
+                    continue
+                ratio = now['median_ms'] / max(old['median_ms'], 1e-6)
+                if abs(now['median_ms'] - old['median_ms']) < MIN_DELTA_MS:
+                    continue
+                if ratio >= REGRESSION_RATIO or ratio <= 1 / REGRESSION_RATIO:
+                    label = 'SLOWER' if ratio > 1 else 'faster'
+                    regressions += ratio > 1
+                    print(f"  {scale:>4} {name:<28}{old['median_ms']:>10.2f} -> "
+                          f"{now['median_ms']:>10.2f} ms  x{ratio:.2f} {label}")
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['10k', '1m', '10m'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, '.bench-data'))
+    parser.add_argument('--out', default='benchmark-results.json')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    from database import DatabaseOperations
+    public = {name for name in vars(DatabaseOperations) if not name.startswith('_')}
+    missing = sorted(public - set(READS) - set(WRITES))
+    if missing:
+        print(f"warning: no benchmark case for {', '.join(missing)}")
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {
+        'commit': git_commit(),
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for scale in args.scales:
+        source, stats = dataset(args.data_dir, scale, args.seed)
+        work = os.path.join(args.data_dir, f'work_{scale}.db')
+        shutil.copy(source, work)
+        print(f"{scale} orders ({SCALES[scale]:,})")
+        try:
+            results['scales'][scale] = {'dataset': stats,
+                                        **run_scale(work, SCALES[scale], args.repeat)}
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(work + suffix):
+                    os.remove(work + suffix)
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.out}")
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Seat-assignment benchmark for venues with thousands of tables.
+
+Compares picking a table the old way (fetch every REST_TABLE row and filter
+in Python) with the TableAllocator capacity index, plus the cost of keeping
+the index current as tables are occupied and freed.
+
+    python -m benchmarks.table_allocation --tables 1000 5000 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import database
+from database import DatabaseOperations
+from table_allocator import TableAllocator
+
+
+def build_venue(path, tables, seed=42):
+    rng = random.Random(seed)
+    database.configure(db_path=path)
+    conn = sqlite3.connect(path)
+    conn.execute('DELETE FROM REST_TABLE')
+    conn.executemany('''
+        INSERT INTO REST_TABLE (TABLE_NUMBER, BOOKING_ID, SEATING_CAPACITY, BOOKING_STATUS)
+        VALUES (?, ?, ?, ?)
+    ''', [
+        (n, n, rng.choice([2, 2, 4, 4, 4, 6, 8, 10, 12]),
+         'AVAILABLE' if rng.random() < 0.5 else 'OCCUPIED')
+        for n in range(1, tables + 1)
+    ])
+    conn.execute("INSERT INTO CUSTOMER (FIRST_NAME, LAST_NAME) VALUES ('Bench', 'Guest')")
+    soon = datetime.now() + timedelta(minutes=30)
+    conn.executemany('''
+        INSERT INTO RESERVATION (CUSTOMER_ID, TABLE_NUMBER, RESERVATION_DATE,
+                                 RESERVATION_TIME, NUMBER_OF_PEOPLE)
+        VALUES (1, ?, ?, ?, 2)
+    ''', [
+        (n, soon.date().isoformat(), soon.strftime('%Y-%m-%d %H:%M:%S'))
+        for n in rng.sample(range(1, tables + 1), tables // 20)
+    ])
+    conn.commit()
+    conn.close()
+    database.configure(db_path=path)
+
+
+def naive_assign(party_size):
+    tables = DatabaseOperations.get_all_tables()
+    fitting = [
+        t for t in tables
+        if t.booking_status == 'AVAILABLE' and t.seating_capacity >= party_size
+    ]
+    if not fitting:
+        return None
+    return min(fitting, key=lambda t: (t.seating_capacity, t.table_number)).table_number
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def run(tables, repeat):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'venue.db')
+        build_venue(path, tables)
+        parties = [random.Random(i).randint(1, 10) for i in range(repeat)]
+
+        naive_us = timed(lambda i: naive_assign(parties[i]), repeat)
+        DatabaseOperations.suggest_table(1)  # load the index once
+        indexed_us = timed(lambda i: DatabaseOperations.suggest_table(parties[i]), repeat)
+
+        allocator = TableAllocator()
+        with database.get_db_connection() as conn:
+            started = time.perf_counter()
+            allocator.load(conn)
+            load_ms = (time.perf_counter() - started) * 1e3
+
+        def churn(i):
+            table_number = allocator.assign(parties[i])
+            if table_number is not None:
+                allocator.mark(table_number, 'OCCUPIED')
+                allocator.mark(table_number, 'AVAILABLE')
+        churn_us = timed(churn, repeat)
+        database.shutdown()
+
+    print(f"{tables:>8}{naive_us:>14.1f}{indexed_us:>14.1f}{churn_us:>14.1f}{load_ms:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tables', type=int, nargs='+', default=[100, 1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'tables':>8}{'scan us/op':>14}{'index us/op':>14}{'churn us/op':>14}{'load ms':>12}")
+    for tables in args.tables:
+        run(tables, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
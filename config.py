@@ -2,11 +2,18 @@ import os
 from pathlib import Path
 
 import streamlit as st
-from dotenv import load_dotenv
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    # python-dotenv is optional; without it only real environment variables apply
+    load_dotenv = None
 
 
 # Try to find and load a .env file by walking upward from this file's folder.
 def _load_env_upwards():
+    if load_dotenv is None:
+        return None
     start = Path(__file__).resolve().parent
     for parent in (start,) + tuple(start.parents):
         candidate = parent / '.env'
@@ -41,7 +48,8 @@ def get_secret(name, default=None):
     return os.getenv(name, default)
 
 
-# Database configuration: prefer DB_FILE from secrets/env; default to sqlite file locally
+# Database configuration: prefer DB_FILE from secrets/env; default to sqlite file locally.
+# A postgresql:// URL selects the PostgreSQL backend (see backends.py)
 DB_FILE = get_secret('DB_FILE', ':memory:' if IS_CLOUD else 'restaurant.db')
 
 
@@ -1,205 +1,1246 @@
-import sqlite3
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 import streamlit as st
 
+import backends
+import config
+import eventlog
+import kitchen
+import profiling
+import rollups
+from records import (Customer, KitchenEvent, MenuItem, Order, Table, record_factory,
+                     fetch_columns, fetch_frame)
+import reservations
+from menu_catalog import MenuCatalog
+from profiling import profiler
+from query_cache import cached, query_cache
+from table_allocator import TableAllocator
+
+# Database location: a SQLite path or a postgresql:// URL (see backends.py).
+# Defaults to DB_FILE from config.py
+DB_PATH = os.getenv('DB_PATH', config.DB_FILE)
+
+# Connection pool settings (override with environment variables)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', 256))
+
+# Storage mode: 'wal' (WAL journal + single writer thread) or 'rollback'
+# (classic rollback journal, every caller writes on its own connection)
+DB_STORAGE_MODE = os.getenv('DB_STORAGE_MODE', 'wal')
+DB_WRITE_QUEUE_SIZE = int(os.getenv('DB_WRITE_QUEUE_SIZE', 256))
+DB_WRITE_BATCH = int(os.getenv('DB_WRITE_BATCH', 32))
+DB_WRITE_TIMEOUT = float(os.getenv('DB_WRITE_TIMEOUT', 30))
+
+# PRAGMAs applied to every new connection
+CONNECTION_PRAGMAS = [
+    'PRAGMA foreign_keys = ON',
+]
+
+STORAGE_PRAGMAS = {
+    'wal': [
+        'PRAGMA journal_mode = WAL',
+        'PRAGMA synchronous = NORMAL',
+        'PRAGMA busy_timeout = 5000',
+        'PRAGMA cache_size = -16000',       # 16 MB page cache per connection
+        'PRAGMA mmap_size = 134217728',     # 128 MB memory-mapped reads
+        'PRAGMA temp_store = MEMORY',
+    ],
+    'rollback': [
+        'PRAGMA journal_mode = DELETE',
+    ],
+}
+
+
+def storage_pragmas(mode=None):
+    """PRAGMAs for a connection opened in the given storage mode"""
+    mode = mode or DB_STORAGE_MODE
+    if mode not in STORAGE_PRAGMAS:
+        raise ValueError(f"Unknown storage mode: {mode}")
+    return CONNECTION_PRAGMAS + STORAGE_PRAGMAS[mode]
+
+
+class ConflictError(ValueError):
+    """A valid request the restaurant's current state can't satisfy: no
+    free or big enough table, or an already booked slot"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived database connections.
+
+    Connections are opened lazily up to ``size`` and handed out one thread at a
+    time, so every Streamlit session reuses warm connections (and their
+    prepared statement caches) instead of connecting per call.
+    """
+
+    def __init__(self, backend, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.backend = backend
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        self.stats = {
+            'acquired': 0,
+            'created': 0,
+            'discarded': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'timeouts': 0,
+        }
+
+    def _connect(self):
+        return self.backend.connect()
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except self.backend.Error:
+            return False
+
+    def acquire(self):
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        started = time.perf_counter()
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._opened < self.size:
+                    self._opened += 1
+                    self.stats['created'] += 1
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._opened -= 1
+                        raise
+            if conn is None:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    self.stats['timeouts'] += 1
+                    raise TimeoutError(
+                        f"No database connection available after {self.timeout}s"
+                    )
+
+        if not self._is_healthy(conn):
+            self._discard(conn)
+            return self.acquire()
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.stats['acquired'] += 1
+            self.stats['wait_total'] += waited
+            self.stats['wait_max'] = max(self.stats['wait_max'], waited)
+        if profiler.enabled:
+            profiler.observe_wait(waited)
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except self.backend.Error:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._opened -= 1
+            self.stats['discarded'] += 1
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = self.size
+            stats['open'] = self._opened
+            stats['idle'] = self._idle.qsize()
+            stats['wait_avg'] = (
+                stats['wait_total'] / stats['acquired'] if stats['acquired'] else 0.0
+            )
+        return stats
+
+
+class WriteQueue:
+    """Dedicated writer thread that serializes all database writes.
+
+    Callers hand in a function taking a connection; it runs inside a write
+    transaction on the writer's own connection and its return value (or
+    exception) is passed back. Queued jobs are group-committed, each in its
+    own savepoint, so a burst of orders costs one fsync instead of one per
+    order; their EVENT_LOG rows go in with one executemany just before the
+    COMMIT. The queue is bounded, so a stalled disk pushes back on callers.
+    """
+
+    def __init__(self, backend, maxsize=DB_WRITE_QUEUE_SIZE, batch=DB_WRITE_BATCH):
+        self.backend = backend
+        self.batch = batch
+        self._jobs = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'committed': 0,
+            'failed': 0,
+            'transactions': 0,
+            'queue_full': 0,
+        }
+        self._thread = threading.Thread(
+            target=self._run, name='db-writer', daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, func, timeout=DB_WRITE_TIMEOUT):
+        """Run func(conn) on the writer thread and return its result"""
+        future = Future()
+        try:
+            self._jobs.put((func, future), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.stats['queue_full'] += 1
+            raise TimeoutError("Database write queue is full")
+        with self._lock:
+            self.stats['submitted'] += 1
+        return future.result(timeout=timeout)
+
+    def close(self):
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = self.backend.connect(autocommit=True)
+
+        running = True
+        while running:
+            jobs = [self._jobs.get()]
+            while len(jobs) < self.batch:
+                try:
+                    jobs.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            if None in jobs:
+                running = False
+                jobs = [job for job in jobs if job is not None]
+            if jobs:
+                self._run_batch(conn, jobs)
+        conn.close()
+
+    def _run_batch(self, conn, jobs):
+        done = []
+        profiled = profiler.wrap(conn)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for func, future in jobs:
+                conn.execute('SAVEPOINT job')
+                logged = eventlog.mark()
+                try:
+                    result = func(profiled)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    eventlog.discard(logged)
+                    future.set_exception(e)
+                    with self._lock:
+                        self.stats['failed'] += 1
+                else:
+                    conn.execute('RELEASE job')
+                    done.append((future, result))
+            eventlog.flush(profiled.cursor())
+            profiler.finish(profiled)
+            conn.execute('COMMIT')
+        except Exception as e:
+            profiler.finish(profiled)
+            eventlog.discard()
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            # Jobs that raised were already counted; fail the rest
+            failed = 0
+            for func, future in jobs:
+                if not future.done():
+                    future.set_exception(e)
+                    failed += 1
+            with self._lock:
+                self.stats['failed'] += failed
+            return
+
+        for future, result in done:
+            future.set_result(result)
+        with self._lock:
+            self.stats['committed'] += len(done)
+            self.stats['transactions'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['queued'] = self._jobs.qsize()
+        return stats
+
+
+_backend = None
+_pool = None
+_writer = None
+_report_executor = None
+_pool_lock = threading.Lock()
+
+# Shared in-process menu cache (see menu_catalog.py)
+menu_catalog = MenuCatalog()
+
+# Shared free-table index (see table_allocator.py)
+table_allocator = TableAllocator()
+
+# Shared reservation interval index (see reservations.py)
+reservation_book = reservations.ReservationBook()
+
+
+_backend_lock = threading.Lock()
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the storage backend for DB_PATH (see backends.py)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backends.get_backend(
+                    DB_PATH, storage_pragmas(), DB_STATEMENT_CACHE
+                )
+    return _backend
+
+
+def ensure_schema():
+    """Create or upgrade the schema of DB_PATH once per process.
+
+    The check is a single schema version read; init_database (pending
+    migrations plus sample data for a new database) only runs when the
+    database is older than create_database.SCHEMA_VERSION.
+    """
+    backend = get_backend()
+    if backend in _schema_ready:
+        return
+    with _schema_lock:
+        if backend in _schema_ready:
+            return
+        from create_database import ensure_schema as upgrade
+        conn = backend.connect()
+        try:
+            if not upgrade(conn):
+                raise RuntimeError(f"Schema initialization failed for {DB_PATH}")
+        finally:
+            conn.close()
+        _schema_ready.add(backend)
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Create the file or apply pending migrations
+                ensure_schema()
+                _pool = ConnectionPool(
+                    get_backend(), size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT
+                )
+                if profiling.PROFILE_FILE:
+                    profiler.start_export(profiling.PROFILE_FILE, get_prometheus_metrics)
+    return _pool
+
+
+def get_writer():
+    """Return the process-wide writer thread (WAL storage mode only)"""
+    global _writer
+    if _writer is None:
+        get_pool()
+        with _pool_lock:
+            if _writer is None:
+                _writer = WriteQueue(get_backend())
+    return _writer
+
+
+def get_report_executor():
+    """Return the process-wide background report executor (see report_jobs.py)"""
+    global _report_executor
+    if _report_executor is None:
+        get_pool()
+        with _pool_lock:
+            if _report_executor is None:
+                # Workers only need report_jobs, so load it on first use
+                import report_jobs
+                backend = get_backend()
+                target = backend.path if backend.dialect == 'sqlite' else DB_PATH
+                _report_executor = report_jobs.ReportExecutor(target)
+    return _report_executor
+
+
+def configure(db_path=None, pool_size=None, pool_timeout=None, storage_mode=None):
+    """Point the data layer at another database, resize the pool or switch
+    storage mode.
+
+    Any existing pool and writer are closed and rebuilt with the new settings.
+    """
+    global _backend, _pool, _writer, _report_executor, DB_PATH, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_STORAGE_MODE
+    with _pool_lock:
+        if db_path is not None:
+            DB_PATH = db_path
+        if pool_size is not None:
+            DB_POOL_SIZE = pool_size
+        if pool_timeout is not None:
+            DB_POOL_TIMEOUT = pool_timeout
+        if storage_mode is not None:
+            storage_pragmas(storage_mode)
+            DB_STORAGE_MODE = storage_mode
+        if _report_executor is not None:
+            _report_executor.close()
+            _report_executor = None
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        if _backend is not None:
+            _backend.close()
+            _backend = None
+        menu_catalog.invalidate()
+        table_allocator.invalidate()
+        reservation_book.invalidate()
+        kitchen_feed.reset()
+        query_cache.clear()
+    return get_pool()
+
+
+def shutdown():
+    """Stop the report workers and writer thread and close every pooled
+    connection"""
+    global _pool, _writer, _report_executor
+    with _pool_lock:
+        if _report_executor is not None:
+            _report_executor.close()
+            _report_executor = None
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_cache_stats():
+    """Query cache hit/miss counters per entity, plus the menu catalog's"""
+    stats = query_cache.get_stats()
+    stats['menu_catalog'] = dict(menu_catalog.stats)
+    return stats
+
+
+def get_pool_stats():
+    """Pool usage and wait-time metrics"""
+    stats = get_pool().get_stats()
+    if _writer is not None:
+        stats['writer'] = _writer.get_stats()
+    return stats
+
+
+def get_prometheus_metrics():
+    """Profiler histograms (see profiling.py) plus pool, writer and cache
+    counters, in the Prometheus text format"""
+    prefix = 'restaurant_db'
+    lines = [profiler.prometheus(prefix).rstrip('\n')]
+    metrics = []
+    pool = get_pool_stats()
+    for field in ('size', 'open', 'idle'):
+        metrics.append((f'{prefix}_pool_{field}', 'gauge', pool[field]))
+    for field in ('acquired', 'created', 'discarded', 'timeouts'):
+        metrics.append((f'{prefix}_pool_{field}_total', 'counter', pool[field]))
+    for field, value in pool.get('writer', {}).items():
+        if field == 'queued':
+            metrics.append((f'{prefix}_writer_queued', 'gauge', value))
+        else:
+            metrics.append((f'{prefix}_writer_{field}_total', 'counter', value))
+    cache = get_cache_stats()
+    metrics.append((f'{prefix}_cache_hits_total', 'counter', cache['hits']))
+    metrics.append((f'{prefix}_cache_misses_total', 'counter', cache['misses']))
+    metrics.append((f'{prefix}_cache_entries', 'gauge', cache['entries']))
+    for name, kind, value in metrics:
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
 @contextmanager
 def get_db_connection():
-    conn = None
+    pool = get_pool()
+    conn = pool.acquire()
+    profiled = profiler.wrap(conn)
     try:
-        # Create a new connection for each request with thread safety
-        conn = sqlite3.connect('restaurant.db', check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        
-        # Initialize database if it doesn't exist
-        if not os.path.exists('restaurant.db'):
-            from create_database import init_database
-            init_database()
-            
-            # Add sample data for new database
-            cursor = conn.cursor()
-            try:
-                cursor.execute("INSERT INTO REST_TABLE (BOOKING_ID, SEATING_CAPACITY, BOOKING_STATUS) VALUES (1, 4, 'AVAILABLE')")
-                cursor.execute("INSERT INTO REST_TABLE (BOOKING_ID, SEATING_CAPACITY, BOOKING_STATUS) VALUES (2, 2, 'AVAILABLE')")
-                cursor.execute("INSERT INTO MENU_ITEM (ITEM_NAME, ITEM_CATEGORY, PRICE, AVAILABILITY_STATUS) VALUES ('Burger', 'MAIN COURSE', 12.99, 'AVAILABLE')")
-                cursor.execute("INSERT INTO MENU_ITEM (ITEM_NAME, ITEM_CATEGORY, PRICE, AVAILABILITY_STATUS) VALUES ('Fries', 'STARTER', 5.99, 'AVAILABLE')")
-                conn.commit()
-            except sqlite3.IntegrityError:
-                pass
-        
-        yield conn
+        yield profiled
     except Exception as e:
         st.error(f"Database error: {str(e)}")
-        if conn and conn.in_transaction:
+        if conn.in_transaction:
             conn.rollback()
         raise
     finally:
-        if conn:
+        profiler.finish(profiled)
+        pool.release(conn)
+
+
+def run_write(func, invalidates=()):
+    """Run func(conn) inside a write transaction and return its result.
+
+    In WAL mode the work is queued to the single writer thread so readers
+    never wait behind writers; in rollback mode, or on a backend that takes
+    concurrent writers (PostgreSQL), it runs on a pooled connection. Cached reads tagged with any of ``invalidates``
+    are dropped once the write has committed. Events func queues with
+    eventlog.record() are written in the same transaction.
+    """
+    if DB_STORAGE_MODE == 'wal' and get_backend().single_writer:
+        try:
+            result = get_writer().submit(profiler.bind(func))
+        except Exception as e:
+            st.error(f"Database error: {str(e)}")
+            raise
+    else:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
             try:
-                if not conn.in_transaction:
-                    conn.commit()
-                conn.close()
-            except Exception:
-                pass
+                cursor.execute('BEGIN TRANSACTION')
+                result = func(conn)
+                eventlog.flush(cursor)
+                cursor.execute('COMMIT')
+            except Exception as e:
+                eventlog.discard()
+                cursor.execute('ROLLBACK')
+                raise e
+    query_cache.invalidate(*invalidates)
+    return result
+
+def iter_query(sql, params=(), chunk_size=1000):
+    """Yield lists of at most chunk_size rows from a query.
+
+    The pooled connection is held only while the generator is being consumed
+    and is released when it is exhausted or closed.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def fetch_page(cursor, sql, params, limit, key):
+    """Run a keyset-paginated query and return (rows, next_cursor).
+
+    sql must already be ordered by the key column and limited to ``limit + 1``
+    rows; key(row) gives the cursor value and next_cursor is None on the last
+    page.
+    """
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, key(rows[-1])
+    return rows, None
+
+
+def record_cursor(conn, cls):
+    """Cursor whose rows are ``cls`` records (see records.py)"""
+    cursor = conn.cursor()
+    cursor.row_factory = record_factory(cls)
+    return cursor
+
+
+def fetch_columnar(sql, params=(), as_frame=True, chunk_size=10000):
+    """Run a query and return its result as a DataFrame, or as
+    {column: numpy array} when as_frame is False, without building per-row
+    objects.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        if as_frame:
+            return fetch_frame(cursor, chunk_size)
+        return fetch_columns(cursor, chunk_size)
+
+
+def _kitchen_events_after(after_id, limit):
+    with get_db_connection() as conn:
+        cursor = record_cursor(conn, KitchenEvent)
+        cursor.execute('''
+            SELECT * FROM KITCHEN_EVENT
+            WHERE EVENT_ID > ?
+            ORDER BY EVENT_ID
+            LIMIT ?
+        ''', (after_id, limit))
+        return cursor.fetchall()
+
+
+def _latest_kitchen_event_id():
+    with get_db_connection() as conn:
+        return conn.execute('SELECT COALESCE(MAX(EVENT_ID), 0) FROM KITCHEN_EVENT').fetchone()[0]
+
+
+# Shared kitchen ticket feed (see kitchen.py)
+kitchen_feed = kitchen.TicketFeed(_kitchen_events_after, _latest_kitchen_event_id)
+
+
+# Keys/ids looked up per IN (...) query when settling payments
+PAYMENT_LOOKUP_CHUNK = 500
+
+
+def _default_payment_key(order_id):
+    # Also given to each order's first payment by migration 8
+    return f'order-{order_id}'
+
+
+def _payment_fingerprint(order_id, payment_mode, amount):
+    """What a reused idempotency key must match to count as a retry"""
+    return int(order_id), payment_mode, round(float(amount), 2)
+
+
+# Rows per fetch when get_analytics loads its columns
+ANALYTICS_CHUNK = 50000
+
+
+SALES_REPORT_SQL = '''
+    SELECT 
+        O.ORDER_ID,
+        O.ORDER_DATE,
+        C.FIRST_NAME || ' ' || C.LAST_NAME as CUSTOMER,
+        O.TOTAL_AMOUNT,
+        P.PAYMENT_MODE,
+        P.AMOUNT_PAID
+    FROM ORDERS O
+    JOIN CUSTOMER C ON O.CUSTOMER_ID = C.CUSTOMER_ID
+    LEFT JOIN PAYMENT P ON O.ORDER_ID = P.ORDER_ID
+    WHERE O.ORDER_DATE BETWEEN ? AND ?
+    AND O.ORDER_STATUS = 'COMPLETED'
+    ORDER BY O.ORDER_DATE DESC, O.ORDER_TIME DESC
+'''
+
+MENU_PERFORMANCE_SQL = '''
+    SELECT 
+        MI.ITEM_NAME,
+        MI.ITEM_CATEGORY,
+        SUM(OI.QUANTITY) as QUANTITY_SOLD,
+        SUM(OI.ITEM_TOTAL) as TOTAL_REVENUE
+    FROM MENU_ITEM MI
+    JOIN ORDER_ITEM OI ON MI.MENUITEM_NUMBER = OI.MENUITEM_NUMBER
+    JOIN ORDERS O ON OI.ORDER_ID = O.ORDER_ID
+    WHERE O.ORDER_DATE BETWEEN ? AND ?
+    AND O.ORDER_STATUS = 'COMPLETED'
+    GROUP BY MI.MENUITEM_NUMBER, MI.ITEM_NAME, MI.ITEM_CATEGORY
+    ORDER BY TOTAL_REVENUE DESC
+'''
+
+# Columns get_analytics loads for a date range, in the order analytics.summarize takes them
+ANALYTICS_SQL = {
+    'orders': '''
+        SELECT O.ORDER_ID, O.TABLE_NUMBER, O.ORDER_TIME, O.TOTAL_AMOUNT
+        FROM ORDERS O
+        WHERE O.ORDER_DATE BETWEEN ? AND ?
+        AND O.ORDER_STATUS = 'COMPLETED'
+    ''',
+    'items': '''
+        SELECT OI.ORDER_ID, OI.MENUITEM_NUMBER
+        FROM ORDERS O
+        JOIN ORDER_ITEM OI ON OI.ORDER_ID = O.ORDER_ID
+        WHERE O.ORDER_DATE BETWEEN ? AND ?
+        AND O.ORDER_STATUS = 'COMPLETED'
+    ''',
+    'reservations': '''
+        SELECT TABLE_NUMBER, RESERVATION_TIME, NUMBER_OF_PEOPLE, DURATION_MINUTES
+        FROM RESERVATION
+        WHERE RESERVATION_DATE BETWEEN ? AND ?
+    ''',
+    'tables': 'SELECT TABLE_NUMBER, SEATING_CAPACITY FROM REST_TABLE',
+    'menu': 'SELECT MENUITEM_NUMBER, ITEM_NAME FROM MENU_ITEM',
+}
+
 
 class DatabaseOperations:
     # Customer Operations
     @staticmethod
     def add_customer(first_name, middle_name, last_name, phone, email, address):
-        with get_db_connection() as conn:
+        def write(conn):
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO CUSTOMER (FIRST_NAME, MIDDLE_NAME, LAST_NAME, PHONE, EMAIL, ADDRESS)
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (first_name, middle_name, last_name, phone, email, address))
-            conn.commit()
+            eventlog.record('CUSTOMER', cursor.lastrowid, 'INSERT', {
+                'FIRST_NAME': first_name, 'MIDDLE_NAME': middle_name, 'LAST_NAME': last_name,
+                'PHONE': phone, 'EMAIL': email, 'ADDRESS': address,
+            })
             return cursor.lastrowid
+        return run_write(write, invalidates=('customers',))
 
     @staticmethod
+    @cached('customers')
     def get_all_customers():
         with get_db_connection() as conn:
-            cursor = conn.cursor()
+            cursor = record_cursor(conn, Customer)
             cursor.execute('SELECT * FROM CUSTOMER')
             return cursor.fetchall()
 
+    @staticmethod
+    @cached('customers')
+    def get_customers_page(after_customer_id=None, limit=50):
+        """One page of customers in CUSTOMER_ID order, starting after the cursor"""
+        with get_db_connection() as conn:
+            return fetch_page(record_cursor(conn, Customer), '''
+                SELECT * FROM CUSTOMER
+                WHERE CUSTOMER_ID > ?
+                ORDER BY CUSTOMER_ID
+                LIMIT ?
+            ''', (after_customer_id or 0, limit + 1), limit, lambda c: c.customer_id)
+
     # Table Operations
     @staticmethod
     def add_table(seating_capacity, status='AVAILABLE'):
-        with get_db_connection() as conn:
+        def write(conn):
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO REST_TABLE (BOOKING_ID, SEATING_CAPACITY, BOOKING_STATUS)
                 VALUES ((SELECT COALESCE(MAX(BOOKING_ID), 0) + 1 FROM REST_TABLE), ?, ?)
             ''', (seating_capacity, status))
-            conn.commit()
-            return cursor.lastrowid
+            table_number = cursor.lastrowid
+            cursor.execute('SELECT BOOKING_ID FROM REST_TABLE WHERE TABLE_NUMBER = ?', (table_number,))
+            eventlog.record('REST_TABLE', table_number, 'INSERT', {
+                'BOOKING_ID': cursor.fetchone()[0], 'SEATING_CAPACITY': seating_capacity,
+                'BOOKING_STATUS': status,
+            })
+            return table_number
+        table_number = run_write(write, invalidates=('tables',))
+        table_allocator.mark(table_number, status, seating_capacity)
+        reservation_book.invalidate()
+        return table_number
 
     @staticmethod
+    @cached('tables')
     def get_all_tables():
         with get_db_connection() as conn:
-            cursor = conn.cursor()
+            cursor = record_cursor(conn, Table)
             cursor.execute('SELECT * FROM REST_TABLE')
             return cursor.fetchall()
 
     @staticmethod
     def update_table_status(table_number, status):
-        with get_db_connection() as conn:
+        def write(conn):
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE REST_TABLE 
                 SET BOOKING_STATUS = ? 
                 WHERE TABLE_NUMBER = ?
             ''', (status, table_number))
-            conn.commit()
+            if not cursor.rowcount:
+                raise ValueError(f"Unknown table: {table_number}")
+            eventlog.record('REST_TABLE', table_number, 'UPDATE', {'BOOKING_STATUS': status})
+        run_write(write, invalidates=('tables',))
+        table_allocator.mark(table_number, status)
+
+    @staticmethod
+    def suggest_table(party_size):
+        """Smallest free table for the party (not held for a reservation)"""
+        with get_db_connection() as conn:
+            return table_allocator.ensure_loaded(conn).assign(party_size)
+
+    @staticmethod
+    def get_available_tables(party_size=1):
+        """(table_number, capacity) of free tables seating party_size, smallest first"""
+        with get_db_connection() as conn:
+            return table_allocator.ensure_loaded(conn).free_tables(party_size)
 
     # Menu Operations
     @staticmethod
     def add_menu_item(name, category, price, status='AVAILABLE'):
-        with get_db_connection() as conn:
+        def write(conn):
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO MENU_ITEM (ITEM_NAME, ITEM_CATEGORY, PRICE, AVAILABILITY_STATUS)
                 VALUES (?, ?, ?, ?)
             ''', (name, category, price, status))
-            conn.commit()
+            eventlog.record('MENU_ITEM', cursor.lastrowid, 'INSERT', {
+                'ITEM_NAME': name, 'ITEM_CATEGORY': category, 'PRICE': price,
+                'AVAILABILITY_STATUS': status,
+            })
             return cursor.lastrowid
+        item_id = run_write(write, invalidates=('menu',))
+        menu_catalog.invalidate()
+        return item_id
+
+    @staticmethod
+    def update_menu_item(item_id, price=None, status=None):
+        def write(conn):
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE MENU_ITEM
+                SET PRICE = COALESCE(?, PRICE),
+                    AVAILABILITY_STATUS = COALESCE(?, AVAILABILITY_STATUS)
+                WHERE MENUITEM_NUMBER = ?
+            ''', (price, status, item_id))
+            if not cursor.rowcount:
+                raise ValueError(f"Unknown menu item: {item_id}")
+            eventlog.record('MENU_ITEM', item_id, 'UPDATE', {
+                'PRICE': price, 'AVAILABILITY_STATUS': status,
+            })
+        run_write(write, invalidates=('menu',))
+        menu_catalog.invalidate()
 
     @staticmethod
     def get_all_menu_items():
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM MENU_ITEM')
-            return cursor.fetchall()
+            return menu_catalog.all_items(conn)
+
+    @staticmethod
+    def get_menu_items_by_category(category):
+        with get_db_connection() as conn:
+            return menu_catalog.category(conn, category)
 
     # Order Operations
+    @staticmethod
+    def _insert_orders(cursor, orders):
+        """Insert (customer_id, table_number, items) orders and their kitchen
+        tickets; returns their ids"""
+        menu = menu_catalog.lookup(
+            cursor.connection,
+            {item_id for _, _, items in orders for item_id, _ in items}
+        )
+
+        order_ids = []
+        order_items = []
+        tickets = []
+        for customer_id, table_number, items in orders:
+            # Calculate total amount first
+            item_details = [
+                (item_id, quantity, menu[item_id].price * quantity)
+                for item_id, quantity in items
+            ]
+            total_amount = sum(item_total for _, _, item_total in item_details)
+
+            # Create order with calculated total
+            cursor.execute('''
+                INSERT INTO ORDERS (CUSTOMER_ID, TABLE_NUMBER, TOTAL_AMOUNT)
+                VALUES (?, ?, ?)
+            ''', (customer_id, table_number, total_amount))
+            order_id = cursor.lastrowid
+            order_ids.append(order_id)
+            eventlog.record('ORDERS', order_id, 'INSERT', {
+                'CUSTOMER_ID': customer_id, 'TABLE_NUMBER': table_number,
+                'TOTAL_AMOUNT': total_amount, 'ITEMS': [list(d) for d in item_details],
+            })
+            order_items.extend(
+                (order_id, item_id, quantity, item_total)
+                for item_id, quantity, item_total in item_details
+            )
+            tickets.append((
+                order_id, table_number,
+                [(menu[item_id], quantity) for item_id, quantity in items]
+            ))
+
+        # Insert all order items using pre-calculated values (executemany on
+        # SQLite, COPY on PostgreSQL)
+        get_backend().bulk_insert(
+            cursor, 'ORDER_ITEM',
+            ('ORDER_ID', 'MENUITEM_NUMBER', 'QUANTITY', 'ITEM_TOTAL'),
+            order_items
+        )
+
+        # Update table status
+        tables = {o[1] for o in orders}
+        cursor.executemany('''
+            UPDATE REST_TABLE 
+            SET BOOKING_STATUS = 'OCCUPIED' 
+            WHERE TABLE_NUMBER = ?
+        ''', [(table_number,) for table_number in tables])
+        for table_number in tables:
+            eventlog.record('REST_TABLE', table_number, 'UPDATE', {'BOOKING_STATUS': 'OCCUPIED'})
+
+        kitchen.record_new(cursor, tickets)
+        return order_ids
+
     @staticmethod
     def create_order(customer_id, table_number, items):
-        with get_db_connection() as conn:
+        def write(conn):
             cursor = conn.cursor()
-            try:
-                cursor.execute('BEGIN TRANSACTION')
-                
-                # Calculate total amount first
-                total_amount = 0
-                item_details = []
-                for item_id, quantity in items:
-                    # Get item price
-                    cursor.execute('SELECT PRICE FROM MENU_ITEM WHERE MENUITEM_NUMBER = ?', (item_id,))
-                    price = cursor.fetchone()[0]
-                    item_total = price * quantity
-                    total_amount += item_total
-                    item_details.append((item_id, quantity, item_total))
-
-                # Create order with calculated total
+            return DatabaseOperations._insert_orders(
+                cursor, [(customer_id, table_number, items)]
+            )[0]
+        order_id = run_write(write, invalidates=('orders', 'tables'))
+        table_allocator.mark(table_number, 'OCCUPIED')
+        kitchen_feed.notify()
+        return order_id
+
+    @staticmethod
+    def seat_party(customer_id, party_size, items):
+        """Assign the smallest fitting free table and create the order on it.
+
+        The table is claimed with a conditional UPDATE in the same transaction
+        as the order, so two terminals can never get the same table even if
+        this process's index is briefly stale. Returns (order_id, table_number).
+        """
+        def write(conn):
+            cursor = conn.cursor()
+            allocator = table_allocator.ensure_loaded(conn)
+            tried = set()
+            reloaded = False
+            while True:
+                table_number = allocator.assign(party_size, exclude=tried)
+                if table_number is None:
+                    if reloaded:
+                        raise ConflictError(f"No free table for a party of {party_size}")
+                    # Tables freed by other processes are not in a stale index
+                    allocator.load(conn)
+                    reloaded = True
+                    continue
                 cursor.execute('''
-                    INSERT INTO ORDERS (CUSTOMER_ID, TABLE_NUMBER, TOTAL_AMOUNT)
-                    VALUES (?, ?, ?)
-                ''', (customer_id, table_number, total_amount))
-                order_id = cursor.lastrowid
-
-                # Add order items
-                # Insert order items using pre-calculated values
-                for item_id, quantity, item_total in item_details:
-                    cursor.execute('''
-                        INSERT INTO ORDER_ITEM (ORDER_ID, MENUITEM_NUMBER, QUANTITY, ITEM_TOTAL)
-                        VALUES (?, ?, ?, ?)
-                    ''', (order_id, item_id, quantity, item_total))
-
-                # Update table status
+                    UPDATE REST_TABLE
+                    SET BOOKING_STATUS = 'OCCUPIED'
+                    WHERE TABLE_NUMBER = ? AND BOOKING_STATUS = 'AVAILABLE'
+                ''', (table_number,))
+                if cursor.rowcount:
+                    break
+                # Taken by another process since the index was loaded: skip
+                # it and re-read the rest from this transaction
+                tried.add(table_number)
+                allocator.load(conn)
+                reloaded = True
+            order_id = DatabaseOperations._insert_orders(
+                cursor, [(customer_id, table_number, items)]
+            )[0]
+            return order_id, table_number
+        order_id, table_number = run_write(write, invalidates=('orders', 'tables'))
+        table_allocator.mark(table_number, 'OCCUPIED')
+        kitchen_feed.notify()
+        return order_id, table_number
+
+    @staticmethod
+    def create_orders(orders):
+        """Create many orders in one transaction (imports and replays).
+
+        orders is a list of (customer_id, table_number, items) tuples, where
+        items is a list of (menuitem_number, quantity). Returns the new order
+        ids in the same order; if any order fails none are written.
+        """
+        orders = list(orders)
+        if not orders:
+            return []
+
+        def write(conn):
+            cursor = conn.cursor()
+            return DatabaseOperations._insert_orders(cursor, orders)
+        order_ids = run_write(write, invalidates=('orders', 'tables'))
+        for table_number in {o[1] for o in orders}:
+            table_allocator.mark(table_number, 'OCCUPIED')
+        kitchen_feed.notify()
+        return order_ids
+
+    # Reservation Operations
+    @staticmethod
+    def create_reservation(customer_id, party_size, start,
+                           duration_minutes=reservations.DEFAULT_DURATION,
+                           table_number=None):
+        """Book a table for [start, start + duration).
+
+        Without table_number the smallest free table that seats the party is
+        chosen. Overlaps are re-checked in SQL inside the write transaction,
+        so bookings made by other processes are never double-booked.
+        Returns (reservation_id, table_number).
+        """
+        start = reservations.parse_time(start)
+        end = start + timedelta(minutes=duration_minutes)
+
+        def write(conn):
+            cursor = conn.cursor()
+            book = reservation_book.ensure_loaded(conn)
+            if table_number is not None:
+                capacity = book.capacity(table_number)
+                if capacity is None:
+                    raise ValueError(f"Unknown table: {table_number}")
+                if capacity < party_size:
+                    raise ConflictError(f"Table {table_number} seats only {capacity}")
+                candidates = [table_number]
+            else:
+                candidates = [t for t, _ in book.search(party_size, start, end)]
+
+            for candidate in candidates:
                 cursor.execute('''
-                    UPDATE REST_TABLE 
-                    SET BOOKING_STATUS = 'OCCUPIED' 
+                    SELECT 1 FROM RESERVATION
                     WHERE TABLE_NUMBER = ?
-                ''', (table_number,))
+                    AND RESERVATION_TIME < ?
+                    AND datetime(RESERVATION_TIME, '+' || DURATION_MINUTES || ' minutes') > ?
+                    LIMIT 1
+                ''', (candidate, reservations.format_time(end),
+                      reservations.format_time(start)))
+                if cursor.fetchone():
+                    # Booked by another process since the index was loaded
+                    book.invalidate()
+                    continue
+                cursor.execute('''
+                    INSERT INTO RESERVATION (CUSTOMER_ID, TABLE_NUMBER, RESERVATION_DATE,
+                                             RESERVATION_TIME, NUMBER_OF_PEOPLE, DURATION_MINUTES)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (customer_id, candidate, start.date().isoformat(),
+                      reservations.format_time(start), party_size, duration_minutes))
+                eventlog.record('RESERVATION', cursor.lastrowid, 'INSERT', {
+                    'CUSTOMER_ID': customer_id, 'TABLE_NUMBER': candidate,
+                    'RESERVATION_DATE': start.date().isoformat(),
+                    'RESERVATION_TIME': reservations.format_time(start),
+                    'NUMBER_OF_PEOPLE': party_size, 'DURATION_MINUTES': duration_minutes,
+                })
+                return cursor.lastrowid, candidate
+            raise ConflictError(
+                f"No table for {party_size} is free from {start:%Y-%m-%d %H:%M} to {end:%H:%M}"
+            )
 
-                cursor.execute('COMMIT')
-                return order_id
-            except Exception as e:
-                cursor.execute('ROLLBACK')
-                raise e
+        reservation_id, table = run_write(write, invalidates=('reservations',))
+        reservation_book.add(reservation_id, table, start, end)
+        table_allocator.invalidate()
+        return reservation_id, table
 
-    # Payment Operations
     @staticmethod
-    def process_payment(order_id, payment_mode, amount):
+    def cancel_reservation(reservation_id):
+        def write(conn):
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM RESERVATION WHERE RESERVATION_ID = ?', (reservation_id,))
+            if cursor.rowcount:
+                eventlog.record('RESERVATION', reservation_id, 'DELETE')
+            return cursor.rowcount > 0
+        cancelled = run_write(write, invalidates=('reservations',))
+        reservation_book.remove(reservation_id)
+        table_allocator.invalidate()
+        return cancelled
+
+    @staticmethod
+    def get_reservation(reservation_id):
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            try:
-                cursor.execute('BEGIN TRANSACTION')
-                
-                cursor.execute('''
-                    INSERT INTO PAYMENT (ORDER_ID, PAYMENT_MODE, AMOUNT_PAID)
-                    VALUES (?, ?, ?)
-                ''', (order_id, payment_mode, amount))
+            cursor.execute('''
+                SELECT R.*, C.FIRST_NAME, C.LAST_NAME
+                FROM RESERVATION R
+                LEFT JOIN CUSTOMER C ON R.CUSTOMER_ID = C.CUSTOMER_ID
+                WHERE R.RESERVATION_ID = ?
+            ''', (reservation_id,))
+            return cursor.fetchone()
 
-                cursor.execute('''
-                    UPDATE ORDERS 
-                    SET ORDER_STATUS = 'COMPLETED' 
-                    WHERE ORDER_ID = ?
-                ''', (order_id,))
+    @staticmethod
+    @cached('reservations')
+    def get_reservations(date=None, customer_id=None, upcoming_only=False, limit=100):
+        """Reservations for a day and/or customer, earliest first"""
+        conditions = []
+        params = []
+        if date is not None:
+            conditions.append('R.RESERVATION_DATE = ?')
+            params.append(str(date))
+        if customer_id is not None:
+            conditions.append('R.CUSTOMER_ID = ?')
+            params.append(customer_id)
+        if upcoming_only:
+            conditions.append('R.RESERVATION_TIME >= ?')
+            params.append(reservations.format_time(datetime.now()))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT R.*, C.FIRST_NAME, C.LAST_NAME
+                FROM RESERVATION R
+                LEFT JOIN CUSTOMER C ON R.CUSTOMER_ID = C.CUSTOMER_ID
+                {where}
+                ORDER BY R.RESERVATION_TIME
+                LIMIT ?
+            ''', params + [limit])
+            return cursor.fetchall()
 
-                # Free up the table
-                cursor.execute('''
-                    UPDATE REST_TABLE 
-                    SET BOOKING_STATUS = 'AVAILABLE' 
-                    WHERE TABLE_NUMBER = (
-                        SELECT TABLE_NUMBER 
-                        FROM ORDERS 
-                        WHERE ORDER_ID = ?
+    @staticmethod
+    def find_available_tables(party_size, start,
+                              duration_minutes=reservations.DEFAULT_DURATION,
+                              limit=None):
+        """(table_number, capacity) free for the whole slot, smallest first"""
+        start = reservations.parse_time(start)
+        end = start + timedelta(minutes=duration_minutes)
+        with get_db_connection() as conn:
+            book = reservation_book.ensure_loaded(conn)
+        return book.search(party_size, start, end, limit)
+
+    # Payment Operations
+    @staticmethod
+    def _settle_payments(cursor, payments):
+        """Record (order_id, payment_mode, amount, idempotency_key) payments.
+
+        A key that is already recorded -- a retried or double-submitted
+        payment -- resolves to its existing transaction and changes nothing.
+        A key recorded for another order, mode or amount raises
+        ConflictError. Orders are completed (and rolled into DAILY_REVENUE)
+        once, and their tables are freed only then: a later payment on a
+        completed order leaves a reseated table alone. Returns
+        (transaction_ids, freed table numbers).
+        """
+        keys = list({payment[3] for payment in payments})
+        transactions = {}
+        fingerprints = {}
+        for start in range(0, len(keys), PAYMENT_LOOKUP_CHUNK):
+            chunk = keys[start:start + PAYMENT_LOOKUP_CHUNK]
+            cursor.execute(f'''
+                SELECT IDEMPOTENCY_KEY, TRANSACTION_ID, ORDER_ID, PAYMENT_MODE, AMOUNT_PAID
+                FROM PAYMENT
+                WHERE IDEMPOTENCY_KEY IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            for key, transaction_id, order_id, payment_mode, amount in cursor.fetchall():
+                transactions[key] = transaction_id
+                fingerprints[key] = _payment_fingerprint(order_id, payment_mode, amount)
+
+        new = []
+        for order_id, payment_mode, amount, key in payments:
+            fingerprint = _payment_fingerprint(order_id, payment_mode, amount)
+            if key in fingerprints:
+                if fingerprints[key] != fingerprint:
+                    raise ConflictError(
+                        f"Idempotency key {key} was already used for another payment"
                     )
-                ''', (order_id,))
+                continue
+            fingerprints[key] = fingerprint
+            transactions[key] = None
+            new.append((order_id, payment_mode, amount, key))
+        if not new:
+            return [transactions[p[3]] for p in payments], set()
 
-                cursor.execute('COMMIT')
-            except Exception as e:
-                cursor.execute('ROLLBACK')
-                raise e
-    # In database.py, add this method to the DatabaseOperations class
+        order_ids = list({order_id for order_id, _, _, _ in new})
+        orders = {}
+        for start in range(0, len(order_ids), PAYMENT_LOOKUP_CHUNK):
+            chunk = order_ids[start:start + PAYMENT_LOOKUP_CHUNK]
+            cursor.execute(f'''
+                SELECT ORDER_ID, TABLE_NUMBER, ORDER_STATUS FROM ORDERS
+                WHERE ORDER_ID IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            orders.update((order_id, (table, status)) for order_id, table, status in cursor.fetchall())
+
+        missing = [order_id for order_id in order_ids if order_id not in orders]
+        if missing:
+            raise ValueError(f"Unknown order(s): {', '.join(map(str, missing))}")
+
+        completed = []
+        for order_id, payment_mode, amount, key in new:
+            cursor.execute('''
+                INSERT INTO PAYMENT (ORDER_ID, PAYMENT_MODE, AMOUNT_PAID, IDEMPOTENCY_KEY)
+                VALUES (?, ?, ?, ?)
+            ''', (order_id, payment_mode, amount, key))
+            transactions[key] = cursor.lastrowid
+            eventlog.record('PAYMENT', cursor.lastrowid, 'INSERT', {
+                'ORDER_ID': order_id, 'PAYMENT_MODE': payment_mode,
+                'AMOUNT_PAID': amount, 'IDEMPOTENCY_KEY': key,
+            })
+            table_number, status = orders[order_id]
+            # Roll the order into DAILY_REVENUE and clear its kitchen tickets
+            # once, when it first completes
+            if status != 'COMPLETED':
+                orders[order_id] = (table_number, 'COMPLETED')
+                completed.append((order_id,))
+                rollups.add_order(cursor, order_id, payment_mode)
+                kitchen.record_status(cursor, order_id, 'COMPLETED')
+                eventlog.record('ORDERS', order_id, 'UPDATE', {'ORDER_STATUS': 'COMPLETED'})
+
+        cursor.executemany('''
+            UPDATE ORDERS
+            SET ORDER_STATUS = 'COMPLETED'
+            WHERE ORDER_ID = ?
+        ''', completed)
+
+        # Free up the tables of the orders completed here
+        tables = {orders[order_id][0] for (order_id,) in completed}
+        cursor.executemany('''
+            UPDATE REST_TABLE
+            SET BOOKING_STATUS = 'AVAILABLE'
+            WHERE TABLE_NUMBER = ?
+        ''', [(table_number,) for table_number in tables])
+        for table_number in tables:
+            eventlog.record('REST_TABLE', table_number, 'UPDATE', {'BOOKING_STATUS': 'AVAILABLE'})
+        return [transactions[p[3]] for p in payments], tables
+
+    @staticmethod
+    def process_payment(order_id, payment_mode, amount, idempotency_key=None):
+        """Pay an order and free its table; returns the TRANSACTION_ID.
+
+        Submitting the same idempotency_key again returns the original
+        transaction instead of charging twice; reusing it for a different
+        order, mode or amount raises ConflictError. The key defaults to one
+        per order, so a double-clicked submit cannot record two payments and
+        an order takes a single payment: to split a bill, pass a distinct key
+        for each part.
+        """
+        key = idempotency_key or _default_payment_key(order_id)
+
+        def write(conn):
+            return DatabaseOperations._settle_payments(
+                conn.cursor(), [(order_id, payment_mode, amount, key)]
+            )
+        (transaction_id,), tables = run_write(
+            write, invalidates=('orders', 'tables', 'reports')
+        )
+        for table_number in tables:
+            table_allocator.mark(table_number, 'AVAILABLE')
+        kitchen_feed.notify()
+        return transaction_id
 
     @staticmethod
+    def process_payments(batch):
+        """Settle many payments in one transaction (end-of-night close-out).
+
+        batch holds (order_id, payment_mode, amount) or (order_id,
+        payment_mode, amount, idempotency_key) tuples. Returns the
+        TRANSACTION_IDs in the same order; if any payment fails none are
+        recorded, and replaying the batch is safe.
+        """
+        payments = [
+            (p[0], p[1], p[2], p[3] if len(p) > 3 and p[3] else _default_payment_key(p[0]))
+            for p in batch
+        ]
+        if not payments:
+            return []
+
+        def write(conn):
+            return DatabaseOperations._settle_payments(conn.cursor(), payments)
+        transaction_ids, tables = run_write(
+            write, invalidates=('orders', 'tables', 'reports')
+        )
+        for table_number in tables:
+            table_allocator.mark(table_number, 'AVAILABLE')
+        kitchen_feed.notify()
+        return transaction_ids
+
+    @staticmethod
+    @cached('orders', 'customers')
     def get_all_orders():
         with get_db_connection() as conn:
-            cursor = conn.cursor()
+            cursor = record_cursor(conn, Order)
             cursor.execute('''
                 SELECT O.*, C.FIRST_NAME, C.LAST_NAME
                 FROM ORDERS O
@@ -209,9 +1250,138 @@ class DatabaseOperations:
             return cursor.fetchall()
 
     @staticmethod
-    def get_order_details(order_id):
+    @cached('orders', 'customers')
+    def get_pending_orders():
+        """Unpaid orders, oldest first (served by IDX_ORDERS_STATUS)"""
+        with get_db_connection() as conn:
+            cursor = record_cursor(conn, Order)
+            cursor.execute('''
+                SELECT O.*, C.FIRST_NAME, C.LAST_NAME
+                FROM ORDERS O
+                LEFT JOIN CUSTOMER C ON O.CUSTOMER_ID = C.CUSTOMER_ID
+                WHERE O.ORDER_STATUS = 'PENDING'
+                ORDER BY O.ORDER_ID
+            ''')
+            return cursor.fetchall()
+
+    # Kitchen Operations
+    @staticmethod
+    def get_kitchen_tickets(stations=None):
+        """Open tickets (NEW events of unpaid orders), oldest first.
+
+        Returns (tickets, cursor); a display shows the tickets and then waits
+        for events after cursor with wait_kitchen_events.
+        """
+        with get_db_connection() as conn:
+            latest = conn.execute(
+                'SELECT COALESCE(MAX(EVENT_ID), 0) FROM KITCHEN_EVENT'
+            ).fetchone()[0]
+            cursor = record_cursor(conn, KitchenEvent)
+            cursor.execute('''
+                SELECT K.*
+                FROM KITCHEN_EVENT K
+                JOIN ORDERS O ON K.ORDER_ID = O.ORDER_ID
+                WHERE K.EVENT_TYPE = 'NEW'
+                AND O.ORDER_STATUS = 'PENDING'
+                AND K.EVENT_ID <= ?
+                ORDER BY K.EVENT_ID
+            ''', (latest,))
+            stations = set(stations or ())
+            return [e for e in cursor.fetchall() if kitchen.matches(e, stations)], latest
+
+    @staticmethod
+    def wait_kitchen_events(after_id=None, stations=None, timeout=25):
+        """Block until kitchen events after after_id arrive at the given
+        stations (ITEM_CATEGORY values); returns (events, cursor)"""
+        return kitchen_feed.wait(after_id, stations, timeout)
+
+    # Event Log Operations
+    @staticmethod
+    def get_events(after_id=None, entities=None, limit=500):
+        """EVENT_LOG entries after the cursor, oldest first, optionally only
+        for some tables. Returns (events, cursor); pass cursor back as
+        after_id to consume the log incrementally."""
+        after_id = after_id or 0
+        with get_db_connection() as conn:
+            events = eventlog.read(conn.cursor(), after_id, entities, limit)
+        return events, events[-1].event_id if events else after_id
+
+    @staticmethod
+    @cached('orders', 'customers')
+    def get_orders_page(after_order_id=None, limit=50, filters=None):
+        """One page of orders, newest first, starting after the cursor.
+
+        filters may contain status, customer_id, table_number, start_date and
+        end_date. Returns (rows, next_cursor); pass next_cursor back as
+        after_order_id to get the following page.
+        """
+        filters = filters or {}
+        conditions = []
+        params = []
+        if after_order_id is not None:
+            conditions.append('O.ORDER_ID < ?')
+            params.append(after_order_id)
+        if filters.get('status'):
+            conditions.append('O.ORDER_STATUS = ?')
+            params.append(filters['status'])
+        if filters.get('customer_id'):
+            conditions.append('O.CUSTOMER_ID = ?')
+            params.append(filters['customer_id'])
+        if filters.get('table_number'):
+            conditions.append('O.TABLE_NUMBER = ?')
+            params.append(filters['table_number'])
+        if filters.get('start_date'):
+            conditions.append('O.ORDER_DATE >= ?')
+            params.append(str(filters['start_date']))
+        if filters.get('end_date'):
+            conditions.append('O.ORDER_DATE <= ?')
+            params.append(str(filters['end_date']))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with get_db_connection() as conn:
+            return fetch_page(record_cursor(conn, Order), f'''
+                SELECT O.*, C.FIRST_NAME, C.LAST_NAME
+                FROM ORDERS O
+                LEFT JOIN CUSTOMER C ON O.CUSTOMER_ID = C.CUSTOMER_ID
+                {where}
+                ORDER BY O.ORDER_ID DESC
+                LIMIT ?
+            ''', params + [limit + 1], limit, lambda o: o.order_id)
+
+    @staticmethod
+    @cached('tables', 'orders')
+    def get_dashboard_snapshot(today=None):
+        """Dashboard metrics in one aggregate query.
+
+        Uses IDX_ORDERS_STATUS and IDX_ORDERS_DATE, so the cost depends on
+        the number of open and today's orders rather than the full history.
+        """
+        today = today or datetime.now().date()
         with get_db_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM REST_TABLE
+                     WHERE BOOKING_STATUS = 'AVAILABLE') AS AVAILABLE_TABLES,
+                    (SELECT COUNT(*) FROM REST_TABLE) AS TOTAL_TABLES,
+                    (SELECT COUNT(*) FROM ORDERS
+                     WHERE ORDER_STATUS = 'PENDING') AS ACTIVE_ORDERS,
+                    (SELECT COALESCE(SUM(TOTAL_AMOUNT), 0) FROM ORDERS
+                     WHERE ORDER_DATE = ?) AS TODAY_REVENUE
+            ''', (today.isoformat(),))
+            row = cursor.fetchone()
+            return {
+                'available_tables': row['AVAILABLE_TABLES'],
+                'total_tables': row['TOTAL_TABLES'],
+                'active_orders': row['ACTIVE_ORDERS'],
+                'today_revenue': row['TODAY_REVENUE'],
+            }
+
+    @staticmethod
+    @cached('orders', 'customers', 'menu')
+    def get_order_details(order_id):
+        with get_db_connection() as conn:
+            cursor = record_cursor(conn, Order)
             # Get order details
             cursor.execute('''
                 SELECT O.*, C.FIRST_NAME, C.LAST_NAME
@@ -222,6 +1392,7 @@ class DatabaseOperations:
             order = cursor.fetchone()
             
             # Get order items
+            cursor = conn.cursor()
             cursor.execute('''
                 SELECT OI.*, MI.ITEM_NAME, MI.PRICE
                 FROM ORDER_ITEM OI
@@ -233,6 +1404,7 @@ class DatabaseOperations:
             return order, items
 
     @staticmethod
+    @cached('reports')
     def get_revenue_metrics(period):
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -249,23 +1421,9 @@ class DatabaseOperations:
                 start_date = today - timedelta(days=90)
                 prev_start = start_date - timedelta(days=90)
             
-            # Get current period revenue
-            cursor.execute('''
-                SELECT COALESCE(SUM(TOTAL_AMOUNT), 0)
-                FROM ORDERS
-                WHERE ORDER_DATE BETWEEN ? AND ?
-                AND ORDER_STATUS = 'COMPLETED'
-            ''', (start_date.isoformat(), today.isoformat()))
-            current_revenue = cursor.fetchone()[0]
-            
-            # Get previous period revenue for comparison
-            cursor.execute('''
-                SELECT COALESCE(SUM(TOTAL_AMOUNT), 0)
-                FROM ORDERS
-                WHERE ORDER_DATE BETWEEN ? AND ?
-                AND ORDER_STATUS = 'COMPLETED'
-            ''', (prev_start.isoformat(), start_date.isoformat()))
-            previous_revenue = cursor.fetchone()[0]
+            # Read both periods from the DAILY_REVENUE rollup
+            current_revenue = rollups.revenue_between(cursor, start_date, today)
+            previous_revenue = rollups.revenue_between(cursor, prev_start, start_date)
             
             # Calculate percentage change
             if previous_revenue > 0:
@@ -279,10 +1437,38 @@ class DatabaseOperations:
             }
 
     @staticmethod
-    def get_sales_report(start_date, end_date):
+    @cached('reports')
+    def get_daily_revenue(start_date, end_date):
+        """DAILY_REVENUE rows (date, payment mode, category) for a date range"""
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
+                SELECT *
+                FROM DAILY_REVENUE
+                WHERE REVENUE_DATE BETWEEN ? AND ?
+                ORDER BY REVENUE_DATE, PAYMENT_MODE, ITEM_CATEGORY
+            ''', (str(start_date), str(end_date)))
+            return cursor.fetchall()
+
+    @staticmethod
+    @cached('reports', 'customers')
+    def get_sales_report(start_date, end_date):
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SALES_REPORT_SQL, (start_date, end_date))
+            return cursor.fetchall()
+
+    @staticmethod
+    def iter_sales_report(start_date, end_date, chunk_size=1000):
+        """Stream get_sales_report rows in chunks of at most chunk_size"""
+        return iter_query(SALES_REPORT_SQL, (start_date, end_date), chunk_size)
+
+    @staticmethod
+    @cached('reports', 'customers')
+    def get_sales_report_page(start_date, end_date, after_order_id=None, limit=50):
+        """One page of get_sales_report rows, newest order first"""
+        with get_db_connection() as conn:
+            return fetch_page(conn.cursor(), '''
                 SELECT 
                     O.ORDER_ID,
                     O.ORDER_DATE,
@@ -295,26 +1481,85 @@ class DatabaseOperations:
                 LEFT JOIN PAYMENT P ON O.ORDER_ID = P.ORDER_ID
                 WHERE O.ORDER_DATE BETWEEN ? AND ?
                 AND O.ORDER_STATUS = 'COMPLETED'
-                ORDER BY O.ORDER_DATE DESC, O.ORDER_TIME DESC
-            ''', (start_date, end_date))
-            return cursor.fetchall()
+                AND O.ORDER_ID < ?
+                ORDER BY O.ORDER_ID DESC
+                LIMIT ?
+            ''', (start_date, end_date, after_order_id or 2**63 - 1, limit + 1),
+                limit, lambda row: row['ORDER_ID'])
 
     @staticmethod
-    def get_menu_performance(start_date, end_date):
+    @cached('reports')
+    def get_sales_summary(start_date, end_date):
+        """Totals for the sales report without fetching its rows"""
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 
-                    MI.ITEM_NAME,
-                    MI.ITEM_CATEGORY,
-                    SUM(OI.QUANTITY) as QUANTITY_SOLD,
-                    SUM(OI.ITEM_TOTAL) as TOTAL_REVENUE
-                FROM MENU_ITEM MI
-                JOIN ORDER_ITEM OI ON MI.MENUITEM_NUMBER = OI.MENUITEM_NUMBER
-                JOIN ORDERS O ON OI.ORDER_ID = O.ORDER_ID
+                    COUNT(*) AS TOTAL_ORDERS,
+                    COALESCE(SUM(P.AMOUNT_PAID), 0) AS TOTAL_REVENUE
+                FROM ORDERS O
+                JOIN CUSTOMER C ON O.CUSTOMER_ID = C.CUSTOMER_ID
+                LEFT JOIN PAYMENT P ON O.ORDER_ID = P.ORDER_ID
                 WHERE O.ORDER_DATE BETWEEN ? AND ?
                 AND O.ORDER_STATUS = 'COMPLETED'
-                GROUP BY MI.MENUITEM_NUMBER, MI.ITEM_NAME, MI.ITEM_CATEGORY
-                ORDER BY TOTAL_REVENUE DESC
             ''', (start_date, end_date))
+            row = cursor.fetchone()
+            return {
+                'total_orders': row['TOTAL_ORDERS'],
+                'total_revenue': row['TOTAL_REVENUE'],
+            }
+
+    @staticmethod
+    @cached('reports', 'menu')
+    def get_menu_performance(start_date, end_date):
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(MENU_PERFORMANCE_SQL, (start_date, end_date))
             return cursor.fetchall()
+
+    @staticmethod
+    def iter_menu_performance(start_date, end_date, chunk_size=1000):
+        """Stream get_menu_performance rows in chunks of at most chunk_size"""
+        return iter_query(MENU_PERFORMANCE_SQL, (start_date, end_date), chunk_size)
+
+    @staticmethod
+    @cached('analytics')
+    def get_analytics(start_date, end_date):
+        """Revenue trends, table turns, tickets by party size and item
+        co-occurrence for completed orders in a date range (see analytics.py).
+        Up to five minutes stale: writes do not invalidate it."""
+        # pandas and numpy are only needed here, so load them on first use
+        import analytics
+
+        params = (str(start_date), str(end_date))
+        with get_db_connection() as conn:
+            frames = {}
+            for name, sql in ANALYTICS_SQL.items():
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                cursor.execute(sql, params if '?' in sql else ())
+                frames[name] = fetch_frame(cursor, ANALYTICS_CHUNK)
+        return analytics.summarize(**frames)
+
+    @staticmethod
+    def submit_report(report, start_date, end_date, fmt='csv'):
+        """Start a 'sales' or 'menu' report on the background report workers;
+        returns its ReportJob (see report_jobs.py)"""
+        return get_report_executor().submit(report, str(start_date), str(end_date), fmt)
+
+    @staticmethod
+    def get_report_job(job_id):
+        # Reading jobs never starts the executor: before the first submit
+        # there are none
+        executor = _report_executor
+        return executor.get(job_id) if executor is not None else None
+
+    @staticmethod
+    def get_report_jobs():
+        """Running and kept report jobs, newest first"""
+        executor = _report_executor
+        return executor.jobs() if executor is not None else []
+
+
+# Per-method latency while profiling is on (see profiling.py)
+profiler.instrument(DatabaseOperations)
@@ -0,0 +1,272 @@
+"""Append-only EVENT_LOG of every DatabaseOperations mutation.
+
+Each write records (entity, entity_id, action, data) events with record();
+data is compact JSON of the columns it set. Events are buffered per thread
+and flushed with one executemany just before the transaction commits -- for
+the WAL writer that is once per group commit -- so they land atomically with
+the change they describe. Migration 9 seeds the log with a snapshot of the
+existing rows, so replaying it from the start rebuilds the whole database.
+
+    python eventlog.py tail   [--db PATH] [--after N] [--entity ORDERS,PAYMENT] [--follow]
+    python eventlog.py replay [--db PATH] --into replica.db [--until N]
+
+replay applies events after the target's own last EVENT_ID, so running it
+again catches a replica up incrementally; derived tables (DAILY_REVENUE) are
+rebuilt from the replayed rows. --db defaults to the app's database
+(DB_PATH, else DB_FILE from config.py).
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+import backends
+import rollups
+from records import LogEvent, record_factory
+
+CREATE_EVENT_LOG = '''
+CREATE TABLE IF NOT EXISTS EVENT_LOG (
+    EVENT_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    LOGGED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ENTITY TEXT NOT NULL,
+    ENTITY_ID INTEGER NOT NULL,
+    ACTION TEXT NOT NULL CHECK (ACTION IN ('INSERT','UPDATE','DELETE')),
+    DATA TEXT
+)
+'''
+
+INSERT_EVENT = '''
+    INSERT INTO EVENT_LOG (ENTITY, ENTITY_ID, ACTION, DATA)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Tables snapshotted by migration 9, parents first
+SNAPSHOT_TABLES = ['CUSTOMER', 'REST_TABLE', 'MENU_ITEM', 'ORDERS', 'PAYMENT', 'RESERVATION']
+
+_COLUMN = re.compile(r'^[A-Z_]+$')
+_local = threading.local()
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    raise TypeError(f"Cannot log {type(value).__name__}")
+
+
+_encoder = json.JSONEncoder(separators=(',', ':'), default=_json_default)
+
+
+def encode(data):
+    """Compact JSON for data, leaving out unset (None) columns"""
+    if not data:
+        return None
+    return _encoder.encode({k: v for k, v in data.items() if v is not None})
+
+
+def _pending():
+    events = getattr(_local, 'events', None)
+    if events is None:
+        events = _local.events = []
+    return events
+
+
+def record(entity, entity_id, action, data=None):
+    """Queue an event for the write transaction running on this thread"""
+    _pending().append((entity, entity_id, action, encode(data)))
+
+
+def mark():
+    """Position to discard() back to if the current job rolls back"""
+    return len(_pending())
+
+
+def discard(position=0):
+    del _pending()[position:]
+
+
+def flush(cursor):
+    """Write the queued events; call inside the transaction, before COMMIT"""
+    events = _pending()
+    if events:
+        cursor.executemany(INSERT_EVENT, events)
+        events.clear()
+
+
+def read(cursor, after_id=0, entities=None, limit=1000):
+    """Up to limit LogEvents after after_id, oldest first"""
+    cursor.row_factory = record_factory(LogEvent)
+    if entities:
+        cursor.execute(f'''
+            SELECT * FROM EVENT_LOG
+            WHERE EVENT_ID > ? AND ENTITY IN ({', '.join('?' * len(entities))})
+            ORDER BY EVENT_ID
+            LIMIT ?
+        ''', (after_id, *entities, limit))
+    else:
+        cursor.execute('''
+            SELECT * FROM EVENT_LOG
+            WHERE EVENT_ID > ?
+            ORDER BY EVENT_ID
+            LIMIT ?
+        ''', (after_id, limit))
+    return cursor.fetchall()
+
+
+def as_dict(event):
+    """LogEvent as a JSON-ready dict with data decoded"""
+    data = event._asdict()
+    data['data'] = json.loads(event.data) if event.data else {}
+    return data
+
+
+def snapshot(cursor):
+    """Log the current rows of SNAPSHOT_TABLES as INSERT events"""
+    items = {}
+    cursor.execute('''
+        SELECT ORDER_ID, MENUITEM_NUMBER, QUANTITY, ITEM_TOTAL
+        FROM ORDER_ITEM ORDER BY ORDER_ID
+    ''')
+    for order_id, item_id, quantity, total in cursor.fetchall():
+        items.setdefault(order_id, []).append([item_id, quantity, total])
+
+    for table in SNAPSHOT_TABLES:
+        key = backends.PRIMARY_KEYS[table]
+        cursor.execute(f'SELECT * FROM {table} ORDER BY {key}')
+        columns = [d[0].upper() for d in cursor.description]
+        events = []
+        for row in cursor.fetchall():
+            data = dict(zip(columns, row))
+            entity_id = data.pop(key)
+            if table == 'ORDERS':
+                data['ITEMS'] = items.get(entity_id, [])
+            events.append((table, entity_id, 'INSERT', encode(data)))
+        cursor.executemany(INSERT_EVENT, events)
+
+
+def apply(cursor, event):
+    """Apply one LogEvent to the base tables (used by replay)"""
+    key = backends.PRIMARY_KEYS.get(event.entity)
+    data = json.loads(event.data) if event.data else {}
+    if key is None or not all(_COLUMN.match(column) for column in data):
+        raise ValueError(f"Cannot replay event {event.event_id}")
+
+    if event.action == 'DELETE':
+        cursor.execute(f'DELETE FROM {event.entity} WHERE {key} = ?', (event.entity_id,))
+        return
+    if event.action == 'UPDATE':
+        assignments = ', '.join(f'{column} = ?' for column in data)
+        cursor.execute(f'UPDATE {event.entity} SET {assignments} WHERE {key} = ?',
+                       (*data.values(), event.entity_id))
+        return
+
+    items = data.pop('ITEMS', None)
+    logged_at = str(event.logged_at)
+    # Live events leave defaulted dates out; they match the log timestamp
+    if event.entity == 'ORDERS':
+        data.setdefault('ORDER_DATE', logged_at[:10])
+        data.setdefault('ORDER_TIME', logged_at)
+    elif event.entity == 'PAYMENT':
+        data.setdefault('PAYMENT_DATE', logged_at[:10])
+    cursor.execute(backends.insert_sql(event.entity, [key, *data]),
+                   (event.entity_id, *data.values()))
+    if items:
+        cursor.executemany(
+            backends.insert_sql('ORDER_ITEM', ('ORDER_ID', 'MENUITEM_NUMBER', 'QUANTITY', 'ITEM_TOTAL')),
+            [(event.entity_id, *item) for item in items]
+        )
+
+
+def last_event_id(cursor):
+    cursor.execute('SELECT COALESCE(MAX(EVENT_ID), 0) FROM EVENT_LOG')
+    return cursor.fetchone()[0]
+
+
+def replay(source, target, until=None, batch=1000):
+    """Apply source's events after target's last EVENT_ID (up to until) to
+    target, copying the events too, and rebuild DAILY_REVENUE. Runs in one
+    transaction on target; returns the number of events applied."""
+    read_cursor = source.cursor()
+    cursor = target.cursor()
+    cursor.execute('BEGIN')
+    after_id = last_event_id(cursor)
+    applied = 0
+    while True:
+        events = read(read_cursor, after_id, limit=batch)
+        events = [e for e in events if until is None or e.event_id <= until]
+        if not events:
+            break
+        for event in events:
+            apply(cursor, event)
+        cursor.executemany(
+            backends.insert_sql('EVENT_LOG', [field.upper() for field in LogEvent._fields]),
+            [tuple(event) for event in events]
+        )
+        applied += len(events)
+        after_id = events[-1].event_id
+    if applied:
+        rollups.rebuild(cursor)
+    backends.reset_sequences(cursor, {
+        **{table: backends.PRIMARY_KEYS[table] for table in SNAPSHOT_TABLES},
+        'EVENT_LOG': 'EVENT_ID',
+    })
+    target.commit()
+    return applied
+
+
+def main():
+    # Imported here: migrations imports this module for the EVENT_LOG schema,
+    # database imports it too
+    import migrations
+    from database import DB_PATH
+
+    parser = argparse.ArgumentParser(description='Read or replay the EVENT_LOG')
+    parser.add_argument('command', choices=['tail', 'replay'])
+    parser.add_argument('--db', default=DB_PATH, help='database path or URL (default: DB_PATH)')
+    parser.add_argument('--after', type=int, default=0, help='tail: start after this EVENT_ID')
+    parser.add_argument('--entity', help='tail: comma-separated tables to show')
+    parser.add_argument('--follow', action='store_true', help='tail: keep waiting for new events')
+    parser.add_argument('--into', help='replay: database path or URL to rebuild')
+    parser.add_argument('--until', type=int, help='replay: last EVENT_ID to apply')
+    args = parser.parse_args()
+
+    source = backends.get_backend(args.db).connect()
+    try:
+        if args.command == 'tail':
+            entities = args.entity.upper().split(',') if args.entity else None
+            after_id = args.after
+            while True:
+                events = read(source.cursor(), after_id, entities)
+                for event in events:
+                    print(json.dumps(as_dict(event), default=_json_default))
+                if events:
+                    after_id = events[-1].event_id
+                    sys.stdout.flush()
+                elif not args.follow:
+                    break
+                else:
+                    source.rollback()
+                    time.sleep(1)
+            return
+
+        if not args.into:
+            parser.error('replay needs --into')
+        target = backends.get_backend(args.into).connect()
+        try:
+            migrations.upgrade(target)
+            applied = replay(source, target, args.until)
+            print(f"Replayed {applied} events into {args.into} "
+                  f"(now at EVENT_ID {last_event_id(target.cursor())})")
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Streaming report exports.
+
+Rows are pulled from the cursor in chunks and written straight to a CSV or
+Parquet file, so memory stays bounded by the chunk size instead of growing
+with the report. Run outside the UI with
+
+    python exports.py sales --start 2024-01-01 --end 2024-12-31 -o sales.csv
+    python exports.py menu --start 2024-01-01 --end 2024-12-31 --format parquet -o menu.parquet
+"""
+import argparse
+import csv
+import io
+import os
+import tempfile
+
+from database import DatabaseOperations
+
+# report name -> (row iterator, [(column, parquet type)])
+REPORTS = {
+    'sales': (
+        DatabaseOperations.iter_sales_report,
+        [('Order ID', 'int64'), ('Date', 'string'), ('Customer', 'string'),
+         ('Total Amount', 'float64'), ('Payment Mode', 'string'),
+         ('Amount Paid', 'float64')],
+    ),
+    'menu': (
+        DatabaseOperations.iter_menu_performance,
+        [('Item Name', 'string'), ('Category', 'string'),
+         ('Quantity Sold', 'int64'), ('Total Revenue', 'float64')],
+    ),
+}
+
+CHUNK_SIZE = 5000
+
+
+def _chunks(report, start_date, end_date, chunk_size):
+    if report not in REPORTS:
+        raise ValueError(f"Unknown report: {report}")
+    iter_rows, columns = REPORTS[report]
+    return columns, iter_rows(str(start_date), str(end_date), chunk_size)
+
+
+def _header(columns):
+    return [name for name, _ in columns]
+
+
+def iter_csv(report, start_date, end_date, chunk_size=CHUNK_SIZE):
+    """Yield the report as UTF-8 CSV bytes, one chunk of rows at a time"""
+    columns, chunks = _chunks(report, start_date, end_date, chunk_size)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_header(columns))
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_csv(report, start_date, end_date, path, chunk_size=CHUNK_SIZE):
+    columns, chunks = _chunks(report, start_date, end_date, chunk_size)
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(_header(columns))
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(report, start_date, end_date, path, chunk_size=CHUNK_SIZE):
+    """Write the report as Parquet, one row group per chunk (needs pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    columns, chunks = _chunks(report, start_date, end_date, chunk_size)
+    schema = pa.schema([(name, pa.type_for_alias(kind)) for name, kind in columns])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            arrays = [
+                pa.array(list(values), type=field.type)
+                for values, field in zip(zip(*chunk), schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet}
+
+
+def export_to_tempfile(report, start_date, end_date, fmt='csv'):
+    """Export to a new temporary file and return its path (caller deletes it)"""
+    fd, path = tempfile.mkstemp(suffix=f'.{fmt}', prefix=f'{report}_report_')
+    os.close(fd)
+    try:
+        WRITERS[fmt](report, start_date, end_date, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export a report to CSV or Parquet')
+    parser.add_argument('report', choices=sorted(REPORTS))
+    parser.add_argument('--start', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='csv')
+    parser.add_argument('-o', '--output', help='output file (default: <report>_report.<format>)')
+    parser.add_argument('--db', help='database file (default: restaurant.db)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.db:
+        import database
+        database.configure(db_path=args.db)
+    output = args.output or f'{args.report}_report.{args.format}'
+    rows = WRITERS[args.format](args.report, args.start, args.end, output, args.chunk_size)
+    print(f"Wrote {rows} rows to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+"""Index advisor for the shipped queries.
+
+Runs the read workload of workload.py (every DatabaseOperations read,
+with ids and dates taken from the database) with the profiler explaining
+each statement, and looks for these problems in every table access:
+
+    scan     the whole table, or a whole index, is walked
+    partial  an index seek uses only some of the columns the query
+             constrains; the rest are checked row by row
+    sort     a temporary B-tree sorts the rows for ORDER BY
+    lookup   an index seek then reads each table row for other columns
+
+For each access with a problem it proposes an index -- equality and join
+columns, then the ORDER BY columns (or the range column), then the other
+columns the query reads from that table so the index covers it -- and
+verifies it: the index is built inside a transaction that is rolled back
+and every statement is explained again. A proposal is verified when it
+removes problems and adds none. Building candidates on a large database
+takes as long as building the real index would.
+
+Seeks and sorts are read from SQLite plans; on PostgreSQL only sequential
+scans are reported.
+
+    python index_advisor.py [--db PATH]
+
+--db defaults to the app's database (DB_PATH, else DB_FILE from config.py).
+"""
+import argparse
+import hashlib
+import re
+from collections import Counter
+
+import backends
+from profiling import full_scans, explain, normalize, profiler, statement_id, table_aliases
+
+# Problems, worst first
+KINDS = ('scan', 'partial', 'sort', 'lookup')
+# Most non-key columns appended to make a proposal covering
+MAX_COVERING = 4
+CANDIDATE = 'IDX_ADVISOR_CANDIDATE'
+# Longest index name (PostgreSQL truncates identifiers past 63 characters)
+MAX_NAME = 63
+
+_ACCESS = re.compile(r'^(SCAN|SEARCH) (\w+)(?: USING (COVERING INDEX|INDEX|INTEGER PRIMARY KEY|'
+                     r'PRIMARY KEY)(?: (\w+))?)?(?: \((.*)\))?')
+_SEEK_COLUMN = re.compile(r'(\w+)(?:=|>|<|\bIN\b)')
+_CLAUSE_END = r'(?= GROUP BY | ORDER BY | LIMIT |$)'
+_WHERE = re.compile(r' WHERE (.*?)' + _CLAUSE_END, re.I)
+_ORDER_BY = re.compile(r' ORDER BY (.*?)(?= LIMIT |$)', re.I)
+_ON = re.compile(r' ON (.*?)(?= (?:LEFT |INNER )?JOIN | WHERE | GROUP BY | ORDER BY | LIMIT |$)', re.I)
+_CONDITION = re.compile(r'(?:(\w+)\.)?(\w+)\s*(=|<=|>=|<|>|\bBETWEEN\b|\bIN\b)\s*(?:(\w+)\.(\w+))?',
+                        re.I)
+_QUALIFIED = re.compile(r'\b(\w+)\.(\w+|\*)')
+_WORD = re.compile(r'\b\w+\b')
+_columns = {}
+
+
+def table_columns(conn, table):
+    if table not in _columns:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT * FROM {table} WHERE 1 = 0')
+        _columns[table] = [d[0].upper() for d in cursor.description]
+    return _columns[table]
+
+
+def analyse(conn, sql):
+    """How a single-SELECT statement uses each table, by alias:
+    {alias: {'table', 'eq', 'range', 'join', 'order', 'columns', 'star'}}.
+    None when the statement has subqueries or is not a SELECT."""
+    sql = normalize(sql)
+    if not sql.upper().startswith('SELECT ') or sql.upper().count('SELECT ') > 1:
+        return None
+    aliases = table_aliases(sql)
+    tables = set(aliases.values())
+    # table_aliases also maps each table name to itself; keep that only
+    # for tables used without an alias
+    aliased = {table for alias, table in aliases.items() if alias != table}
+    aliases = {alias: table for alias, table in aliases.items()
+               if alias != table or table not in aliased}
+    # Columns without a qualifier belong to the only table there is
+    default = next(iter(tables)) if len(tables) == 1 else None
+    info = {
+        alias: {'table': table, 'eq': [], 'range': [], 'join': [], 'order': [],
+                'columns': [], 'star': False}
+        for alias, table in aliases.items()
+    }
+
+    def use(alias, column, field):
+        alias = (alias or default or '').upper()
+        column = column.upper()
+        if alias in info and column in table_columns(conn, info[alias]['table']):
+            if column not in info[alias][field]:
+                info[alias][field].append(column)
+            return True
+        return False
+
+    where = _WHERE.search(sql)
+    conditions = _CONDITION.findall(where.group(1) if where else '')
+    for condition in _ON.findall(sql):
+        conditions += _CONDITION.findall(condition)
+    for alias, column, op, other_alias, other_column in conditions:
+        if not other_alias:
+            use(alias, column, 'eq' if op.upper() in ('=', 'IN') else 'range')
+        elif op == '=' and alias:
+            for a, c, o in ((alias, column, other_alias), (other_alias, other_column, alias)):
+                if a.upper() in info:
+                    info[a.upper()]['join'].append((c.upper(), o.upper()))
+    order = _ORDER_BY.search(sql)
+    if order:
+        items = [item.strip().split()[0] for item in order.group(1).split(',')]
+        owners = {item.split('.')[0].upper() if '.' in item else default for item in items}
+        if len(owners) == 1:
+            owner = owners.pop()
+            for item in items:
+                use(owner, item.split('.')[-1], 'order')
+
+    for alias, column in _QUALIFIED.findall(sql):
+        if column == '*' and alias.upper() in info:
+            info[alias.upper()]['star'] = True
+        else:
+            use(alias, column, 'columns')
+    if default:
+        if re.match(r'SELECT \*', sql, re.I):
+            info[next(iter(info))]['star'] = True
+        for word in _WORD.findall(sql):
+            use(None, word, 'columns')
+    for alias in info.values():
+        for field in ('eq', 'range', 'order'):
+            for column in alias[field]:
+                if column not in alias['columns']:
+                    alias['columns'].append(column)
+        for column, _ in alias['join']:
+            if column not in alias['columns']:
+                alias['columns'].append(column)
+    return info
+
+
+def _sorted_alias(info):
+    for alias, usage in info.items():
+        if usage['order']:
+            return alias
+    return None
+
+
+def issues(sql, plan, info):
+    """[(alias, kind, plan line)] problems in a plan"""
+    if info is None:
+        return [(table, 'scan', '') for table in full_scans(sql, plan)]
+    found = []
+    seen = []
+    for line in plan:
+        line = line.strip()
+        if 'TEMP B-TREE FOR' in line and 'ORDER BY' in line:
+            alias = _sorted_alias(info)
+            if alias:
+                found.append((alias, 'sort', line))
+            continue
+        match = _ACCESS.match(line)
+        if match is None:
+            if 'Seq Scan on' in line:
+                found.extend((table, 'scan', line) for table in full_scans(sql, [line]))
+            continue
+        op, alias, using, _, seek = match.groups()
+        alias = alias.upper()
+        usage = info.get(alias)
+        if usage is None:
+            continue
+        if op == 'SCAN':
+            found.append((alias, 'scan', line))
+        elif using and 'PRIMARY KEY' not in using:
+            key = backends.PRIMARY_KEYS.get(usage['table'])
+            sought = {key if c.upper() == 'ROWID' else c.upper()
+                      for c in _SEEK_COLUMN.findall(seek or '')}
+            wanted = set(usage['eq']) | set(usage['range'])
+            wanted |= {column for column, other in usage['join'] if other in seen}
+            if wanted - sought:
+                found.append((alias, 'partial', line))
+            if using == 'INDEX' and not usage['star']:
+                found.append((alias, 'lookup', line))
+        seen.append(alias)
+    return found
+
+
+def propose(usage, joined):
+    """Index columns for one table access; joined are the aliases read
+    before it in the plan"""
+    key = backends.PRIMARY_KEYS.get(usage['table'])
+    columns = list(usage['eq'])
+    columns += [c for c, other in usage['join'] if other in joined and c not in columns]
+    order = [c for c in usage['order'] if c not in columns]
+    if order and (not usage['range'] or usage['range'][0] == order[0]):
+        columns += order
+    elif usage['range']:
+        columns.append(usage['range'][0])
+    # A rowid table is already ordered by its INTEGER PRIMARY KEY
+    if not columns or columns[0] == key:
+        return None
+    if not usage['star']:
+        extra = [c for c in usage['columns'] if c not in columns and c != key]
+        if len(extra) <= MAX_COVERING:
+            columns += extra
+    return columns
+
+
+def existing_indexes(conn, table):
+    """Column lists of table's indexes (SQLite only; [] elsewhere)"""
+    if getattr(conn, 'dialect', 'sqlite') != 'sqlite':
+        return []
+    indexes = []
+    for row in conn.execute(f'PRAGMA index_list({table})').fetchall():
+        info = conn.execute(f'PRAGMA index_info({row[1]})').fetchall()
+        indexes.append([column[2].upper() for column in info])
+    return indexes
+
+
+def plan_all(conn, statements):
+    """{key: [(alias, kind, line)]} for every captured statement"""
+    return {
+        key: issues(s['sql'], explain(conn, s['sql'], s['params']), s['info'])
+        for key, s in statements.items()
+    }
+
+
+def _score(found):
+    return Counter(kind for _, kind, _ in found)
+
+
+def advise(conn, statements):
+    """Problems per statement plus verified and rejected proposals.
+
+    statements maps a key to {'sql', 'params', 'methods'} (see collect).
+    """
+    for statement in statements.values():
+        statement['info'] = analyse(conn, statement['sql'])
+    baseline = plan_all(conn, statements)
+
+    proposals = {}
+    for key, found in baseline.items():
+        info = statements[key]['info']
+        if not found or info is None:
+            continue
+        plan = explain(conn, statements[key]['sql'], statements[key]['params'])
+        order = [m.group(2).upper() for m in map(_ACCESS.match, (l.strip() for l in plan)) if m]
+        for alias in dict.fromkeys(alias for alias, _, _ in found):
+            usage = info[alias]
+            joined = order[:order.index(alias)] if alias in order else []
+            columns = propose(usage, joined)
+            if columns is None:
+                continue
+            if any(index[:len(columns)] == columns for index in existing_indexes(conn, usage['table'])):
+                continue
+            proposals.setdefault((usage['table'], tuple(columns)), set()).add(key)
+
+    results = []
+    for (table, columns), keys in proposals.items():
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            cursor.execute(f"CREATE INDEX {CANDIDATE} ON {table} ({', '.join(columns)})")
+            after = plan_all(conn, statements)
+        finally:
+            conn.rollback()
+        fixed, worse = {}, {}
+        for key in statements:
+            before, now = _score(baseline[key]), _score(after[key])
+            if now - before:
+                worse[key] = sorted((now - before).elements())
+            if before - now:
+                fixed[key] = sorted((before - now).elements())
+        results.append({
+            'table': table,
+            'columns': list(columns),
+            'proposed_for': sorted(keys),
+            'fixed': fixed,
+            'worse': worse,
+            'verified': bool(fixed) and not worse,
+        })
+    results.sort(key=lambda r: (not r['verified'], -len(r['fixed']),
+                                -sum(len(kinds) for kinds in r['fixed'].values())))
+    return baseline, results
+
+
+def collect(db_path, log=print):
+    """Run the workload.py reads on db_path with every statement explained;
+    {key: {'sql', 'params', 'methods'}}"""
+    import database
+    from database import DatabaseOperations
+    from query_cache import query_cache
+    from workload import READS, UNBOUNDED, UNBOUNDED_LIMIT, Fixture
+
+    database.configure(db_path=db_path)
+    with database.get_db_connection() as conn:
+        orders = conn.execute('SELECT COUNT(*) FROM ORDERS').fetchone()[0]
+    enabled, slow_ms = profiler.enabled, profiler.slow_ms
+    profiler.reset()
+    profiler.slow_ms = 0
+    profiler.enable()
+    try:
+        fixture = Fixture(DatabaseOperations)
+        for name, read in READS.items():
+            if name in UNBOUNDED and orders > UNBOUNDED_LIMIT:
+                continue
+            query_cache.clear()
+            try:
+                read(DatabaseOperations, fixture)
+            except Exception as e:
+                log(f"  skipped {name}: {e}")
+        return {
+            key: {'sql': sql, 'params': params,
+                  'methods': sorted(m for m in profiler.callers.get(key, {}) if m)}
+            for key, (sql, params) in profiler.samples.items()
+        }
+    finally:
+        profiler.enabled, profiler.slow_ms = enabled, slow_ms
+        profiler.reset()
+        database.shutdown()
+
+
+def index_name(table, columns):
+    """IDX_<table>_<every column>, shortened with a hash of the columns to
+    fit PostgreSQL's 63-character identifiers"""
+    name = f"IDX_{table}_{'_'.join(columns)}"
+    if len(name) <= MAX_NAME:
+        return name
+    digest = hashlib.blake2b(','.join(columns).encode(), digest_size=4).hexdigest().upper()
+    return f"{name[:MAX_NAME - len(digest) - 1]}_{digest}"
+
+
+def index_sql(table, columns):
+    return f"CREATE INDEX {index_name(table, columns)} ON {table} ({', '.join(columns)})"
+
+
+def report(statements, baseline, results, log=print):
+    flagged = {key: found for key, found in baseline.items() if found}
+    log(f"{len(flagged)} of {len(statements)} statements have plan problems")
+    width = max((len(alias) for found in flagged.values() for alias, _, _ in found), default=0) + 2
+    for key, found in sorted(flagged.items(), key=lambda item: statements[item[0]]['methods']):
+        statement = statements[key]
+        log(f"\n  [{statement_id(key)}] {', '.join(statement['methods']) or '-'}")
+        log(f"    {key[:110]}{'...' if len(key) > 110 else ''}")
+        for alias, kind, line in found:
+            log(f"    {alias:<{width}}{kind:<9}{line}")
+
+    log("\nProposals")
+    if not results:
+        log("  none")
+    for result in results:
+        log(f"\n  {'VERIFIED' if result['verified'] else 'rejected'}  "
+            f"{index_sql(result['table'], result['columns'])}")
+        if not result['fixed'] and not result['worse']:
+            log("    no plan changes")
+        for label, changes in (('fixes', result['fixed']), ('adds', result['worse'])):
+            for key, kinds in changes.items():
+                log(f"    {label} {', '.join(kinds):<20}[{statement_id(key)}] "
+                    f"{', '.join(statements[key]['methods'])}")
+
+
+def main():
+    from database import DB_PATH
+
+    parser = argparse.ArgumentParser(description='Check query plans and propose indexes')
+    parser.add_argument('--db', default=DB_PATH, help='database path or URL (default: DB_PATH)')
+    args = parser.parse_args()
+
+    statements = collect(args.db)
+    conn = backends.get_backend(args.db).connect()
+    try:
+        baseline, results = advise(conn, statements)
+    finally:
+        conn.close()
+    report(statements, baseline, results)
+
+
+if __name__ == '__main__':
+    main()
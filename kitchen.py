@@ -0,0 +1,197 @@
+"""Kitchen ticket queue.
+
+Every new order appends one KITCHEN_EVENT row per station (ITEM_CATEGORY) it
+touches, in the same transaction as the order; paying an order appends a
+COMPLETED row per station so its ticket can be cleared. The table is
+append-only, so EVENT_ID is a cursor a display can resume from.
+
+TicketFeed fans new rows out to waiting displays. One tail thread per process
+reads the table: it is woken right after a local commit, and otherwise checks
+every POLL_INTERVAL seconds (only while someone is waiting) for rows written
+by other processes. However many displays are connected, that is one indexed
+query per interval.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Seconds between checks for rows committed by other processes
+POLL_INTERVAL = float(os.getenv('KITCHEN_POLL_INTERVAL', 0.05))
+# Recent events kept in memory for displays to catch up from
+BUFFER_SIZE = 1000
+
+CREATE_KITCHEN_EVENT = '''
+CREATE TABLE IF NOT EXISTS KITCHEN_EVENT (
+    EVENT_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    ORDER_ID INTEGER NOT NULL,
+    TABLE_NUMBER INTEGER NOT NULL,
+    EVENT_TYPE TEXT NOT NULL CHECK (EVENT_TYPE IN ('NEW','COMPLETED','CANCELLED')),
+    ITEM_CATEGORY TEXT NOT NULL,
+    ITEMS TEXT,
+    CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (ORDER_ID) REFERENCES ORDERS(ORDER_ID)
+)
+'''
+
+
+def record_new(cursor, orders):
+    """Append NEW tickets for (order_id, table_number, [(MenuItem, quantity)])"""
+    rows = []
+    for order_id, table_number, lines in orders:
+        stations = {}
+        for item, quantity in lines:
+            stations.setdefault(item.item_category, []).append(
+                {'name': item.item_name, 'quantity': quantity}
+            )
+        rows.extend(
+            (order_id, table_number, 'NEW', category, json.dumps(items))
+            for category, items in stations.items()
+        )
+    cursor.executemany('''
+        INSERT INTO KITCHEN_EVENT (ORDER_ID, TABLE_NUMBER, EVENT_TYPE, ITEM_CATEGORY, ITEMS)
+        VALUES (?, ?, ?, ?, ?)
+    ''', rows)
+
+
+def record_status(cursor, order_id, event_type):
+    """Append an event_type row for every station order_id has tickets at"""
+    cursor.execute('''
+        INSERT INTO KITCHEN_EVENT (ORDER_ID, TABLE_NUMBER, EVENT_TYPE, ITEM_CATEGORY)
+        SELECT DISTINCT ORDER_ID, TABLE_NUMBER, ?, ITEM_CATEGORY
+        FROM KITCHEN_EVENT
+        WHERE ORDER_ID = ? AND EVENT_TYPE = 'NEW'
+    ''', (event_type, order_id))
+
+
+def ticket(event):
+    """KitchenEvent as a JSON-ready dict"""
+    data = event._asdict()
+    data['items'] = json.loads(event.items) if event.items else []
+    return data
+
+
+def matches(event, stations):
+    return not stations or event.item_category in stations
+
+
+class TicketFeed:
+    """In-process pub/sub over KITCHEN_EVENT.
+
+    load(after_id, limit) returns KitchenEvent rows with EVENT_ID > after_id
+    in id order; latest_id() returns the current MAX(EVENT_ID). Events newer
+    than ``floor`` (up to the last one read) are all in the buffer, so waiting
+    displays are served from memory; a display resuming from further back
+    reads the table once.
+    """
+
+    def __init__(self, load, latest_id, poll_interval=POLL_INTERVAL,
+                 buffer_size=BUFFER_SIZE):
+        self._load = load
+        self._latest_id = latest_id
+        self.poll_interval = poll_interval
+        self._events = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._wakeup = threading.Event()
+        self._waiters = 0
+        self._last_id = None
+        self.floor = None
+        self._thread = None
+        self._generation = 0
+        self.stats = {'polls': 0, 'delivered': 0}
+
+    def _start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._last_id = self.floor = self._latest_id()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._generation,),
+                name='kitchen-feed', daemon=True
+            )
+            self._thread.start()
+
+    def reset(self):
+        """Forget buffered events (e.g. after switching databases)"""
+        with self._cond:
+            self._generation += 1
+            self._thread = None
+            self._events.clear()
+            self._cond.notify_all()
+        self._wakeup.set()
+
+    def notify(self):
+        """Wake the tail thread after a local commit added events"""
+        self._wakeup.set()
+
+    def _run(self, generation):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            with self._cond:
+                if generation != self._generation:
+                    return
+                idle = self._waiters == 0
+                after = self._last_id
+            if idle:
+                continue
+            self.stats['polls'] += 1
+            try:
+                rows = self._load(after, 500)
+            except Exception:
+                time.sleep(self.poll_interval)
+                continue
+            if not rows:
+                continue
+            with self._cond:
+                if generation != self._generation:
+                    return
+                self._events.extend(rows)
+                if len(self._events) == self._events.maxlen:
+                    # Older events were evicted; the buffer now starts here
+                    self.floor = self._events[0].event_id - 1
+                self._last_id = rows[-1].event_id
+                self._cond.notify_all()
+            if len(rows) == 500:
+                self._wakeup.set()
+
+    def wait(self, after_id=None, stations=None, timeout=25):
+        """Wait up to timeout seconds for events after after_id at the given
+        stations; returns (events, cursor).
+
+        cursor is the last EVENT_ID examined, so the next call resumes after
+        events for other stations too. after_id=None means "from now on".
+        """
+        self._start()
+        stations = set(stations or ())
+        with self._cond:
+            if after_id is None:
+                after_id = self._last_id
+            behind = after_id < self.floor
+        if behind:
+            rows = self._load(after_id, BUFFER_SIZE)
+            found = [e for e in rows if matches(e, stations)]
+            if found or len(rows) == BUFFER_SIZE:
+                self.stats['delivered'] += len(found)
+                return found, rows[-1].event_id
+            after_id = max(after_id, self.floor)
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiters += 1
+            try:
+                while True:
+                    found = [
+                        e for e in self._events
+                        if e.event_id > after_id and matches(e, stations)
+                    ]
+                    if found:
+                        self.stats['delivered'] += len(found)
+                        return found, max(after_id, self._last_id)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return [], max(after_id, self._last_id)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
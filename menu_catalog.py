@@ -0,0 +1,78 @@
+import threading
+
+import backends
+from records import MenuItem, record_factory
+
+
+class MenuCatalog:
+    """In-memory copy of MENU_ITEM keyed by MENUITEM_NUMBER.
+
+    The snapshot is tagged with the MENU_VERSION counter, which triggers on
+    MENU_ITEM bump on every insert, update and delete. Each read checks that
+    single row, so every app worker notices changes made by any other
+    process without re-reading the menu.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.items = {}
+        self.by_category = {}
+        self.stats = {'hits': 0, 'reloads': 0}
+
+    @staticmethod
+    def current_version(conn):
+        try:
+            row = conn.execute('SELECT VERSION FROM MENU_VERSION WHERE ID = 1').fetchone()
+        except backends.error_class(conn):
+            # Database predates MENU_VERSION: never trust the snapshot
+            return None
+        return row[0] if row else None
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+
+    def refresh(self, conn):
+        """Reload the snapshot if the stored menu version has moved"""
+        version = self.current_version(conn)
+        with self._lock:
+            if version is not None and version == self.version:
+                self.stats['hits'] += 1
+                return self
+        cursor = conn.cursor()
+        cursor.row_factory = record_factory(MenuItem)
+        rows = cursor.execute(
+            'SELECT * FROM MENU_ITEM ORDER BY MENUITEM_NUMBER'
+        ).fetchall()
+        items = {row.menuitem_number: row for row in rows}
+        by_category = {}
+        for row in rows:
+            by_category.setdefault(row.item_category, []).append(row)
+        with self._lock:
+            self.items = items
+            self.by_category = by_category
+            self.version = version
+            self.stats['reloads'] += 1
+        return self
+
+    def all_items(self, conn):
+        return list(self.refresh(conn).items.values())
+
+    def category(self, conn, category):
+        return list(self.refresh(conn).by_category.get(category, []))
+
+    def lookup(self, conn, item_ids):
+        """{MENUITEM_NUMBER: MenuItem} for item_ids; raises on unknown items"""
+        items = self.refresh(conn).items
+        missing = [item_id for item_id in item_ids if item_id not in items]
+        if missing:
+            raise ValueError(f"Unknown menu item(s): {missing}")
+        return {item_id: items[item_id] for item_id in item_ids}
+
+    def prices(self, conn, item_ids):
+        """{MENUITEM_NUMBER: PRICE} for item_ids; raises on unknown items"""
+        return {
+            item_id: item.price
+            for item_id, item in self.lookup(conn, item_ids).items()
+        }
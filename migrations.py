@@ -0,0 +1,436 @@
+"""Versioned schema migrations tracked in PRAGMA user_version.
+
+Each migration is a function registered with @migration(version, description)
+and is applied in its own BEGIN IMMEDIATE transaction together with the
+user_version bump, so a failure leaves the database at the previous version.
+Migrations are written to be idempotent (IF NOT EXISTS, column checks), which
+lets databases created by older init_database code upgrade cleanly.
+
+Index builds are kept in migrations of their own. In WAL mode readers carry on
+while an index is built; writers only wait for that one short transaction, and
+a busy database is retried rather than failing the rollout.
+
+On PostgreSQL (see backends.py) the version lives in a one-row
+SCHEMA_VERSION table and concurrent upgrades are serialized with an advisory
+lock.
+
+    python migrations.py status  [--db PATH | postgresql://...]
+    python migrations.py upgrade [--db PATH | postgresql://...] [--target N]
+
+--db defaults to the app's database (DB_PATH, else DB_FILE from config.py).
+"""
+import argparse
+import sqlite3
+import time
+
+import backends
+import eventlog
+import kitchen
+import rollups
+
+MIGRATIONS = []
+
+# Retries for BEGIN IMMEDIATE while another process holds the write lock
+LOCK_RETRIES = 20
+LOCK_RETRY_DELAY = 0.25
+# PostgreSQL advisory lock key held while a migration runs
+MIGRATION_LOCK_ID = 7210414
+
+
+def migration(version, description):
+    """Register fn(cursor) as the step that brings the schema to version"""
+    def decorator(fn):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"Migration {version} registered out of order")
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return decorator
+
+
+def _dialect(conn):
+    # Plain sqlite3 connections carry no dialect; wrapped ones do
+    return getattr(conn, 'dialect', 'sqlite')
+
+
+def _add_column_if_missing(cursor, table, column, definition):
+    if _dialect(cursor.connection) != 'sqlite':
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}')
+        return
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _table_exists(cursor, name):
+    if _dialect(cursor.connection) != 'sqlite':
+        cursor.execute(
+            'SELECT 1 FROM information_schema.tables WHERE table_name = ?',
+            (name.lower(),)
+        )
+    else:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+@migration(1, 'Base schema')
+def _base_schema(cursor):
+    # Customer table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS CUSTOMER (
+        CUSTOMER_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        FIRST_NAME TEXT NOT NULL,
+        MIDDLE_NAME TEXT,
+        LAST_NAME TEXT NOT NULL,
+        PHONE TEXT UNIQUE,
+        EMAIL TEXT UNIQUE,
+        ADDRESS TEXT
+    )
+    ''')
+
+    # Restaurant tables
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS REST_TABLE (
+        TABLE_NUMBER INTEGER PRIMARY KEY AUTOINCREMENT,
+        BOOKING_ID INTEGER NOT NULL UNIQUE,
+        SEATING_CAPACITY INTEGER CHECK(SEATING_CAPACITY>0),
+        BOOKING_STATUS TEXT DEFAULT 'AVAILABLE'
+            CHECK (BOOKING_STATUS IN ('AVAILABLE','OCCUPIED','RESERVED'))
+    )
+    ''')
+
+    # Menu items
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS MENU_ITEM (
+        MENUITEM_NUMBER INTEGER PRIMARY KEY AUTOINCREMENT,
+        ITEM_NAME TEXT NOT NULL,
+        ITEM_CATEGORY TEXT CHECK (ITEM_CATEGORY IN ('STARTER','MAIN COURSE','DESSERT','BEVERAGE')),
+        PRICE DECIMAL(10,2) CHECK (PRICE > 0),
+        AVAILABILITY_STATUS TEXT DEFAULT 'AVAILABLE'
+            CHECK (AVAILABILITY_STATUS IN ('AVAILABLE','OUT OF STOCK'))
+    )
+    ''')
+
+    # Orders
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ORDERS (
+        ORDER_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        CUSTOMER_ID INTEGER NOT NULL,
+        TABLE_NUMBER INTEGER NOT NULL,
+        ORDER_DATE DATE DEFAULT (date('now')),
+        ORDER_TIME TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        TOTAL_AMOUNT DECIMAL(10,2) CHECK (TOTAL_AMOUNT > 0),
+        ORDER_STATUS TEXT DEFAULT 'PENDING'
+            CHECK (ORDER_STATUS IN ('PENDING','COMPLETED','CANCELLED')),
+        FOREIGN KEY (CUSTOMER_ID) REFERENCES CUSTOMER(CUSTOMER_ID),
+        FOREIGN KEY (TABLE_NUMBER) REFERENCES REST_TABLE(TABLE_NUMBER)
+    )
+    ''')
+
+    # Payment
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS PAYMENT (
+        TRANSACTION_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ORDER_ID INTEGER NOT NULL,
+        PAYMENT_DATE DATE DEFAULT (date('now')),
+        PAYMENT_MODE TEXT CHECK (PAYMENT_MODE IN ('CASH','CARD','UPI')),
+        AMOUNT_PAID DECIMAL(10,2) CHECK (AMOUNT_PAID >= 0),
+        FOREIGN KEY (ORDER_ID) REFERENCES ORDERS(ORDER_ID)
+    )
+    ''')
+
+    # Reservation
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS RESERVATION (
+        RESERVATION_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        CUSTOMER_ID INTEGER NOT NULL,
+        TABLE_NUMBER INTEGER NOT NULL,
+        RESERVATION_DATE DATE NOT NULL,
+        RESERVATION_TIME TIMESTAMP NOT NULL,
+        NUMBER_OF_PEOPLE INTEGER CHECK (NUMBER_OF_PEOPLE > 0),
+        FOREIGN KEY (CUSTOMER_ID) REFERENCES CUSTOMER(CUSTOMER_ID),
+        FOREIGN KEY (TABLE_NUMBER) REFERENCES REST_TABLE(TABLE_NUMBER)
+    )
+    ''')
+
+    # Order items
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ORDER_ITEM (
+        ORDER_ID INTEGER,
+        MENUITEM_NUMBER INTEGER,
+        QUANTITY INTEGER NOT NULL CHECK (QUANTITY > 0),
+        ITEM_TOTAL DECIMAL(10,2) CHECK (ITEM_TOTAL >= 0),
+        PRIMARY KEY(ORDER_ID, MENUITEM_NUMBER),
+        FOREIGN KEY (ORDER_ID) REFERENCES ORDERS(ORDER_ID),
+        FOREIGN KEY (MENUITEM_NUMBER) REFERENCES MENU_ITEM(MENUITEM_NUMBER)
+    )
+    ''')
+
+    # Staff
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS STAFF (
+        STAFF_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        FIRST_NAME TEXT NOT NULL,
+        MIDDLE_NAME TEXT,
+        LAST_NAME TEXT NOT NULL,
+        PHONE TEXT UNIQUE,
+        EMAIL TEXT UNIQUE,
+        ADDRESS TEXT,
+        STAFF_ROLE TEXT NOT NULL CHECK (STAFF_ROLE IN ('WAITER','CHEF','MANAGER','CLEANER')),
+        SHIFT_START TIMESTAMP,
+        SHIFT_END TIMESTAMP
+    )
+    ''')
+
+    # Staff assignment
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS STAFF_ASSIGNMENT (
+        STAFF_ID INTEGER,
+        ORDER_ID INTEGER,
+        ROLE_IN_ORDER TEXT,
+        ASSIGNMENT_TIME TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (STAFF_ID, ORDER_ID),
+        FOREIGN KEY (STAFF_ID) REFERENCES STAFF(STAFF_ID),
+        FOREIGN KEY (ORDER_ID) REFERENCES ORDERS(ORDER_ID)
+    )
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_ORDERS_CUSTOMER ON ORDERS(CUSTOMER_ID)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_ORDERS_TABLE ON ORDERS(TABLE_NUMBER)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_ORDERITEM_MENU ON ORDER_ITEM(MENUITEM_NUMBER)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_PAYMENT_ORDER ON PAYMENT(ORDER_ID)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_RESERVATION_CUSTOMER ON RESERVATION(CUSTOMER_ID)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_RESERVATION_TABLE ON RESERVATION(TABLE_NUMBER)')
+
+
+@migration(2, 'Order status and date indexes')
+def _order_indexes(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_ORDERS_STATUS ON ORDERS(ORDER_STATUS)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_ORDERS_DATE ON ORDERS(ORDER_DATE)')
+
+
+@migration(3, 'DAILY_REVENUE rollup')
+def _daily_revenue(cursor):
+    # Backfilled only the first time it is created
+    backfill = not _table_exists(cursor, 'DAILY_REVENUE')
+    cursor.execute(rollups.CREATE_DAILY_REVENUE)
+    if backfill:
+        rollups.rebuild(cursor)
+
+
+@migration(4, 'MENU_VERSION counter and triggers')
+def _menu_version(cursor):
+    # Bumped on every MENU_ITEM change so cached menus in other processes
+    # know when to reload
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS MENU_VERSION (
+        ID INTEGER PRIMARY KEY CHECK (ID = 1),
+        VERSION INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO MENU_VERSION (ID, VERSION) VALUES (1, 0)')
+    if _dialect(cursor.connection) == 'postgresql':
+        cursor.execute('''
+        CREATE OR REPLACE FUNCTION BUMP_MENU_VERSION() RETURNS TRIGGER AS $$
+        BEGIN
+            UPDATE MENU_VERSION SET VERSION = VERSION + 1 WHERE ID = 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        ''')
+        cursor.execute('DROP TRIGGER IF EXISTS TRG_MENU_VERSION ON MENU_ITEM')
+        cursor.execute('''
+        CREATE TRIGGER TRG_MENU_VERSION
+        AFTER INSERT OR UPDATE OR DELETE ON MENU_ITEM
+        FOR EACH STATEMENT EXECUTE FUNCTION BUMP_MENU_VERSION()
+        ''')
+        return
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS TRG_MENU_VERSION_{event}
+        AFTER {event} ON MENU_ITEM
+        BEGIN
+            UPDATE MENU_VERSION SET VERSION = VERSION + 1 WHERE ID = 1;
+        END
+        ''')
+
+
+@migration(5, 'Reservation durations')
+def _reservation_duration(cursor):
+    _add_column_if_missing(
+        cursor, 'RESERVATION', 'DURATION_MINUTES',
+        'INTEGER NOT NULL DEFAULT 120 CHECK (DURATION_MINUTES > 0)'
+    )
+
+
+@migration(6, 'Reservation time index')
+def _reservation_time_index(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_RESERVATION_TIME ON RESERVATION(RESERVATION_TIME)')
+
+
+@migration(7, 'Kitchen ticket events')
+def _kitchen_events(cursor):
+    cursor.execute(kitchen.CREATE_KITCHEN_EVENT)
+    cursor.execute('CREATE INDEX IF NOT EXISTS IDX_KITCHEN_EVENT_ORDER ON KITCHEN_EVENT(ORDER_ID)')
+
+
+@migration(8, 'Payment idempotency keys')
+def _payment_idempotency(cursor):
+    _add_column_if_missing(cursor, 'PAYMENT', 'IDEMPOTENCY_KEY', 'TEXT')
+    # Existing orders keep their first payment under the default key, so a
+    # late retry of one of them is recognised as well
+    cursor.execute('''
+        UPDATE PAYMENT
+        SET IDEMPOTENCY_KEY = 'order-' || ORDER_ID
+        WHERE IDEMPOTENCY_KEY IS NULL
+        AND TRANSACTION_ID IN (SELECT MIN(TRANSACTION_ID) FROM PAYMENT GROUP BY ORDER_ID)
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS IDX_PAYMENT_IDEMPOTENCY
+        ON PAYMENT(IDEMPOTENCY_KEY)
+    ''')
+
+
+@migration(9, 'Event log')
+def _event_log(cursor):
+    # Snapshotted only the first time it is created
+    backfill = not _table_exists(cursor, 'EVENT_LOG')
+    cursor.execute(eventlog.CREATE_EVENT_LOG)
+    if backfill:
+        eventlog.snapshot(cursor)
+
+
+@migration(10, 'Covering indexes for the report queries')
+def _report_indexes(cursor):
+    # Reports filter ORDER_STATUS = 'COMPLETED' and an ORDER_DATE range and
+    # sort by date and time: one range seek in index order. The trailing
+    # columns are everything the reports read, so ORDERS rows are not visited
+    if _dialect(cursor.connection) == 'sqlite':
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS IDX_ORDERS_STATUS_DATE
+            ON ORDERS(ORDER_STATUS, ORDER_DATE, ORDER_TIME, CUSTOMER_ID, TOTAL_AMOUNT)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS IDX_PAYMENT_ORDER_PAID
+            ON PAYMENT(ORDER_ID, PAYMENT_MODE, AMOUNT_PAID)
+        ''')
+    else:
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS IDX_ORDERS_STATUS_DATE
+            ON ORDERS(ORDER_STATUS, ORDER_DATE, ORDER_TIME) INCLUDE (CUSTOMER_ID, TOTAL_AMOUNT)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS IDX_PAYMENT_ORDER_PAID
+            ON PAYMENT(ORDER_ID) INCLUDE (PAYMENT_MODE, AMOUNT_PAID)
+        ''')
+    # Same leading column as IDX_PAYMENT_ORDER_PAID. IDX_ORDERS_STATUS stays:
+    # its entries are in ORDER_ID order per status, which keyset pages use
+    cursor.execute('DROP INDEX IF EXISTS IDX_PAYMENT_ORDER')
+
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    if _dialect(conn) == 'sqlite':
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    if not _table_exists(conn.cursor(), 'SCHEMA_VERSION'):
+        return 0
+    row = conn.execute('SELECT VERSION FROM SCHEMA_VERSION').fetchone()
+    return row[0] if row else 0
+
+
+def _set_version(conn, version):
+    if _dialect(conn) == 'sqlite':
+        conn.execute(f'PRAGMA user_version = {version}')
+        return
+    conn.execute('CREATE TABLE IF NOT EXISTS SCHEMA_VERSION (VERSION INTEGER NOT NULL)')
+    conn.execute('DELETE FROM SCHEMA_VERSION')
+    conn.execute('INSERT INTO SCHEMA_VERSION (VERSION) VALUES (?)', (version,))
+
+
+def pending(conn, target=None):
+    """Migrations not yet applied to conn, up to target (default: latest)"""
+    version = current_version(conn)
+    target = LATEST_VERSION if target is None else target
+    return [m for m in MIGRATIONS if version < m[0] <= target]
+
+
+def _begin_immediate(conn):
+    if _dialect(conn) != 'sqlite':
+        # Held until COMMIT/ROLLBACK; other upgraders wait here
+        conn.execute('BEGIN')
+        conn.execute('SELECT pg_advisory_xact_lock(?)', (MIGRATION_LOCK_ID,))
+        return
+    for attempt in range(LOCK_RETRIES):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            return
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            if attempt == LOCK_RETRIES - 1:
+                raise
+            time.sleep(LOCK_RETRY_DELAY)
+
+
+def upgrade(conn, target=None, log=None):
+    """Apply pending migrations in order; returns the versions applied.
+
+    Each migration commits on its own, so an interrupted upgrade resumes from
+    the last completed version on the next run.
+    """
+    applied = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        for version, description, fn in pending(conn, target):
+            _begin_immediate(conn)
+            try:
+                # Another process may have migrated while we waited for the lock
+                if current_version(conn) >= version:
+                    conn.execute('COMMIT')
+                    continue
+                started = time.perf_counter()
+                fn(conn.cursor())
+                _set_version(conn, version)
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            applied.append(version)
+            if log:
+                log(f"Applied {version}: {description} ({time.perf_counter() - started:.2f}s)")
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+
+def main():
+    # Imported here: database imports this module (through create_database)
+    from database import DB_PATH
+
+    parser = argparse.ArgumentParser(description='Check or upgrade the database schema')
+    parser.add_argument('command', choices=['status', 'upgrade'])
+    parser.add_argument('--db', default=DB_PATH, help='database path or URL (default: DB_PATH)')
+    parser.add_argument('--target', type=int, help='stop after this version (default: latest)')
+    args = parser.parse_args()
+
+    conn = backends.get_backend(args.db).connect()
+    try:
+        if args.command == 'status':
+            todo = pending(conn, args.target)
+            print(f"{args.db}: version {current_version(conn)} of {LATEST_VERSION}")
+            for version, description, _ in todo:
+                print(f"  pending {version}: {description}")
+            # Non-zero exit lets deploy scripts detect out-of-date databases
+            raise SystemExit(1 if todo else 0)
+
+        applied = upgrade(conn, args.target, log=print)
+        print(f"{args.db}: version {current_version(conn)} ({len(applied)} applied)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
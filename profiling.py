@@ -0,0 +1,577 @@
+"""Opt-in latency profiling for the data layer.
+
+Off by default; DB_PROFILE=1 (or profiler.enable(), e.g. from the Diagnostics
+page) turns it on for the process. While on, every DatabaseOperations call
+and every SQL statement run on a pooled or writer connection is timed into a
+latency histogram along with its row count and errors, pool waits are
+recorded, and the first time a statement takes DB_SLOW_QUERY_MS or longer
+its query plan is captured and full table scans are flagged. A statement is
+timed from execute() through its last fetch, so streamed reads count in full.
+
+Read the numbers with profiler.snapshot() or as Prometheus text from
+database.get_prometheus_metrics() -- served at GET /metrics by api.py, and
+rewritten every DB_PROFILE_INTERVAL seconds to DB_PROFILE_FILE when set (for
+node_exporter's textfile collector).
+"""
+import functools
+import hashlib
+import os
+import re
+import threading
+import time
+import types
+from collections import deque
+from datetime import datetime
+
+PROFILE_ENABLED = os.getenv('DB_PROFILE', '0') == '1'
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 100))
+PROFILE_FILE = os.getenv('DB_PROFILE_FILE')
+PROFILE_INTERVAL = float(os.getenv('DB_PROFILE_INTERVAL', 15))
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Distinct statements tracked; the rest are pooled under OTHER
+MAX_STATEMENTS = 1000
+OTHER = '<other statements>'
+# Recent slow executions kept for the Diagnostics page
+SLOW_LOG_SIZE = 100
+# Statements whose plan is worth capturing
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+_SPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.I)
+# SQLite SCAN walks a whole table or index (SEARCH is a keyed lookup)
+_SQLITE_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\w+)')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+_local = threading.local()
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize(sql):
+    """One line of SQL with IN (?, ?, ...) lists collapsed, used as the key"""
+    return _IN_LIST.sub('(?, ...)', _SPACE.sub(' ', sql).strip())
+
+
+def statement_id(key):
+    return hashlib.blake2b(key.encode(), digest_size=4).hexdigest()
+
+
+def table_aliases(sql):
+    """{alias or name: table} for the tables a statement reads"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table.upper()] = table.upper()
+        if alias and alias.upper() not in ('WHERE', 'ON', 'SET', 'JOIN', 'LEFT', 'INNER',
+                                           'GROUP', 'ORDER', 'LIMIT', 'USING'):
+            aliases[alias.upper()] = table.upper()
+    return aliases
+
+
+def explain(conn, sql, params=()):
+    """Plan lines for sql: EXPLAIN QUERY PLAN details on SQLite, EXPLAIN
+    output on PostgreSQL"""
+    prefix = 'EXPLAIN QUERY PLAN ' if getattr(conn, 'dialect', 'sqlite') == 'sqlite' else 'EXPLAIN '
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(prefix + sql, params)
+    return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def full_scans(sql, plan):
+    """Tables the plan reads in full (aliases resolved to table names)"""
+    aliases = table_aliases(sql)
+    tables = []
+    for line in plan:
+        match = _SQLITE_SCAN.match(line.strip()) or _POSTGRES_SCAN.search(line)
+        if match:
+            table = aliases.get(match.group(1).upper(), match.group(1).upper())
+            if table not in tables:
+                tables.append(table)
+    return tables
+
+
+class Histogram:
+    """Latency histogram over BUCKETS with row and error counts"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.errors = 0
+
+    def observe(self, seconds, rows=0):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                if index == len(BUCKETS):
+                    return self.max
+                lower = BUCKETS[index - 1] if index else 0.0
+                estimate = lower + (BUCKETS[index] - lower) * (rank - seen) / count
+                return min(estimate, self.max)
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            'calls': self.count,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': self.total * 1e3,
+            'mean_ms': self.total / self.count * 1e3 if self.count else 0.0,
+            'p50_ms': self.quantile(0.5) * 1e3,
+            'p95_ms': self.quantile(0.95) * 1e3,
+            'p99_ms': self.quantile(0.99) * 1e3,
+            'max_ms': self.max * 1e3,
+        }
+
+
+class ProfiledCursor:
+    """Cursor proxy timing each statement from execute() through its last
+    fetch; anything else goes straight to the wrapped cursor."""
+
+    def __init__(self, profiler, conn, cursor):
+        self._profiler = profiler
+        self._conn = conn
+        self._cursor = cursor
+        self._sql = None
+
+    @property
+    def row_factory(self):
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._cursor.row_factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _run(self, method, sql, params):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            method(sql, params)
+        except Exception:
+            self._profiler.statement_error(sql)
+            raise
+        self._sql, self._params = sql, params
+        self._elapsed = time.perf_counter() - started
+        self._rows = 0
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._run(self._cursor.executemany, sql, seq_of_params)
+        self._params = None
+        self._finish()
+        return self
+
+    def _fetch(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self._cursor.arraysize
+        rows = self._fetch(self._cursor.fetchmany, size)
+        if self._sql is not None:
+            self._rows += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(1000)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        sql, self._sql = self._sql, None
+        rows = self._rows or max(self._cursor.rowcount or 0, 0)
+        self._profiler.record_statement(self._conn, sql, self._params, self._elapsed, rows)
+
+
+class ProfiledConnection:
+    """Connection proxy handing out ProfiledCursors; finish() records any
+    statement still open before the connection goes back to its owner."""
+
+    def __init__(self, profiler, conn):
+        self._profiler = profiler
+        self._conn = conn
+        self._cursors = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        cursor = ProfiledCursor(self._profiler, self, self._conn.cursor())
+        self._cursors.append(cursor)
+        return cursor
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def finish(self):
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors.clear()
+
+
+class Profiler:
+    """Process-wide method, statement and pool-wait histograms"""
+
+    def __init__(self, enabled=PROFILE_ENABLED, slow_ms=SLOW_QUERY_MS):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._exporter = None
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.since = datetime.now()
+            self.methods = {}       # name -> Histogram
+            self.statements = {}    # key -> Histogram
+            self.callers = {}       # key -> {method: calls}
+            self.plans = {}         # key -> {'plan', 'full_scans'} or {'error'}
+            self.samples = {}       # key -> (sql, params) that was explained
+            self.last_errors = {}   # method -> message
+            self.pool_wait = Histogram()
+            self.slow = deque(maxlen=SLOW_LOG_SIZE)
+
+    # Methods
+
+    def timed(self, name, func):
+        """Wrap a data-layer function so its calls are timed while enabled"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            outer = getattr(_local, 'method', None)
+            _local.method = name
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._observe_method(name, time.perf_counter() - started, 0, e)
+                raise
+            finally:
+                _local.method = outer
+            if isinstance(result, types.GeneratorType):
+                return self._timed_iter(name, result, started)
+            self._observe_method(name, time.perf_counter() - started, _count_rows(result))
+            return result
+        return wrapper
+
+    def instrument(self, cls):
+        """Time every public static method of cls"""
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith('_') and isinstance(attr, staticmethod):
+                setattr(cls, name, staticmethod(self.timed(name, attr.__func__)))
+        return cls
+
+    def bind(self, func):
+        """func attributed to the calling method when run on another thread
+        (the writer)"""
+        method = getattr(_local, 'method', None)
+        if not self.enabled or method is None:
+            return func
+
+        def bound(*args, **kwargs):
+            outer = getattr(_local, 'method', None)
+            _local.method = method
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _local.method = outer
+        return bound
+
+    def _timed_iter(self, name, chunks, started):
+        rows = 0
+        error = None
+        try:
+            while True:
+                outer = getattr(_local, 'method', None)
+                _local.method = name
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    _local.method = outer
+                rows += _count_rows(chunk)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._observe_method(name, time.perf_counter() - started, rows, error)
+
+    def _observe_method(self, name, seconds, rows, error=None):
+        with self._lock:
+            histogram = self.methods.get(name)
+            if histogram is None:
+                histogram = self.methods[name] = Histogram()
+            histogram.observe(seconds, rows)
+            if error is not None:
+                histogram.errors += 1
+                self.last_errors[name] = str(error)
+
+    # Statements and connections
+
+    def wrap(self, conn):
+        """conn, profiled while enabled"""
+        return ProfiledConnection(self, conn) if self.enabled else conn
+
+    @staticmethod
+    def finish(conn):
+        if isinstance(conn, ProfiledConnection):
+            conn.finish()
+
+    def _statement(self, sql):
+        key = normalize(sql)
+        histogram = self.statements.get(key)
+        if histogram is None:
+            if len(self.statements) >= MAX_STATEMENTS:
+                key = OTHER
+                histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = Histogram()
+        return key, histogram
+
+    def statement_error(self, sql):
+        with self._lock:
+            self._statement(sql)[1].errors += 1
+
+    def record_statement(self, conn, sql, params, seconds, rows):
+        method = getattr(_local, 'method', None)
+        with self._lock:
+            key, histogram = self._statement(sql)
+            histogram.observe(seconds, rows)
+            callers = self.callers.setdefault(key, {})
+            callers[method] = callers.get(method, 0) + 1
+            slow = seconds * 1e3 >= self.slow_ms
+            if slow:
+                self.slow.append({
+                    'at': datetime.now(),
+                    'statement': statement_id(key),
+                    'method': method,
+                    'ms': seconds * 1e3,
+                    'rows': rows,
+                })
+            explain = slow and params is not None and key not in self.plans and key != OTHER
+            if explain:
+                # Claimed now so concurrent slow runs don't explain it again
+                self.plans[key] = {'plan': [], 'full_scans': []}
+                self.samples[key] = (sql, params)
+        if explain:
+            plan = self._explain(conn._conn, sql, params)
+            with self._lock:
+                self.plans[key] = plan
+
+    @staticmethod
+    def _explain(conn, sql, params):
+        verb = sql.lstrip().split(None, 1)[0].upper()
+        if verb not in EXPLAINABLE:
+            return {'error': f'{verb} statements are not explained'}
+        if getattr(conn, 'dialect', 'sqlite') != 'sqlite' and conn.in_transaction:
+            # A failing EXPLAIN would abort the caller's transaction
+            return {'error': 'ran inside a transaction'}
+        try:
+            plan = explain(conn, sql, params)
+        except Exception as e:
+            return {'error': str(e)}
+        return {'plan': plan, 'full_scans': full_scans(sql, plan)}
+
+    def observe_wait(self, seconds):
+        with self._lock:
+            self.pool_wait.observe(seconds)
+
+    # Reporting
+
+    def snapshot(self):
+        """Summaries of everything recorded since the last reset, slowest
+        total time first"""
+        with self._lock:
+            methods = [dict(method=name, last_error=self.last_errors.get(name), **h.summary())
+                       for name, h in self.methods.items()]
+            statements = []
+            for key, histogram in self.statements.items():
+                plan = self.plans.get(key, {})
+                statements.append(dict(
+                    id=statement_id(key),
+                    sql=key,
+                    methods=sorted(m for m in self.callers.get(key, {}) if m),
+                    plan=plan.get('plan'),
+                    plan_error=plan.get('error'),
+                    full_scans=plan.get('full_scans', []),
+                    **histogram.summary()
+                ))
+            return {
+                'enabled': self.enabled,
+                'since': self.since,
+                'slow_ms': self.slow_ms,
+                'methods': sorted(methods, key=lambda m: -m['total_ms']),
+                'statements': sorted(statements, key=lambda s: -s['total_ms']),
+                'pool_wait': self.pool_wait.summary(),
+                'slow': list(self.slow)[::-1],
+            }
+
+    def prometheus(self, prefix='restaurant_db'):
+        """Recorded histograms in the Prometheus text exposition format"""
+        lines = [
+            f'# HELP {prefix}_profiling_enabled Whether the data layer profiler is on',
+            f'# TYPE {prefix}_profiling_enabled gauge',
+            f'{prefix}_profiling_enabled {int(self.enabled)}',
+        ]
+        with self._lock:
+            methods = {(('method', name),): h for name, h in self.methods.items()}
+            statements = {
+                (('statement', statement_id(key)), ('verb', key.split(' ', 1)[0].upper())): h
+                for key, h in self.statements.items()
+            }
+            _histograms(lines, f'{prefix}_method_duration',
+                        'DatabaseOperations call latency', methods)
+            _histograms(lines, f'{prefix}_statement_duration',
+                        'SQL statement latency from execute to last fetch', statements)
+            _histograms(lines, f'{prefix}_pool_wait',
+                        'Time spent waiting for a pooled connection', {(): self.pool_wait},
+                        counters=False)
+            lines.append(f'# HELP {prefix}_statement_info Normalized SQL of each statement id')
+            lines.append(f'# TYPE {prefix}_statement_info gauge')
+            for key in self.statements:
+                lines.append(f'{prefix}_statement_info'
+                             f'{_labels((("statement", statement_id(key)), ("sql", key)))} 1')
+            lines.append(f'# HELP {prefix}_statement_full_scan Slow statements whose plan '
+                         f'reads a whole table')
+            lines.append(f'# TYPE {prefix}_statement_full_scan gauge')
+            for key, plan in self.plans.items():
+                for table in plan.get('full_scans', []):
+                    labels = (('statement', statement_id(key)), ('table', table))
+                    lines.append(f'{prefix}_statement_full_scan{_labels(labels)} 1')
+        return '\n'.join(lines) + '\n'
+
+    def start_export(self, path, render, interval=PROFILE_INTERVAL):
+        """Rewrite path with render() every interval seconds (once per process)"""
+        with self._lock:
+            if self._exporter is not None:
+                return
+            self._exporter = threading.Thread(
+                target=self._export, args=(path, render, interval),
+                name='db-metrics-export', daemon=True
+            )
+        self._exporter.start()
+
+    @staticmethod
+    def _export(path, render, interval):
+        while True:
+            try:
+                partial = f'{path}.{os.getpid()}.tmp'
+                with open(partial, 'w') as f:
+                    f.write(render())
+                os.replace(partial, path)
+            except Exception:
+                pass
+            time.sleep(interval)
+
+
+def _count_rows(result):
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        # (rows, next_cursor) pages
+        return len(result[0])
+    if result is None or isinstance(result, (str, dict, tuple)):
+        return 0 if result is None else 1
+    try:
+        return len(result)
+    except TypeError:
+        return 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _histograms(lines, base, help_text, series, counters=True):
+    """{base}_duration_seconds histograms (plus rows/errors counters) for
+    {label pairs: Histogram}"""
+    name = f'{base}_seconds'
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for labels, histogram in series.items():
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, '+Inf'), histogram.buckets):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels((*labels, ("le", bound)))} {cumulative}')
+        lines.append(f'{name}_sum{_labels(labels)} {histogram.total:.6f}')
+        lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+    if not counters:
+        return
+    prefix = base.rsplit('_', 1)[0]
+    for field, text in (('rows', 'Rows returned or changed'), ('errors', 'Calls that raised')):
+        counter = f'{prefix}_{field}_total'
+        lines.append(f'# HELP {counter} {text}')
+        lines.append(f'# TYPE {counter} counter')
+        for labels, histogram in series.items():
+            lines.append(f'{counter}{_labels(labels)} {getattr(histogram, field)}')
+
+
+profiler = Profiler()
@@ -0,0 +1,135 @@
+import functools
+import os
+import threading
+import time
+
+CACHE_ENABLED = os.getenv('DB_CACHE_ENABLED', '1') != '0'
+
+# Seconds a cached read stays valid, per entity. Writes made through
+# DatabaseOperations invalidate immediately; the TTL only bounds how stale a
+# read can be after a write made by another process. No write invalidates
+# 'analytics': recomputing it scans the whole date range, so it is refreshed
+# at most every five minutes instead of after every payment.
+TTLS = {
+    'analytics': 300,
+    'customers': 60,
+    'tables': 10,
+    'menu': 300,
+    'orders': 10,
+    'reports': 120,
+    'reservations': 30,
+}
+
+
+class QueryCache:
+    """Thread-safe result cache with per-entry TTLs and tag-based invalidation.
+
+    Every entry is tagged with the entities it was read from; invalidating a
+    tag drops every entry that depends on it. Hit, miss and invalidation
+    counts are kept per tag.
+
+    Loaders run outside the lock. Each tag has a generation, bumped on
+    invalidation: a load that overlapped an invalidation of one of its tags
+    returns its result without storing it, so a pre-write read is never
+    cached after the write.
+    """
+
+    def __init__(self, enabled=CACHE_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (expires_at, value, tags)
+        self._by_tag = {}    # tag -> set(keys)
+        self._stats = {}     # tag -> {'hits', 'misses', 'invalidations'}
+        self._generations = {}   # tag -> invalidation count
+        self._cleared = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, tags, field):
+        for tag in tags:
+            stats = self._stats.setdefault(
+                tag, {'hits': 0, 'misses': 0, 'invalidations': 0}
+            )
+            stats[field] += 1
+
+    def get_or_load(self, key, tags, ttl, loader):
+        if not self.enabled:
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                self._count(tags, 'hits')
+                return entry[1]
+            self.misses += 1
+            self._count(tags, 'misses')
+            generation = self._generation(tags)
+
+        value = loader()
+        with self._lock:
+            if self._generation(tags) != generation:
+                return value
+            self._entries[key] = (now + ttl, value, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+        return value
+
+    def _generation(self, tags):
+        return (self._cleared,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def invalidate(self, *tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                keys = self._by_tag.pop(tag, set())
+                for key in keys:
+                    entry = self._entries.pop(key, None)
+                    if entry is not None:
+                        for other in entry[2]:
+                            if other != tag:
+                                self._by_tag.get(other, set()).discard(key)
+                self._count((tag,), 'invalidations')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._cleared += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = {tag: dict(counts) for tag, counts in self._stats.items()}
+            entries = len(self._entries)
+            hits, misses = self.hits, self.misses
+        return {
+            'entries': entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            'tags': stats,
+        }
+
+
+query_cache = QueryCache()
+
+
+def cached(*tags, ttl=None):
+    """Cache a read function's result under its arguments.
+
+    The entry is tagged with ``tags`` and lives for ``ttl`` seconds (default:
+    the shortest TTL of its tags). Results are shared, so callers must treat
+    them as read-only.
+    """
+    ttl = ttl if ttl is not None else min(TTLS[tag] for tag in tags)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__qualname__, repr(args), repr(sorted(kwargs.items())))
+            return query_cache.get_or_load(
+                key, tags, ttl, lambda: func(*args, **kwargs)
+            )
+        wrapper.uncached = func
+        return wrapper
+    return decorator
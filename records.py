@@ -0,0 +1,131 @@
+"""Typed row records and columnar fetch helpers.
+
+The record classes are NamedTuples, so they are as compact as plain tuples
+and still work wherever a tuple row was used (e.g. ``pd.DataFrame(rows)``),
+but fields are read by name. ``record_factory`` maps cursor columns to fields
+by name, so adding or reordering table columns cannot shift values into the
+wrong field.
+"""
+from typing import NamedTuple, Optional
+
+
+class Customer(NamedTuple):
+    customer_id: int
+    first_name: str
+    middle_name: Optional[str] = None
+    last_name: str = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+
+
+class Table(NamedTuple):
+    table_number: int
+    booking_id: int = None
+    seating_capacity: int = None
+    booking_status: str = None
+
+
+class MenuItem(NamedTuple):
+    menuitem_number: int
+    item_name: str = None
+    item_category: str = None
+    price: float = None
+    availability_status: str = None
+
+
+class Order(NamedTuple):
+    order_id: int
+    customer_id: int = None
+    table_number: int = None
+    order_date: str = None
+    order_time: str = None
+    total_amount: float = None
+    order_status: str = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+
+class KitchenEvent(NamedTuple):
+    event_id: int
+    order_id: int = None
+    table_number: int = None
+    event_type: str = None
+    item_category: str = None
+    items: str = None           # JSON list of {"name", "quantity"}
+    created_at: str = None
+
+
+class LogEvent(NamedTuple):
+    event_id: int
+    logged_at: str = None
+    entity: str = None
+    entity_id: int = None
+    action: str = None
+    data: str = None            # compact JSON of the columns set
+
+
+def record_factory(cls):
+    """sqlite3 row_factory building ``cls`` records from column names.
+
+    The column-to-field mapping is worked out once per statement (while the
+    cursor's description object stays the same); when the columns match the
+    fields exactly each row is a single tuple construction.
+    """
+    make = cls._make
+    fields = cls._fields
+    state = (None, None)
+
+    def factory(cursor, row):
+        nonlocal state
+        description, build = state
+        if cursor.description is not description:
+            description = cursor.description
+            names = [column[0].lower() for column in description]
+            if tuple(names) == fields:
+                build = make
+            else:
+                index = {name: i for i, name in enumerate(names)}
+                positions = [index.get(field) for field in fields]
+                defaults = cls._field_defaults
+
+                def build(row, positions=positions):
+                    return make(
+                        row[i] if i is not None else defaults.get(field)
+                        for i, field in zip(positions, fields)
+                    )
+            state = (description, build)
+        return build(row)
+
+    return factory
+
+
+def fetch_columns(cursor, chunk_size=10000):
+    """Drain an executed cursor into {column: numpy array}"""
+    import numpy as np
+
+    names = [column[0] for column in cursor.description]
+    columns = [[] for _ in names]
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for values, column in zip(zip(*rows), columns):
+            column.extend(values)
+    return {name: np.array(values) for name, values in zip(names, columns)}
+
+
+def fetch_frame(cursor, chunk_size=10000):
+    """Drain an executed cursor into a pandas DataFrame"""
+    import pandas as pd
+
+    names = [column[0] for column in cursor.description]
+    frames = []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        frames.append(pd.DataFrame.from_records(rows, columns=names))
+    if not frames:
+        return pd.DataFrame(columns=names)
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
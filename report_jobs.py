@@ -0,0 +1,355 @@
+"""Background report jobs on a process pool.
+
+Long reports run off the Streamlit script thread. A job splits its date
+range into partitions of PARTITION_DAYS, newest first. Worker processes each
+hold one read-only connection (SQLite opens the file with mode=ro), run
+partitions in parallel, and the parent merges them:
+
+    sales  each partition is written to a CSV part file in report order and
+           the parts are concatenated
+    menu   each partition returns quantity and revenue per menu item, and the
+           parent sums them and sorts by revenue
+
+Jobs report progress per finished partition and can be cancelled; partitions
+not started yet are dropped. Finished reports stay on disk for re-download
+until KEEP_REPORTS newer ones replace them or the executor closes.
+"""
+import csv
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from urllib.parse import quote
+
+import backends
+
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', min(4, os.cpu_count() or 1)))
+PARTITION_DAYS = int(os.getenv('REPORT_PARTITION_DAYS', 7))
+# Finished reports kept for re-download (oldest files are deleted first)
+KEEP_REPORTS = int(os.getenv('REPORT_KEEP', 20))
+CHUNK_SIZE = 5000
+
+# Per item totals for one partition; merged by MENUITEM_NUMBER
+MENU_PARTITION_SQL = '''
+    SELECT
+        MI.MENUITEM_NUMBER,
+        MI.ITEM_NAME,
+        MI.ITEM_CATEGORY,
+        SUM(OI.QUANTITY),
+        SUM(OI.ITEM_TOTAL)
+    FROM MENU_ITEM MI
+    JOIN ORDER_ITEM OI ON MI.MENUITEM_NUMBER = OI.MENUITEM_NUMBER
+    JOIN ORDERS O ON OI.ORDER_ID = O.ORDER_ID
+    WHERE O.ORDER_DATE BETWEEN ? AND ?
+    AND O.ORDER_STATUS = 'COMPLETED'
+    GROUP BY MI.MENUITEM_NUMBER, MI.ITEM_NAME, MI.ITEM_CATEGORY
+'''
+
+
+def partitions(start_date, end_date, days=PARTITION_DAYS):
+    """[(first, last)] ISO dates covering start_date..end_date, newest first"""
+    start = date.fromisoformat(str(start_date))
+    end = date.fromisoformat(str(end_date))
+    ranges = []
+    while end >= start:
+        first = max(start, end - timedelta(days=days - 1))
+        ranges.append((first.isoformat(), end.isoformat()))
+        end = first - timedelta(days=1)
+    return ranges
+
+
+# Worker processes: one read-only connection each, opened by the initializer
+_conn = None
+
+
+def connect_read_only(target):
+    """Read-only connection to a SQLite path or postgresql:// URL"""
+    backend = backends.get_backend(target)
+    if backend.dialect == 'sqlite':
+        path = quote(os.path.abspath(backend.path))
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+    conn = backend.connect(autocommit=True)
+    conn.execute('SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY')
+    return conn
+
+
+def _init_worker(target):
+    global _conn
+    _conn = connect_read_only(target)
+
+
+def _sales_partition(sql, first, last, path):
+    """Write one partition of the sales report to path as CSV without a
+    header; returns the row count"""
+    cursor = _conn.cursor()
+    cursor.execute(sql, (first, last))
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        while True:
+            chunk = cursor.fetchmany(CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def _menu_partition(first, last):
+    cursor = _conn.cursor()
+    cursor.execute(MENU_PARTITION_SQL, (first, last))
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+class ReportJob:
+    """One background report: progress, cancellation and the finished file"""
+
+    def __init__(self, report, start_date, end_date, fmt, total, lock=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.report = report
+        self.start_date = str(start_date)
+        self.end_date = str(end_date)
+        self.format = fmt
+        self.total = total
+        self.done = 0
+        self.status = 'running'   # running, done, cancelled or failed
+        self.error = None
+        self.path = None
+        self.row_count = 0
+        self.rows = None          # merged rows (menu report only)
+        self.submitted = time.time()
+        self.finished = None
+        self._cancelled = threading.Event()
+        self._futures = []
+        # The executor's lock: its collector thread updates done, status and
+        # the results while pages read them
+        self._lock = lock or threading.Lock()
+
+    @property
+    def progress(self):
+        with self._lock:
+            return self.done / self.total if self.total else 1.0
+
+    @property
+    def filename(self):
+        return f"{self.report}_report_{self.start_date}_{self.end_date}.{self.format}"
+
+    def cancel(self):
+        """Drop the partitions not started yet; running ones are discarded"""
+        self._cancelled.set()
+        for future in self._futures:
+            future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job leaves 'running'; True if it did"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self.status != 'running':
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+
+class ReportExecutor:
+    """Runs report jobs on a pool of worker processes (created on first use)"""
+
+    def __init__(self, target, workers=REPORT_WORKERS, keep=KEEP_REPORTS):
+        self.target = target
+        self.workers = workers
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._pool = None
+        self._jobs = OrderedDict()   # id -> ReportJob, oldest first
+        self._dir = tempfile.mkdtemp(prefix='restaurant-reports-')
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs threads (pool, writer,
+                # Streamlit) is not safe
+                self._pool = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.target,)
+                )
+            return self._pool
+
+    def submit(self, report, start_date, end_date, fmt='csv'):
+        """Start a report ('sales' or 'menu') in the background; returns its
+        ReportJob"""
+        from exports import REPORTS, WRITERS
+
+        if report not in REPORTS:
+            raise ValueError(f"Unknown report: {report}")
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown format: {fmt}")
+        if str(end_date) < str(start_date):
+            raise ValueError("End date is before start date")
+        ranges = partitions(start_date, end_date)
+        job = ReportJob(report, start_date, end_date, fmt, len(ranges), self._lock)
+        pool = self._get_pool()
+        if report == 'sales':
+            from database import SALES_REPORT_SQL
+
+            parts = [os.path.join(self._dir, f'{job.id}.{n}.part') for n in range(len(ranges))]
+            job._futures = [pool.submit(_sales_partition, SALES_REPORT_SQL, first, last, part)
+                            for (first, last), part in zip(ranges, parts)]
+        else:
+            parts = []
+            job._futures = [pool.submit(_menu_partition, first, last) for first, last in ranges]
+        with self._lock:
+            self._jobs[job.id] = job
+        threading.Thread(target=self._collect, args=(job, parts), daemon=True,
+                         name=f'report-{job.id}').start()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Every kept job, newest first"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _collect(self, job, parts):
+        results = {}
+        index = {future: n for n, future in enumerate(job._futures)}
+        status, error, path, rows, row_count = 'failed', None, None, None, 0
+        try:
+            for future in as_completed(job._futures):
+                if job.cancelled:
+                    break
+                results[index[future]] = future.result()
+                with self._lock:
+                    job.done += 1
+            if job.cancelled:
+                status = 'cancelled'
+            else:
+                path = os.path.join(self._dir, f'{job.id}.{job.format}')
+                if job.report == 'sales':
+                    row_count = sum(results.values())
+                    _write_parts(path, job.format, parts)
+                else:
+                    rows = merge_menu(results[n] for n in range(len(job._futures)))
+                    row_count = len(rows)
+                    _write_rows(path, job.format, 'menu', rows)
+                status = 'done'
+        except CancelledError:
+            status = 'cancelled'
+        except Exception as e:
+            error = str(e)
+        finally:
+            for part in parts:
+                if os.path.exists(part):
+                    os.remove(part)
+            if status != 'done' and path and os.path.exists(path):
+                os.remove(path)
+                path = None
+            # Publish the results before the status that announces them
+            with self._lock:
+                job.path, job.rows, job.row_count = path, rows, row_count
+                job.error = error
+                job.finished = time.time()
+                job.status = status
+            self._prune()
+
+    def _prune(self):
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.status != 'running']
+            for job in finished[:max(0, len(finished) - self.keep)]:
+                del self._jobs[job.id]
+                if job.path and os.path.exists(job.path):
+                    os.remove(job.path)
+
+    def close(self):
+        """Cancel running jobs, stop the workers and delete kept reports"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            pool, self._pool = self._pool, None
+        for job in jobs:
+            job.cancel()
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def merge_menu(partials):
+    """Sum per-partition item totals into get_menu_performance rows:
+    (name, category, quantity, revenue), highest revenue first"""
+    totals = {}
+    for rows in partials:
+        for item, name, category, quantity, revenue in rows:
+            entry = totals.setdefault(item, [name, category, 0, 0.0])
+            entry[2] += quantity
+            entry[3] += float(revenue)
+    rows = [(name, category, quantity, round(revenue, 2))
+            for name, category, quantity, revenue in totals.values()]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows
+
+
+def _write_rows(path, fmt, report, rows):
+    from exports import REPORTS, _header
+
+    columns = REPORTS[report][1]
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(_header(columns))
+            writer.writerows(rows)
+        return
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _schema(columns)
+    arrays = [pa.array(list(values), type=field.type)
+              for values, field in zip(zip(*rows), schema)] if rows else \
+        [pa.array([], type=field.type) for field in schema]
+    pq.write_table(pa.Table.from_arrays(arrays, schema=schema), path)
+
+
+def _write_parts(path, fmt, parts):
+    """Join the sales report's CSV parts, in order, into one file"""
+    from exports import REPORTS, _header
+
+    columns = REPORTS['sales'][1]
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as out:
+            csv.writer(out).writerow(_header(columns))
+            for part in parts:
+                with open(part, newline='', encoding='utf-8') as f:
+                    shutil.copyfileobj(f, out)
+        return
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    schema = _schema(columns)
+    read_options = pacsv.ReadOptions(column_names=schema.names)
+    convert_options = pacsv.ConvertOptions(
+        column_types={field.name: field.type for field in schema})
+    # One row group per partition
+    with pq.ParquetWriter(path, schema) as writer:
+        for part in parts:
+            if os.path.getsize(part):
+                writer.write_table(pacsv.read_csv(part, read_options, convert_options=convert_options))
+
+
+def _schema(columns):
+    import pyarrow as pa
+
+    return pa.schema([(name, pa.type_for_alias(kind)) for name, kind in columns])
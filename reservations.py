@@ -0,0 +1,128 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_DURATION = 120  # minutes
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Reload from the database at least this often (seconds)
+MAX_AGE = 30
+
+
+def parse_time(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value)[:19])
+
+
+def format_time(value):
+    return parse_time(value).strftime(TIME_FORMAT)
+
+
+class ReservationBook:
+    """Interval index over upcoming RESERVATION rows.
+
+    Each table keeps its bookings as parallel sorted lists of start and end
+    times. Bookings on one table never overlap, so the only booking that can
+    clash with [start, end) is the last one starting before ``end``: one
+    bisect per table. Availability search walks tables by capacity and stops
+    at the first ``limit`` free ones.
+    """
+
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._capacity = {}      # table_number -> seating capacity
+        self._by_capacity = []   # sorted [(capacity, table_number)]
+        self._starts = {}        # table_number -> sorted [start]
+        self._ends = {}          # table_number -> [end] aligned with _starts
+        self._ids = {}           # table_number -> [reservation_id] aligned with _starts
+        self._where = {}         # reservation_id -> (table_number, start)
+        self.loaded_at = None
+
+    def load(self, conn, now=None):
+        now = now or datetime.now()
+        tables = conn.execute(
+            'SELECT TABLE_NUMBER, SEATING_CAPACITY FROM REST_TABLE'
+        ).fetchall()
+        # Bookings that started up to a day ago may still be running
+        rows = conn.execute('''
+            SELECT RESERVATION_ID, TABLE_NUMBER, RESERVATION_TIME, DURATION_MINUTES
+            FROM RESERVATION
+            WHERE RESERVATION_TIME >= ?
+            ORDER BY TABLE_NUMBER, RESERVATION_TIME
+        ''', (format_time(now - timedelta(days=1)),)).fetchall()
+
+        with self._lock:
+            self._capacity = {row[0]: row[1] for row in tables}
+            self._by_capacity = sorted(
+                (capacity, table_number)
+                for table_number, capacity in self._capacity.items()
+            )
+            self._starts, self._ends, self._ids, self._where = {}, {}, {}, {}
+            for reservation_id, table_number, start, duration in rows:
+                start = parse_time(start)
+                end = start + timedelta(minutes=duration)
+                # Rows arrive sorted by table and start time
+                self._starts.setdefault(table_number, []).append(start)
+                self._ends.setdefault(table_number, []).append(end)
+                self._ids.setdefault(table_number, []).append(reservation_id)
+                self._where[reservation_id] = (table_number, start)
+            self.loaded_at = time.monotonic()
+        return self
+
+    def ensure_loaded(self, conn):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age:
+            self.load(conn)
+        return self
+
+    def invalidate(self):
+        with self._lock:
+            self.loaded_at = None
+
+    def is_free(self, table_number, start, end):
+        with self._lock:
+            starts = self._starts.get(table_number)
+            if not starts:
+                return True
+            i = bisect.bisect_left(starts, end)
+            return i == 0 or self._ends[table_number][i - 1] <= start
+
+    def add(self, reservation_id, table_number, start, end):
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            starts = self._starts.setdefault(table_number, [])
+            i = bisect.bisect_right(starts, start)
+            starts.insert(i, start)
+            self._ends.setdefault(table_number, []).insert(i, end)
+            self._ids.setdefault(table_number, []).insert(i, reservation_id)
+            self._where[reservation_id] = (table_number, start)
+
+    def remove(self, reservation_id):
+        with self._lock:
+            if reservation_id not in self._where:
+                return
+            table_number, start = self._where.pop(reservation_id)
+            starts = self._starts[table_number]
+            i = bisect.bisect_left(starts, start)
+            while self._ids[table_number][i] != reservation_id:
+                i += 1
+            del starts[i]
+            del self._ends[table_number][i]
+            del self._ids[table_number][i]
+
+    def search(self, party_size, start, end, limit=None):
+        """Free (table_number, capacity) for [start, end), smallest first"""
+        with self._lock:
+            found = []
+            i = bisect.bisect_left(self._by_capacity, (party_size, 0))
+            for capacity, table_number in self._by_capacity[i:]:
+                if self.is_free(table_number, start, end):
+                    found.append((table_number, capacity))
+                    if limit and len(found) >= limit:
+                        break
+            return found
+
+    def capacity(self, table_number):
+        return self._capacity.get(table_number)
@@ -0,0 +1,116 @@
+"""DAILY_REVENUE summary table: completed-order revenue per day, payment mode
+and menu category.
+
+process_payment folds each order in as it completes, so analytics read a few
+rows per day instead of scanning ORDERS. Rebuild or backfill it with
+
+    python rollups.py rebuild [--db PATH | postgresql://...] [--start 2024-01-01] [--end 2024-12-31]
+
+--db defaults to the app's database (DB_PATH, else DB_FILE from config.py).
+"""
+import argparse
+
+import backends
+
+CREATE_DAILY_REVENUE = '''
+CREATE TABLE IF NOT EXISTS DAILY_REVENUE (
+    REVENUE_DATE DATE NOT NULL,
+    PAYMENT_MODE TEXT NOT NULL,
+    ITEM_CATEGORY TEXT NOT NULL,
+    ORDER_COUNT INTEGER NOT NULL DEFAULT 0,
+    QUANTITY INTEGER NOT NULL DEFAULT 0,
+    REVENUE DECIMAL(10,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (REVENUE_DATE, PAYMENT_MODE, ITEM_CATEGORY)
+)
+'''
+
+# Existing columns are qualified: PostgreSQL rejects bare names as ambiguous
+_UPSERT = '''
+    ON CONFLICT (REVENUE_DATE, PAYMENT_MODE, ITEM_CATEGORY) DO UPDATE SET
+        ORDER_COUNT = DAILY_REVENUE.ORDER_COUNT + excluded.ORDER_COUNT,
+        QUANTITY = DAILY_REVENUE.QUANTITY + excluded.QUANTITY,
+        REVENUE = DAILY_REVENUE.REVENUE + excluded.REVENUE
+'''
+
+
+def add_order(cursor, order_id, payment_mode):
+    """Fold one newly completed order into DAILY_REVENUE"""
+    cursor.execute('''
+        INSERT INTO DAILY_REVENUE
+            (REVENUE_DATE, PAYMENT_MODE, ITEM_CATEGORY, ORDER_COUNT, QUANTITY, REVENUE)
+        SELECT O.ORDER_DATE, ?, MI.ITEM_CATEGORY, 1, SUM(OI.QUANTITY), SUM(OI.ITEM_TOTAL)
+        FROM ORDERS O
+        JOIN ORDER_ITEM OI ON OI.ORDER_ID = O.ORDER_ID
+        JOIN MENU_ITEM MI ON MI.MENUITEM_NUMBER = OI.MENUITEM_NUMBER
+        WHERE O.ORDER_ID = ?
+        GROUP BY O.ORDER_DATE, MI.ITEM_CATEGORY
+    ''' + _UPSERT, (payment_mode, order_id))
+
+
+def rebuild(cursor, start_date=None, end_date=None):
+    """Recompute DAILY_REVENUE from ORDERS, optionally for a date range only"""
+    start_date = str(start_date or '0000-01-01')
+    end_date = str(end_date or '9999-12-31')
+    cursor.execute('''
+        DELETE FROM DAILY_REVENUE
+        WHERE REVENUE_DATE BETWEEN ? AND ?
+    ''', (start_date, end_date))
+    cursor.execute('''
+        INSERT INTO DAILY_REVENUE
+            (REVENUE_DATE, PAYMENT_MODE, ITEM_CATEGORY, ORDER_COUNT, QUANTITY, REVENUE)
+        SELECT
+            O.ORDER_DATE,
+            COALESCE((
+                SELECT P.PAYMENT_MODE FROM PAYMENT P
+                WHERE P.ORDER_ID = O.ORDER_ID
+                ORDER BY P.TRANSACTION_ID LIMIT 1
+            ), 'UNKNOWN'),
+            MI.ITEM_CATEGORY,
+            COUNT(DISTINCT O.ORDER_ID),
+            SUM(OI.QUANTITY),
+            SUM(OI.ITEM_TOTAL)
+        FROM ORDERS O
+        JOIN ORDER_ITEM OI ON OI.ORDER_ID = O.ORDER_ID
+        JOIN MENU_ITEM MI ON MI.MENUITEM_NUMBER = OI.MENUITEM_NUMBER
+        WHERE O.ORDER_STATUS = 'COMPLETED'
+        AND O.ORDER_DATE BETWEEN ? AND ?
+        GROUP BY 1, 2, 3
+    ''' + _UPSERT, (start_date, end_date))
+
+
+def revenue_between(cursor, start_date, end_date):
+    """Total completed-order revenue for ORDER_DATE in [start_date, end_date]"""
+    cursor.execute('''
+        SELECT COALESCE(SUM(REVENUE), 0)
+        FROM DAILY_REVENUE
+        WHERE REVENUE_DATE BETWEEN ? AND ?
+    ''', (str(start_date), str(end_date)))
+    return cursor.fetchone()[0]
+
+
+def main():
+    # Imported here: database imports this module
+    from database import DB_PATH
+
+    parser = argparse.ArgumentParser(description='Maintain the DAILY_REVENUE rollup')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('--db', default=DB_PATH, help='database path or URL (default: DB_PATH)')
+    parser.add_argument('--start', help='first ORDER_DATE to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last ORDER_DATE to rebuild (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    conn = backends.get_backend(args.db).connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        cursor.execute(CREATE_DAILY_REVENUE)
+        rebuild(cursor, args.start, args.end)
+        conn.commit()
+        cursor.execute('SELECT COUNT(*) FROM DAILY_REVENUE')
+        print(f"DAILY_REVENUE rebuilt: {cursor.fetchone()[0]} rows")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Tables with a reservation starting within this window are held back
+RESERVATION_HOLD = timedelta(hours=2)
+# Reload from the database at least this often (seconds) to pick up changes
+# made by other processes and reservations moving into the hold window
+MAX_AGE = 30
+
+
+class TableAllocator:
+    """In-memory index of free tables bucketed by SEATING_CAPACITY.
+
+    ``_capacities`` is the sorted list of capacities that currently have a
+    free table, so the smallest table that fits a party is one bisect away;
+    each bucket keeps its table numbers sorted so the lowest number wins.
+    """
+
+    def __init__(self, hold=RESERVATION_HOLD, max_age=MAX_AGE):
+        self.hold = hold
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._tables = {}        # table_number -> (capacity, status)
+        self._held = set()       # tables with an upcoming reservation
+        self._free = {}          # capacity -> sorted [table_number]
+        self._capacities = []    # sorted capacities with a free table
+        self.loaded_at = None
+
+    def load(self, conn, now=None):
+        now = now or datetime.now()
+        tables = conn.execute(
+            'SELECT TABLE_NUMBER, SEATING_CAPACITY, BOOKING_STATUS FROM REST_TABLE'
+        ).fetchall()
+        held = {row[0] for row in conn.execute('''
+            SELECT DISTINCT TABLE_NUMBER
+            FROM RESERVATION
+            WHERE RESERVATION_TIME BETWEEN ? AND ?
+        ''', (now.strftime('%Y-%m-%d %H:%M:%S'),
+              (now + self.hold).strftime('%Y-%m-%d %H:%M:%S')))}
+
+        with self._lock:
+            self._tables = {row[0]: (row[1], row[2]) for row in tables}
+            self._held = held
+            self._free = {}
+            for table_number, (capacity, status) in self._tables.items():
+                if self._is_free(table_number, status):
+                    self._free.setdefault(capacity, []).append(table_number)
+            for bucket in self._free.values():
+                bucket.sort()
+            self._capacities = sorted(self._free)
+            self.loaded_at = time.monotonic()
+        return self
+
+    def ensure_loaded(self, conn):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age:
+            self.load(conn)
+        return self
+
+    def invalidate(self):
+        with self._lock:
+            self.loaded_at = None
+
+    def _is_free(self, table_number, status):
+        return status == 'AVAILABLE' and table_number not in self._held
+
+    def _remove_free(self, table_number, capacity):
+        bucket = self._free.get(capacity)
+        if not bucket:
+            return
+        i = bisect.bisect_left(bucket, table_number)
+        if i < len(bucket) and bucket[i] == table_number:
+            bucket.pop(i)
+            if not bucket:
+                del self._free[capacity]
+                self._capacities.pop(bisect.bisect_left(self._capacities, capacity))
+
+    def _add_free(self, table_number, capacity):
+        bucket = self._free.get(capacity)
+        if bucket is None:
+            self._free[capacity] = [table_number]
+            bisect.insort(self._capacities, capacity)
+        else:
+            i = bisect.bisect_left(bucket, table_number)
+            if i == len(bucket) or bucket[i] != table_number:
+                bucket.insert(i, table_number)
+
+    def mark(self, table_number, status, capacity=None):
+        """Record a committed status change (or a new table) in the index"""
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            if table_number in self._tables:
+                old_capacity, old_status = self._tables[table_number]
+                capacity = old_capacity if capacity is None else capacity
+                if self._is_free(table_number, old_status):
+                    self._remove_free(table_number, old_capacity)
+            elif capacity is None:
+                # Unknown table: let the next call reload everything
+                self.loaded_at = None
+                return
+            self._tables[table_number] = (capacity, status)
+            if self._is_free(table_number, status):
+                self._add_free(table_number, capacity)
+
+    def assign(self, party_size, exclude=()):
+        """Smallest free table seating party_size, or None if none fits"""
+        with self._lock:
+            i = bisect.bisect_left(self._capacities, party_size)
+            while i < len(self._capacities):
+                for table_number in self._free[self._capacities[i]]:
+                    if table_number not in exclude:
+                        return table_number
+                i += 1
+        return None
+
+    def free_tables(self, party_size=1):
+        """Free tables seating at least party_size, smallest first"""
+        with self._lock:
+            i = bisect.bisect_left(self._capacities, party_size)
+            return [
+                (table_number, capacity)
+                for capacity in self._capacities[i:]
+                for table_number in self._free[capacity]
+            ]
@@ -0,0 +1,41 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+
+# The sample database shipped with the app, at schema version 0
+BASELINE_DB = os.path.join(ROOT, 'restaurant.db')
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A private copy of the sample database"""
+    path = str(tmp_path / 'restaurant.db')
+    shutil.copy(BASELINE_DB, path)
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    """DatabaseOperations on a migrated copy of the sample database"""
+    database.configure(db_path=db_path)
+    try:
+        yield database.DatabaseOperations
+    finally:
+        database.shutdown()
+
+
+@pytest.fixture
+def ids(db):
+    """A customer and a menu item to build orders from"""
+    with database.get_db_connection() as conn:
+        customer_id = conn.execute('SELECT MIN(CUSTOMER_ID) FROM CUSTOMER').fetchone()[0]
+        menu = [row[0] for row in conn.execute(
+            'SELECT MENUITEM_NUMBER FROM MENU_ITEM ORDER BY MENUITEM_NUMBER').fetchall()]
+    return customer_id, menu
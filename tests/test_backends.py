@@ -0,0 +1,137 @@
+"""The DB-API backend path, run through a stand-in driver.
+
+The stand-in is sqlite3 behind the 'format' paramstyle, so every query goes
+through backends.DBAPIBackend's wrapper: placeholder translation, RETURNING
+for lastrowid, Row objects and explicit transactions.
+"""
+import sqlite3
+
+import pytest
+
+import backends
+import create_database
+import database
+import migrations
+import rollups
+
+
+class StandInCursor:
+    def __init__(self, raw):
+        self._raw = raw
+
+    @staticmethod
+    def _sql(sql):
+        assert '?' not in sql, sql
+        return sql.replace('%s', '?').replace('%%', '%')
+
+    def execute(self, sql, params=()):
+        self._raw.execute(self._sql(sql), params)
+
+    def executemany(self, sql, seq_of_params):
+        self._raw.executemany(self._sql(sql), seq_of_params)
+
+    def __getattr__(self, name):
+        # description, rowcount, arraysize, fetch*, close
+        return getattr(self._raw, name)
+
+
+class StandInConnection:
+    def __init__(self, path):
+        self._raw = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+
+    def cursor(self):
+        return StandInCursor(self._raw.cursor())
+
+    def close(self):
+        self._raw.close()
+
+
+class StandInDriver:
+    """A DB-API module: sqlite3 with %s placeholders"""
+    paramstyle = 'format'
+    Error = sqlite3.Error
+
+    @staticmethod
+    def connect(path):
+        return StandInConnection(path)
+
+
+class StandInBackend(backends.DBAPIBackend):
+    # Speaks SQLite's SQL, so migrations take their SQLite branches
+    dialect = 'sqlite'
+
+    def __init__(self, path):
+        super().__init__(StandInDriver, path)
+
+
+@pytest.fixture
+def standin(db_path, monkeypatch):
+    monkeypatch.setattr(backends, 'get_backend', lambda target, *args: StandInBackend(target))
+    database.configure(db_path=db_path)
+    try:
+        yield database.DatabaseOperations
+    finally:
+        database.shutdown()
+
+
+def test_translate_placeholders_skips_quoted_text():
+    sql = "SELECT '?', \"a?\" FROM T WHERE A = ? AND B LIKE '5%' AND C = ?"
+    assert backends.translate_placeholders(sql, 'format') == (
+        "SELECT '?', \"a?\" FROM T WHERE A = %s AND B LIKE '5%%' AND C = %s"
+    )
+    assert backends.translate_placeholders(sql, 'numeric').endswith('A = :1 AND B LIKE \'5%\' AND C = :2')
+
+
+def test_ensure_schema_through_dbapi_backend(db_path):
+    conn = StandInBackend(db_path).connect()
+    try:
+        assert migrations.current_version(conn) == 0
+        assert create_database.ensure_schema(conn)
+        assert migrations.current_version(conn) == migrations.LATEST_VERSION
+        # Already current: nothing to do
+        assert create_database.ensure_schema(conn)
+    finally:
+        conn.close()
+
+
+def test_rollup_upsert_adds_to_existing_rows(db_path):
+    conn = StandInBackend(db_path).connect()
+    try:
+        assert create_database.ensure_schema(conn)
+        order_id = conn.execute('SELECT MIN(ORDER_ID) FROM ORDERS').fetchone()[0]
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM DAILY_REVENUE')
+        rollups.add_order(cursor, order_id, 'CASH')
+        first = cursor.execute(
+            'SELECT ITEM_CATEGORY, ORDER_COUNT, QUANTITY, REVENUE FROM DAILY_REVENUE'
+        ).fetchall()
+        rollups.add_order(cursor, order_id, 'CASH')
+        second = cursor.execute(
+            'SELECT ITEM_CATEGORY, ORDER_COUNT, QUANTITY, REVENUE FROM DAILY_REVENUE'
+        ).fetchall()
+    finally:
+        conn.close()
+    assert first
+    assert [(c, n * 2, q * 2, pytest.approx(r * 2)) for c, n, q, r in first] == \
+        [tuple(row) for row in second]
+
+
+def test_create_order_through_dbapi_backend(standin):
+    assert isinstance(database.get_backend(), StandInBackend)
+    table = standin.get_available_tables(1)[0][0]
+    with database.get_db_connection() as conn:
+        customer_id = conn.execute('SELECT MIN(CUSTOMER_ID) FROM CUSTOMER').fetchone()[0]
+        item = conn.execute('SELECT MIN(MENUITEM_NUMBER) FROM MENU_ITEM').fetchone()[0]
+
+    order_id = standin.create_order(customer_id, table, [(item, 2)])
+
+    with database.get_db_connection() as conn:
+        order = conn.execute(
+            'SELECT CUSTOMER_ID, TABLE_NUMBER FROM ORDERS WHERE ORDER_ID = ?', (order_id,)
+        ).fetchone()
+        quantity = conn.execute(
+            'SELECT SUM(QUANTITY) FROM ORDER_ITEM WHERE ORDER_ID = ?', (order_id,)
+        ).fetchone()[0]
+    assert order['CUSTOMER_ID'] == customer_id
+    assert order['TABLE_NUMBER'] == table
+    assert quantity == 2
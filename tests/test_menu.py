@@ -0,0 +1,9 @@
+import pytest
+
+
+def test_update_menu_item_rejects_unknown_items(db):
+    _, cursor = db.get_events(None, None, 5000)
+    with pytest.raises(ValueError, match='Unknown menu item'):
+        db.update_menu_item(10 ** 6, price=9.99)
+    # Nothing was logged for the missing row
+    assert db.get_events(cursor, None, 5000)[0] == []
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+import create_database
+import migrations
+
+
+def _objects(conn, kind):
+    return {row[0] for row in conn.execute(
+        'SELECT name FROM sqlite_master WHERE type = ?', (kind,))}
+
+
+def _counts(conn):
+    return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('CUSTOMER', 'REST_TABLE', 'MENU_ITEM', 'ORDERS', 'ORDER_ITEM', 'PAYMENT')}
+
+
+def test_baseline_database_upgrades_one_version_at_a_time(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        assert migrations.current_version(conn) == 0
+        before = _counts(conn)
+        for version, _, _ in migrations.MIGRATIONS:
+            assert migrations.upgrade(conn, target=version) == [version]
+            assert migrations.current_version(conn) == version
+        assert migrations.current_version(conn) == migrations.LATEST_VERSION == 10
+        assert migrations.pending(conn) == []
+        assert migrations.upgrade(conn) == []
+
+        # Existing rows survive every step
+        assert _counts(conn) == before
+        tables = _objects(conn, 'table')
+        assert {'DAILY_REVENUE', 'MENU_VERSION', 'KITCHEN_EVENT', 'EVENT_LOG'} <= tables
+        indexes = _objects(conn, 'index')
+        assert {'IDX_ORDERS_STATUS_DATE', 'IDX_PAYMENT_ORDER_PAID', 'IDX_PAYMENT_IDEMPOTENCY'} <= indexes
+        assert 'IDX_PAYMENT_ORDER' not in indexes
+        # Migration 8 gave each order's first payment the default key
+        assert conn.execute(
+            "SELECT COUNT(*) FROM PAYMENT WHERE IDEMPOTENCY_KEY = 'order-' || ORDER_ID"
+        ).fetchone()[0] == before['PAYMENT']
+        # Migration 3 backfilled the rollup from the completed orders
+        assert conn.execute('SELECT COUNT(*) FROM DAILY_REVENUE').fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+def test_baseline_database_upgrades_in_one_run(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        applied = migrations.upgrade(conn)
+        assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+    finally:
+        conn.close()
+
+
+def test_ensure_schema_creates_and_seeds_a_new_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'new.db'))
+    try:
+        assert create_database.ensure_schema(conn)
+        assert migrations.current_version(conn) == migrations.LATEST_VERSION
+        assert conn.execute('SELECT COUNT(*) FROM MENU_ITEM').fetchone()[0] > 0
+        assert conn.execute('SELECT COUNT(*) FROM REST_TABLE').fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+def test_migrations_register_in_order():
+    with pytest.raises(ValueError):
+        migrations.migration(1, 'Out of order')(lambda cursor: None)
@@ -0,0 +1,97 @@
+import pytest
+
+import database
+
+
+@pytest.fixture
+def order(db, ids):
+    customer_id, menu = ids
+    order_id, table = db.seat_party(customer_id, 2, [(menu[0], 2)])
+    return order_id, table
+
+
+def _payments(order_id):
+    with database.get_db_connection() as conn:
+        return conn.execute(
+            'SELECT TRANSACTION_ID, AMOUNT_PAID FROM PAYMENT WHERE ORDER_ID = ?', (order_id,)
+        ).fetchall()
+
+
+def _revenue_orders():
+    with database.get_db_connection() as conn:
+        return conn.execute('SELECT COALESCE(SUM(ORDER_COUNT), 0) FROM DAILY_REVENUE').fetchone()[0]
+
+
+def test_payment_completes_the_order_and_frees_the_table(db, order):
+    order_id, table = order
+    db.process_payment(order_id, 'CARD', 20.0)
+    details, _ = db.get_order_details(order_id)
+    assert details.order_status == 'COMPLETED'
+    assert table in [t for t, _ in db.get_available_tables(1)]
+
+
+def test_replayed_payment_returns_the_first_transaction(db, order):
+    order_id, _ = order
+    revenue = _revenue_orders()
+    first = db.process_payment(order_id, 'CARD', 20.0, 'pos-1')
+    assert db.process_payment(order_id, 'CARD', 20.0, 'pos-1') == first
+    # The default key is one per order: a double submit records one payment
+    default = db.process_payment(order_id, 'CARD', 20.0)
+    assert db.process_payment(order_id, 'CARD', 20.0) == default
+    assert len(_payments(order_id)) == 2
+    # The order was rolled into DAILY_REVENUE once
+    assert _revenue_orders() > revenue
+    rolled = _revenue_orders()
+    db.process_payment(order_id, 'CARD', 20.0, 'pos-1')
+    assert _revenue_orders() == rolled
+
+
+def test_reused_key_with_another_payment_conflicts(db, order, ids):
+    order_id, _ = order
+    customer_id, menu = ids
+    db.process_payment(order_id, 'CARD', 20.0, 'pos-1')
+    with pytest.raises(database.ConflictError):
+        db.process_payment(order_id, 'CARD', 25.0, 'pos-1')
+    with pytest.raises(database.ConflictError):
+        db.process_payment(order_id, 'CASH', 20.0, 'pos-1')
+    other, _ = db.seat_party(customer_id, 2, [(menu[0], 1)])
+    with pytest.raises(database.ConflictError):
+        db.process_payment(other, 'CARD', 20.0, 'pos-1')
+    assert len(_payments(order_id)) == 1
+    assert _payments(other) == []
+
+
+def test_split_bill_with_distinct_keys(db, order):
+    order_id, _ = order
+    first = db.process_payment(order_id, 'CARD', 12.0, 'split-1')
+    second = db.process_payment(order_id, 'CASH', 8.0, 'split-2')
+    assert first != second
+    assert sorted(amount for _, amount in _payments(order_id)) == [8.0, 12.0]
+
+
+def test_late_payment_keeps_a_reseated_table(db, order, ids):
+    order_id, table = order
+    customer_id, menu = ids
+    db.process_payment(order_id, 'CARD', 12.0, 'split-1')
+    # The freed table goes to the next party before the rest of the bill
+    db.create_order(customer_id, table, [(menu[0], 1)])
+    db.process_payment(order_id, 'CASH', 8.0, 'split-2')
+    assert table not in [t for t, _ in db.get_available_tables(1)]
+
+
+def test_replayed_batch_changes_nothing(db, ids):
+    customer_id, menu = ids
+    orders = [db.create_order(customer_id, table, [(menu[1], 1)])
+              for table in [t for t, _ in db.get_available_tables(1)][:3]]
+    batch = [(order_id, 'CASH', 10.0) for order_id in orders]
+    transaction_ids = db.process_payments(batch)
+    assert len(set(transaction_ids)) == 3
+    assert db.process_payments(batch) == transaction_ids
+    assert all(len(_payments(order_id)) == 1 for order_id in orders)
+
+
+def test_failed_batch_records_nothing(db, order):
+    order_id, _ = order
+    with pytest.raises(ValueError, match='Unknown order'):
+        db.process_payments([(order_id, 'CASH', 10.0), (10 ** 6, 'CASH', 10.0)])
+    assert _payments(order_id) == []
@@ -0,0 +1,75 @@
+import threading
+
+import database
+from query_cache import QueryCache
+
+
+def test_invalidate_drops_entries_of_the_tag_only():
+    cache = QueryCache(enabled=True)
+    loads = []
+
+    def load(value):
+        loads.append(value)
+        return value
+
+    assert cache.get_or_load('orders', ('orders',), 60, lambda: load('o1')) == 'o1'
+    assert cache.get_or_load('menu', ('menu',), 60, lambda: load('m1')) == 'm1'
+    assert cache.get_or_load('orders', ('orders',), 60, lambda: load('o2')) == 'o1'
+
+    cache.invalidate('orders')
+    assert cache.get_or_load('orders', ('orders',), 60, lambda: load('o3')) == 'o3'
+    assert cache.get_or_load('menu', ('menu',), 60, lambda: load('m2')) == 'm1'
+    assert loads == ['o1', 'm1', 'o3']
+    assert cache.get_stats()['tags']['orders']['invalidations'] == 1
+
+
+def test_entry_with_several_tags_goes_with_any_of_them():
+    cache = QueryCache(enabled=True)
+    cache.get_or_load('k', ('orders', 'customers'), 60, lambda: 1)
+    cache.invalidate('customers')
+    assert cache.get_or_load('k', ('orders', 'customers'), 60, lambda: 2) == 2
+
+
+def test_expired_entries_reload():
+    cache = QueryCache(enabled=True)
+    cache.get_or_load('k', ('orders',), 0, lambda: 1)
+    assert cache.get_or_load('k', ('orders',), 0, lambda: 2) == 2
+
+
+def test_load_overlapping_an_invalidation_is_not_stored():
+    cache = QueryCache(enabled=True)
+    started, finish = threading.Event(), threading.Event()
+    results = []
+
+    def slow_load():
+        started.set()
+        finish.wait(5)
+        return 'before write'
+
+    reader = threading.Thread(
+        target=lambda: results.append(cache.get_or_load('k', ('orders',), 60, slow_load))
+    )
+    reader.start()
+    assert started.wait(5)
+    # A write commits while the read is still loading
+    cache.invalidate('orders')
+    finish.set()
+    reader.join(5)
+
+    assert results == ['before write']
+    assert cache.get_or_load('k', ('orders',), 60, lambda: 'after write') == 'after write'
+
+
+def test_writes_invalidate_cached_reads(db):
+    table = db.get_all_tables()[0]
+    new_status = 'RESERVED' if table.booking_status != 'RESERVED' else 'AVAILABLE'
+    db.update_table_status(table.table_number, new_status)
+    statuses = {t.table_number: t.booking_status for t in db.get_all_tables()}
+    assert statuses[table.table_number] == new_status
+
+
+def test_reads_are_served_from_the_cache(db):
+    database.query_cache.clear()
+    before = database.query_cache.get_stats()['tags'].get('tables', {}).get('hits', 0)
+    assert db.get_all_tables() is db.get_all_tables()
+    assert database.query_cache.get_stats()['tags']['tables']['hits'] == before + 1
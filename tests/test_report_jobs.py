@@ -0,0 +1,116 @@
+import csv
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import database
+import report_jobs
+
+START = '2025-11-01'
+END = date.today().isoformat()
+
+
+@pytest.fixture
+def executor(db, db_path, ids):
+    customer_id, menu = ids
+    # Today's sales on top of the sample orders, so partitions far apart merge
+    orders = db.create_orders([(customer_id, table, [(menu[0], 2), (menu[3], 1)])
+                               for table, _ in db.get_available_tables(1)[:3]])
+    db.process_payments([(order_id, 'CARD', 30.0) for order_id in orders])
+    executor = report_jobs.ReportExecutor(db_path, workers=2, keep=2)
+    try:
+        yield executor
+    finally:
+        executor.close()
+
+
+def _finish(job):
+    assert job.wait(60)
+    assert job.status == 'done', job.error
+    return job
+
+
+def test_partitions_cover_the_range_newest_first():
+    ranges = report_jobs.partitions('2024-01-01', '2024-01-20', days=7)
+    assert ranges == [('2024-01-14', '2024-01-20'), ('2024-01-07', '2024-01-13'),
+                      ('2024-01-01', '2024-01-06')]
+    assert report_jobs.partitions('2024-01-01', '2024-01-01') == [('2024-01-01', '2024-01-01')]
+
+
+def test_merge_menu_sums_partitions():
+    rows = report_jobs.merge_menu([
+        [(1, 'Soup', 'STARTER', 2, 10.0), (2, 'Cake', 'DESSERT', 1, 7.5)],
+        [(1, 'Soup', 'STARTER', 1, 5.0)],
+    ])
+    assert rows == [('Soup', 'STARTER', 3, 15.0), ('Cake', 'DESSERT', 1, 7.5)]
+
+
+def test_menu_report_matches_the_single_query(db, executor):
+    job = _finish(executor.submit('menu', START, END))
+    assert job.done == job.total == len(report_jobs.partitions(START, END)) > 1
+    expected = [tuple(row) for row in db.get_menu_performance(START, END)]
+    assert sorted(job.rows) == sorted(
+        (name, category, quantity, round(revenue, 2)) for name, category, quantity, revenue in expected
+    )
+    with open(job.path, newline='') as f:
+        assert len(list(csv.reader(f))) == len(expected) + 1
+
+
+def test_sales_report_matches_the_single_query(db, executor):
+    job = _finish(executor.submit('sales', START, END))
+    expected = db.get_sales_report(START, END)
+    with open(job.path, newline='') as f:
+        header, *rows = list(csv.reader(f))
+    assert header[0] == 'Order ID'
+    assert job.row_count == len(rows) == len(expected) > 0
+    # Parts are joined newest first, the report's own order
+    assert [int(row[0]) for row in rows] == [row[0] for row in expected]
+
+
+def test_parquet_report(executor):
+    pq = pytest.importorskip('pyarrow.parquet')
+    job = _finish(executor.submit('sales', START, END, 'parquet'))
+    assert pq.read_table(job.path).num_rows == job.row_count
+
+
+def test_cancel_drops_pending_partitions(db_path):
+    executor = report_jobs.ReportExecutor(db_path, workers=1)
+    try:
+        start = (date.today() - timedelta(days=3650)).isoformat()
+        job = executor.submit('sales', start, END)
+        job.cancel()
+        assert job.wait(60)
+        assert job.status == 'cancelled'
+        assert job.done < job.total
+        assert job.path is None
+    finally:
+        executor.close()
+
+
+def test_finished_reports_are_kept_up_to_the_limit(executor):
+    jobs = [_finish(executor.submit('menu', START, END)) for _ in range(3)]
+    assert executor.jobs() == [jobs[2], jobs[1]]
+    assert executor.get(jobs[0].id) is None
+    assert all(job.path for job in jobs[1:])
+    assert not os.path.exists(jobs[0].path)
+
+
+def test_invalid_requests_are_rejected(executor):
+    with pytest.raises(ValueError):
+        executor.submit('inventory', START, END)
+    with pytest.raises(ValueError):
+        executor.submit('sales', END, START)
+
+
+def test_database_executor_follows_configure(db):
+    executor = database.get_report_executor()
+    assert database.get_report_executor() is executor
+    database.configure(db_path=database.DB_PATH)
+    assert database.get_report_executor() is not executor
+
+
+def test_reading_jobs_does_not_start_the_executor(db):
+    assert db.get_report_jobs() == []
+    assert db.get_report_job('missing') is None
+    assert database._report_executor is None
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import database
+
+
+def _set_status(db_path, status, tables=None):
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        if tables is None:
+            conn.execute('UPDATE REST_TABLE SET BOOKING_STATUS = ?', (status,))
+        else:
+            conn.executemany('UPDATE REST_TABLE SET BOOKING_STATUS = ? WHERE TABLE_NUMBER = ?',
+                             [(status, table) for table in tables])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _load_index():
+    with database.get_db_connection() as conn:
+        database.table_allocator.load(conn)
+
+
+def test_seat_party_takes_the_smallest_fitting_table(db, ids):
+    customer_id, menu = ids
+    expected = db.get_available_tables(3)[0][0]
+    order_id, table = db.seat_party(customer_id, 3, [(menu[0], 1)])
+    assert table == expected
+    assert table not in [t for t, _ in db.get_available_tables(1)]
+    order, _ = db.get_order_details(order_id)
+    assert order.table_number == table
+
+
+def test_seat_party_skips_a_table_taken_by_another_process(db, db_path, ids):
+    customer_id, menu = ids
+    first, second = [t for t, _ in db.get_available_tables(2)][:2]
+    _load_index()
+    # Another terminal seats a party at the table the stale index would pick
+    _set_status(db_path, 'OCCUPIED', [first])
+    _, table = db.seat_party(customer_id, 2, [(menu[0], 1)])
+    assert table == second
+
+
+def test_seat_party_finds_a_table_freed_by_another_process(db, db_path, ids):
+    customer_id, menu = ids
+    _set_status(db_path, 'OCCUPIED')
+    _load_index()
+    assert db.suggest_table(2) is None
+    # Freed elsewhere after this process loaded its index
+    freed = max(t.table_number for t in db.get_all_tables())
+    _set_status(db_path, 'AVAILABLE', [freed])
+    _, table = db.seat_party(customer_id, 2, [(menu[0], 1)])
+    assert table == freed
+
+
+def test_seat_party_conflicts_when_nothing_fits(db, db_path, ids):
+    customer_id, menu = ids
+    _set_status(db_path, 'OCCUPIED')
+    with pytest.raises(database.ConflictError):
+        db.seat_party(customer_id, 2, [(menu[0], 1)])
+
+
+def test_update_table_status_rejects_unknown_tables(db):
+    _, cursor = db.get_events(None, None, 5000)
+    with pytest.raises(ValueError, match='Unknown table'):
+        db.update_table_status(10 ** 6, 'AVAILABLE')
+    # Nothing was logged for the missing row
+    assert db.get_events(cursor, None, 5000)[0] == []
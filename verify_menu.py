@@ -1,8 +1,11 @@
 import sqlite3
 
+from records import MenuItem, record_factory
+
 def verify_menu():
     try:
         conn = sqlite3.connect('restaurant.db')
+        conn.row_factory = record_factory(MenuItem)
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM MENU_ITEM ORDER BY ITEM_CATEGORY, ITEM_NAME')
@@ -14,10 +17,10 @@ def verify_menu():
             
         current_category = None
         for item in items:
-            if item[2] != current_category:
-                current_category = item[2]
+            if item.item_category != current_category:
+                current_category = item.item_category
                 print(f"\n{current_category}:")
-            print(f"- {item[1]}: ${item[3]}")
+            print(f"- {item.item_name}: ${item.price}")
             
     except sqlite3.Error as e:
         print(f"An error occurred: {e}")
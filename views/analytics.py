@@ -0,0 +1,133 @@
+from datetime import date, timedelta
+
+import streamlit as st
+
+PERIODS = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90}
+
+
+def render(app):
+    st.title("Analytics Dashboard")
+    period = st.selectbox(
+        "Select Time Period",
+        list(PERIODS)
+    )
+
+    try:
+        metrics = app.db.get_revenue_metrics(period)
+        end_date = date.today()
+        start_date = end_date - timedelta(days=PERIODS[period])
+        with st.spinner("Crunching orders..."):
+            data = app.db.get_analytics(start_date, end_date)
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric(
+                "Total Revenue",
+                f"${metrics['total']:,.2f}",
+                f"{metrics['change']}%"
+            )
+        col2.metric("Completed Orders", f"{data['orders']:,}")
+        col3.metric(
+            "Average Ticket",
+            f"${data['revenue'] / data['orders']:,.2f}" if data['orders'] else "-"
+        )
+        col4.metric("Line Items", f"{data['line_items']:,}")
+        st.caption("Charts below refresh at most every five minutes.")
+
+        if not data['orders']:
+            st.info("No completed orders in this period.")
+            return
+
+        trends, heatmap, tables, parties, baskets = st.tabs(
+            ["Trends", "Hourly Heatmap", "Table Turns", "Party Size", "Baskets"]
+        )
+        with trends:
+            render_trends(data)
+        with heatmap:
+            render_heatmap(data)
+        with tables:
+            render_table_turns(data)
+        with parties:
+            render_party_sizes(data)
+        with baskets:
+            render_baskets(data)
+
+    except Exception as e:
+        st.error(f"Error loading analytics: {str(e)}")
+
+
+def render_trends(data):
+    # plotly is only needed here, so load it on first use
+    import plotly.express as px
+
+    by_day = data['by_day'].reset_index()
+    st.plotly_chart(px.line(by_day, x='DATE', y='REVENUE', title='Revenue per Day'))
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(px.bar(data['by_hour'].reset_index(), x='HOUR', y='REVENUE',
+                               title='Revenue by Hour of Day'))
+    with col2:
+        st.plotly_chart(px.bar(data['by_weekday'].reset_index(), x='WEEKDAY', y='REVENUE',
+                               title='Revenue by Weekday'))
+
+
+def render_heatmap(data):
+    import plotly.express as px
+
+    fig = px.imshow(
+        data['heatmap'],
+        labels={'x': 'Hour of Day', 'y': 'Weekday', 'color': 'Revenue'},
+        aspect='auto',
+        color_continuous_scale='Blues',
+        title='Revenue by Weekday and Hour'
+    )
+    st.plotly_chart(fig)
+
+
+def render_table_turns(data):
+    turns = data['table_turns']
+    col1, col2 = st.columns(2)
+    col1.metric("Median Turn", f"{turns['MEDIAN_TURN_MINUTES'].median():.0f} min")
+    col2.metric("Orders per Table per Day", f"{turns['ORDERS_PER_DAY'].mean():.1f}")
+    st.caption(
+        "A turn is the time from one order on a table to the next on the same day "
+        "(gaps over four hours count as idle)."
+    )
+    st.dataframe(turns.round(1))
+
+
+def render_party_sizes(data):
+    import plotly.express as px
+
+    parties = data['by_party_size'].reset_index()
+    st.plotly_chart(px.bar(parties, x='PARTY_SIZE', y='AVG_TICKET',
+                           hover_data=['ORDERS', 'PER_HEAD'], title='Average Ticket by Party Size'))
+    st.caption(
+        "Party size comes from the reservation an order falls in; walk-ins count "
+        "as the table's seating capacity. RESERVED is the share with a reservation."
+    )
+    st.dataframe(parties.round(2))
+
+
+def render_baskets(data):
+    import plotly.express as px
+
+    st.subheader("Frequently Bought Together")
+    pairs = data['top_pairs']
+    if pairs.empty:
+        st.info("Not enough orders with several items yet.")
+        return
+    st.caption(
+        "Lift above 1 means the two items are ordered together more often than "
+        "chance; confidence A→B is the share of orders with A that also have B."
+    )
+    st.dataframe(pairs.round(3))
+    fig = px.imshow(
+        data['lift'],
+        labels={'color': 'Lift'},
+        aspect='auto',
+        color_continuous_scale='RdBu',
+        color_continuous_midpoint=1.0,
+        title='Item Co-occurrence Lift'
+    )
+    st.plotly_chart(fig)
@@ -0,0 +1,45 @@
+import streamlit as st
+import pandas as pd
+
+
+def render(app):
+    st.title("Customer Management")
+    
+    tab1, tab2 = st.tabs(["Add Customer", "View Customers"])
+    
+    with tab1:
+        with st.form("add_customer_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                first_name = st.text_input("First Name")
+                last_name = st.text_input("Last Name")
+                phone = st.text_input("Phone")
+            
+            with col2:
+                middle_name = st.text_input("Middle Name")
+                email = st.text_input("Email")
+                address = st.text_area("Address")
+            
+            if st.form_submit_button("Add Customer"):
+                if not first_name or not last_name or not phone:
+                    st.error("First name, last name, and phone are required!")
+                else:
+                    try:
+                        app.db.add_customer(
+                            first_name, middle_name, last_name,
+                            phone, email, address
+                        )
+                        st.success("Customer added successfully!")
+                    except Exception as e:
+                        st.error(f"Error: {str(e)}")
+    
+    with tab2:
+        customers = app.load_page("customers", app.db.get_customers_page)
+        if customers:
+            df = pd.DataFrame(customers, columns=[
+                'ID', 'First Name', 'Middle Name', 'Last Name',
+                'Phone', 'Email', 'Address'
+            ])
+            st.dataframe(df)
+        else:
+            st.info("No customers found in the database.")
@@ -0,0 +1,27 @@
+import streamlit as st
+
+
+def render(app):
+    st.title("Restaurant Dashboard")
+    st.markdown("---")
+    
+    # Create three columns for metrics
+    col1, col2, col3 = st.columns(3)
+    snapshot = app.db.get_dashboard_snapshot()
+    
+    with col1:
+        available_tables = snapshot['available_tables']
+        st.metric(
+            label="Available Tables",
+            value=available_tables,
+            delta=f"{available_tables}/{snapshot['total_tables']}"
+        )
+    
+    with col2:
+        st.metric(label="Active Orders", value=snapshot['active_orders'])
+    
+    with col3:
+        st.metric(
+            label="Today's Revenue",
+            value=f"${snapshot['today_revenue']:,.2f}"
+        )
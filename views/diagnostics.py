@@ -0,0 +1,89 @@
+import streamlit as st
+import pandas as pd
+
+import database
+from profiling import profiler
+
+
+def render(app):
+    st.title("Diagnostics")
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        enabled = st.checkbox(
+            "Profile the data layer (this process)",
+            value=profiler.enabled,
+            help="Times every data-layer call and SQL statement; also on with DB_PROFILE=1"
+        )
+        if enabled and not profiler.enabled:
+            profiler.enable()
+        elif not enabled and profiler.enabled:
+            profiler.disable()
+    with col2:
+        if st.button("Reset"):
+            profiler.reset()
+            st.rerun()
+    with col3:
+        st.download_button(
+            "Prometheus metrics",
+            database.get_prometheus_metrics(),
+            file_name="metrics.prom",
+            mime="text/plain"
+        )
+
+    snapshot = profiler.snapshot()
+    pool = database.get_pool_stats()
+    wait = snapshot['pool_wait']
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Profiling since", snapshot['since'].strftime("%H:%M:%S"))
+    col2.metric("Slow statements", len(snapshot['slow']),
+                help=f"Statements taking {snapshot['slow_ms']:g} ms or more (DB_SLOW_QUERY_MS)")
+    col3.metric("Pool wait p95", f"{wait['p95_ms']:.2f} ms")
+    col4.metric("Connections open", f"{pool['open']}/{pool['size']}")
+
+    if not snapshot['enabled'] and not snapshot['methods']:
+        st.info("Profiling is off. Turn it on above, then open the page you want to inspect.")
+        return
+
+    st.subheader("Data-layer calls")
+    if snapshot['methods']:
+        methods = pd.DataFrame(snapshot['methods'])
+        st.dataframe(
+            methods[['method', 'calls', 'errors', 'rows', 'total_ms', 'p50_ms', 'p95_ms',
+                     'p99_ms', 'max_ms', 'last_error']].round(2)
+        )
+
+    st.subheader("SQL statements")
+    if snapshot['statements']:
+        statements = pd.DataFrame(snapshot['statements'])
+        statements['full_scans'] = statements['full_scans'].str.join(', ')
+        statements['methods'] = statements['methods'].str.join(', ')
+        st.dataframe(
+            statements[['id', 'calls', 'rows', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms',
+                        'full_scans', 'methods', 'sql']].round(2)
+        )
+
+        explained = [s for s in snapshot['statements'] if s['plan'] or s['plan_error']]
+        if explained:
+            st.subheader("Query plans of slow statements")
+        for statement in explained:
+            label = f"{statement['id']} - {statement['max_ms']:.1f} ms max"
+            if statement['full_scans']:
+                label += f" - full scan of {', '.join(statement['full_scans'])}"
+            with st.expander(label):
+                st.code(statement['sql'], language="sql")
+                if statement['plan']:
+                    st.code("\n".join(statement['plan']))
+                else:
+                    st.caption(f"No plan: {statement['plan_error']}")
+
+    if snapshot['slow']:
+        st.subheader("Recent slow statements")
+        slow = pd.DataFrame(snapshot['slow'])
+        slow['ms'] = slow['ms'].round(2)
+        st.dataframe(slow)
+
+    with st.expander("Pool, writer and cache"):
+        st.json(pool)
+        st.json(database.get_cache_stats())
@@ -0,0 +1,53 @@
+import streamlit as st
+import pandas as pd
+
+
+def render(app):
+    st.title("Menu Management")
+    
+    tab1, tab2 = st.tabs(["Add Menu Item", "View Menu"])
+    
+    with tab1:
+        with st.form("add_menu_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                item_name = st.text_input("Item Name")
+                category = st.selectbox(
+                    "Category",
+                    ["STARTER", "MAIN COURSE", "DESSERT", "BEVERAGE"]
+                )
+            
+            with col2:
+                price = st.number_input(
+                    "Price ($)",
+                    min_value=0.0,
+                    value=10.0,
+                    step=0.5
+                )
+                status = st.selectbox(
+                    "Availability",
+                    ["AVAILABLE", "OUT OF STOCK"]
+                )
+            
+            if st.form_submit_button("Add Menu Item"):
+                if not item_name or price <= 0:
+                    st.error("Please provide item name and valid price!")
+                else:
+                    try:
+                        app.db.add_menu_item(
+                            item_name, category, price, status
+                        )
+                        st.success("Menu item added successfully!")
+                    except Exception as e:
+                        st.error(f"Error: {str(e)}")
+    
+    with tab2:
+        menu_items = app.db.get_all_menu_items()
+        if menu_items:
+            df = pd.DataFrame(menu_items, columns=[
+                'Item ID', 'Name', 'Category',
+                'Price', 'Availability'
+            ])
+            st.dataframe(df)
+        else:
+            st.info("No menu items found in the database.")
@@ -0,0 +1,137 @@
+import streamlit as st
+import pandas as pd
+
+
+def render(app):
+    st.title("Order Management")
+    
+    tab1, tab2 = st.tabs(["Create Order", "View Orders"])
+    
+    with tab1:
+        create_new_order(app)
+    
+    with tab2:
+        view_orders(app)
+
+
+def create_new_order(app):
+    with st.form("create_order_form"):
+        # Customers, free tables and the menu are independent reads
+        customers, available_tables, menu_items = app.adb.run(
+            app.adb.get_all_customers(),
+            app.adb.get_available_tables(),
+            app.adb.get_all_menu_items()
+        )
+        if not customers:
+            st.error("No customers in database. Please add customers first.")
+            return
+        
+        customer_dict = {
+            f"{c.first_name} {c.last_name} ({c.phone})": c.customer_id
+            for c in customers
+        }
+        selected_customer = st.selectbox(
+            "Select Customer",
+            options=list(customer_dict.keys())
+        )
+        
+        # Available tables come smallest first, reservations held back
+        if not available_tables:
+            st.error("No tables available at the moment.")
+            return
+        
+        auto_assign = "Auto-assign (smallest table that fits)"
+        table_dict = {auto_assign: None}
+        table_dict.update({
+            f"Table {table_number} (Seats: {capacity})": table_number
+            for table_number, capacity in available_tables
+        })
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            selected_table = st.selectbox(
+                "Select Table",
+                options=list(table_dict.keys())
+            )
+        with col2:
+            party_size = st.number_input("Party Size", min_value=1, value=2)
+        
+        if not menu_items:
+            st.error("No menu items available. Please add menu items first.")
+            return
+        
+        st.subheader("Select Items")
+        selected_items = {}
+        
+        # Create columns for menu categories
+        categories = dict.fromkeys(item.item_category for item in menu_items)
+        
+        for category in categories:
+            st.write(f"### {category}")
+            category_items = [
+                item for item in menu_items 
+                if item.item_category == category
+            ]
+            
+            for item in category_items:
+                if item.availability_status == 'AVAILABLE':
+                    col1, col2, col3 = st.columns([3, 1, 1])
+                    with col1:
+                        st.write(f"{item.item_name} (${item.price:.2f})")
+                    with col2:
+                        quantity = st.number_input(
+                            f"Qty",
+                            min_value=0,
+                            key=f"item_{item.menuitem_number}"
+                        )
+                    if quantity > 0:
+                        selected_items[item.menuitem_number] = quantity
+        
+        submitted = st.form_submit_button("Create Order")
+        if submitted:
+            if not selected_items:
+                st.error("Please select at least one item!")
+            else:
+                try:
+                    customer_id = customer_dict[selected_customer]
+                    table_number = table_dict[selected_table]
+                    items = [
+                        (item_id, qty) 
+                        for item_id, qty in selected_items.items()
+                    ]
+                    if table_number is None:
+                        order_id, table_number = app.db.seat_party(
+                            customer_id,
+                            party_size,
+                            items
+                        )
+                    else:
+                        order_id = app.db.create_order(
+                            customer_id,
+                            table_number,
+                            items
+                        )
+                    st.success(f"Order created successfully! Order ID: {order_id} (Table {table_number})")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+
+
+def view_orders(app):
+    status = st.selectbox(
+        "Status",
+        ["ALL", "PENDING", "COMPLETED", "CANCELLED"],
+        key="view_orders_status"
+    )
+    filters = {} if status == "ALL" else {'status': status}
+    orders = app.load_page(
+        f"orders_{status}",
+        lambda after, limit: app.db.get_orders_page(after, limit, filters)
+    )
+    if orders:
+        df = pd.DataFrame(orders, columns=[
+            'Order ID', 'Customer ID', 'Table Number',
+            'Date', 'Time', 'Total Amount', 'Status',
+            'Customer First Name', 'Customer Last Name'
+        ])
+        st.dataframe(df)
+    else:
+        st.info("No orders found in the database.")
@@ -0,0 +1,67 @@
+import streamlit as st
+
+
+def render(app):
+    st.title("Payment Management")
+    
+    unpaid_orders = app.db.get_pending_orders()
+    
+    if unpaid_orders:
+        st.subheader("Process Payment")
+        with st.form("payment_form"):
+            order_dict = {
+                f"Order #{o.order_id} - {o.first_name} {o.last_name} (${o.total_amount:.2f})": o.order_id
+                for o in unpaid_orders
+            }
+            selected_order = st.selectbox(
+                "Select Order",
+                options=list(order_dict.keys())
+            )
+            
+            payment_mode = st.selectbox(
+                "Payment Mode",
+                ["CASH", "CARD", "UPI"]
+            )
+            
+            if st.form_submit_button("Process Payment"):
+                try:
+                    order_id = order_dict[selected_order]
+                    amount = next(
+                        o.total_amount for o in unpaid_orders 
+                        if o.order_id == order_id
+                    )
+                    app.db.process_payment(
+                        order_id,
+                        payment_mode,
+                        amount
+                    )
+                    st.success("Payment processed successfully!")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+
+        st.subheader("Close-out Settlement")
+        with st.form("settlement_form"):
+            selected = st.multiselect(
+                "Orders to settle",
+                options=list(order_dict.keys()),
+                default=list(order_dict.keys())
+            )
+            settle_mode = st.selectbox(
+                "Payment Mode",
+                ["CASH", "CARD", "UPI"],
+                key="settle_mode"
+            )
+
+            if st.form_submit_button("Settle Selected"):
+                try:
+                    totals = {o.order_id: o.total_amount for o in unpaid_orders}
+                    batch = [
+                        (order_dict[label], settle_mode, totals[order_dict[label]])
+                        for label in selected
+                    ]
+                    app.db.process_payments(batch)
+                    st.success(f"Settled {len(batch)} orders")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+    else:
+        st.info("No pending payments.")
@@ -0,0 +1,195 @@
+import time
+from datetime import datetime
+
+import streamlit as st
+import pandas as pd
+
+# How often the page reruns while a background report is running
+POLL_SECONDS = 0.5
+
+
+def render(app):
+    st.title("Reports")
+    
+    with st.form("generate_report_form"):
+        report_type = st.selectbox(
+            "Select Report Type",
+            ["Sales Report", "Menu Performance"]
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("Start Date")
+        with col2:
+            end_date = st.date_input("End Date")
+
+        if st.form_submit_button("Generate Report"):
+            st.session_state.report = (report_type, start_date, end_date)
+            st.session_state.pop("sales_report_cursors", None)
+            for key in ("menu_job", "sales_export", "menu_export"):
+                st.session_state.pop(key, None)
+
+    # Render outside the form so paging and download buttons work
+    if 'report' in st.session_state:
+        report_type, start_date, end_date = st.session_state.report
+        if report_type == "Sales Report":
+            generate_sales_report(app, start_date, end_date)
+        elif report_type == "Menu Performance":
+            generate_menu_report(app, start_date, end_date)
+
+    finished_reports(app)
+
+    # Poll while background reports run so progress bars move
+    if any(job.status == 'running' for job in app.db.get_report_jobs()):
+        time.sleep(POLL_SECONDS)
+        st.rerun()
+
+
+def download_button(job, key):
+    with open(job.path, 'rb') as f:
+        st.download_button(
+            "Download Report",
+            f,
+            job.filename,
+            "text/csv" if job.format == "csv" else "application/octet-stream",
+            key=key
+        )
+
+
+def job_status(app, key):
+    """Show progress and a Cancel button for the job whose id is in
+    session_state[key]; returns the job once it has finished"""
+    job = app.db.get_report_job(st.session_state.get(key))
+    if job is None:
+        return None
+    if job.status == 'running':
+        col1, col2 = st.columns([4, 1])
+        col1.progress(job.progress, text=f"{job.done}/{job.total} partitions")
+        if col2.button("Cancel", key=f"{key}_cancel"):
+            job.cancel()
+            st.rerun()
+        return None
+    if job.status == 'cancelled':
+        st.warning("Report cancelled.")
+    elif job.status == 'failed':
+        st.error(f"Error generating report: {job.error}")
+    return job if job.status == 'done' else None
+
+
+def export_download(app, report, start_date, end_date):
+    """Build a report file in the background on request and offer it for
+    download"""
+    key = f"{report}_export"
+    fmt = st.radio(
+        "Export Format", ["csv", "parquet"],
+        horizontal=True, key=f"{key}_format"
+    )
+    if st.button("Prepare Download", key=f"{key}_prepare"):
+        try:
+            st.session_state[key] = app.db.submit_report(report, start_date, end_date, fmt).id
+        except Exception as e:
+            st.error(f"Error exporting report: {str(e)}")
+
+    job = job_status(app, key)
+    if job and job.format == fmt:
+        st.caption(f"{job.row_count:,} rows")
+        download_button(job, f"{key}_download")
+
+
+def finished_reports(app):
+    """Reports finished earlier in this server process, for re-download"""
+    try:
+        jobs = [job for job in app.db.get_report_jobs() if job.status == 'done']
+    except Exception as e:
+        st.error(f"Error loading finished reports: {str(e)}")
+        return
+    if not jobs:
+        return
+    with st.expander(f"Finished Reports ({len(jobs)})"):
+        for job in jobs:
+            col1, col2 = st.columns([3, 1])
+            finished = datetime.fromtimestamp(job.finished).strftime('%Y-%m-%d %H:%M')
+            col1.write(
+                f"**{job.report.title()}** {job.start_date} to {job.end_date} "
+                f"({job.format}, {job.row_count:,} rows, finished {finished})"
+            )
+            with col2:
+                download_button(job, f"finished_{job.id}")
+
+
+def generate_sales_report(app, start_date, end_date):
+    try:
+        summary = app.db.get_sales_summary(start_date, end_date)
+        if summary['total_orders']:
+            st.subheader("Sales Summary")
+            total_revenue = summary['total_revenue']
+            total_orders = summary['total_orders']
+            avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Revenue", f"${total_revenue:,.2f}")
+            with col2:
+                st.metric("Total Orders", total_orders)
+            with col3:
+                st.metric("Average Order Value", f"${avg_order_value:,.2f}")
+            
+            st.subheader("Detailed Sales Data")
+            sales_data = app.load_page(
+                "sales_report",
+                lambda after, limit: app.db.get_sales_report_page(
+                    start_date, end_date, after, limit
+                )
+            )
+            df = pd.DataFrame(sales_data, columns=[
+                'Order ID', 'Date', 'Customer',
+                'Total Amount', 'Payment Mode',
+                'Amount Paid'
+            ])
+            st.dataframe(df)
+            
+            # Download option
+            export_download(app, "sales", start_date, end_date)
+        else:
+            st.info("No sales data found for the selected period.")
+    except Exception as e:
+        st.error(f"Error generating report: {str(e)}")
+
+
+def generate_menu_report(app, start_date, end_date):
+    try:
+        # Long ranges are aggregated in parallel partitions by the report workers
+        if "menu_job" not in st.session_state:
+            st.session_state.menu_job = app.db.submit_report("menu", start_date, end_date).id
+        job = job_status(app, "menu_job")
+        if job is None:
+            return
+        menu_data = job.rows
+        if menu_data:
+            # plotly is only needed here, so load it on first use
+            import plotly.express as px
+
+            df = pd.DataFrame(menu_data, columns=[
+                'Item Name', 'Category',
+                'Quantity Sold', 'Total Revenue'
+            ])
+            
+            st.subheader("Menu Performance Summary")
+            fig = px.bar(
+                df,
+                x='Item Name',
+                y=['Quantity Sold', 'Total Revenue'],
+                barmode='group',
+                title='Item Performance'
+            )
+            st.plotly_chart(fig)
+            
+            st.subheader("Detailed Menu Data")
+            st.dataframe(df)
+            
+            # Download option
+            export_download(app, "menu", start_date, end_date)
+        else:
+            st.info("No menu performance data found for the selected period.")
+    except Exception as e:
+        st.error(f"Error generating report: {str(e)}")
@@ -0,0 +1,92 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+
+
+def render(app):
+    st.title("Reservations")
+    
+    tab1, tab2, tab3 = st.tabs(["New Reservation", "Find Free Tables", "Upcoming"])
+    
+    with tab1:
+        customers = app.db.get_all_customers()
+        if not customers:
+            st.error("No customers in database. Please add customers first.")
+        else:
+            with st.form("reservation_form"):
+                customer_dict = {
+                    f"{c.first_name} {c.last_name} ({c.phone})": c.customer_id
+                    for c in customers
+                }
+                selected_customer = st.selectbox(
+                    "Customer",
+                    options=list(customer_dict.keys())
+                )
+                col1, col2 = st.columns(2)
+                with col1:
+                    date = st.date_input("Date")
+                    party_size = st.number_input("Party Size", min_value=1, value=2)
+                with col2:
+                    time = st.time_input("Time", value=datetime.strptime("19:00", "%H:%M").time())
+                    duration = st.number_input(
+                        "Duration (minutes)", min_value=15, value=120, step=15
+                    )
+                table_number = st.number_input(
+                    "Table (0 = smallest free table)", min_value=0, value=0
+                )
+                
+                if st.form_submit_button("Book Table"):
+                    try:
+                        reservation_id, table = app.db.create_reservation(
+                            customer_dict[selected_customer],
+                            party_size,
+                            datetime.combine(date, time),
+                            duration,
+                            table_number or None
+                        )
+                        st.success(f"Reservation #{reservation_id} booked at Table {table}!")
+                    except Exception as e:
+                        st.error(f"Error: {str(e)}")
+    
+    with tab2:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            date = st.date_input("Date", key="search_date")
+        with col2:
+            time = st.time_input(
+                "From", value=datetime.strptime("19:00", "%H:%M").time(), key="search_time"
+            )
+        with col3:
+            duration = st.number_input(
+                "Minutes", min_value=15, value=120, step=15, key="search_duration"
+            )
+        with col4:
+            party_size = st.number_input("Party Size", min_value=1, value=2, key="search_party")
+        free_tables = app.db.find_available_tables(
+            party_size, datetime.combine(date, time), duration
+        )
+        if free_tables:
+            st.dataframe(pd.DataFrame(free_tables, columns=['Table Number', 'Seating Capacity']))
+        else:
+            st.info("No table is free for that party and time.")
+    
+    with tab3:
+        upcoming = app.db.get_reservations(upcoming_only=True)
+        if upcoming:
+            for r in upcoming:
+                col1, col2 = st.columns([5, 1])
+                with col1:
+                    st.write(
+                        f"**#{r['RESERVATION_ID']}** {r['RESERVATION_TIME'][:16]} - "
+                        f"Table {r['TABLE_NUMBER']}, {r['NUMBER_OF_PEOPLE']} people, "
+                        f"{r['DURATION_MINUTES']} min ({r['FIRST_NAME']} {r['LAST_NAME']})"
+                    )
+                with col2:
+                    if st.button("Cancel", key=f"cancel_reservation_{r['RESERVATION_ID']}"):
+                        try:
+                            app.db.cancel_reservation(r['RESERVATION_ID'])
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error: {str(e)}")
+        else:
+            st.info("No upcoming reservations.")
@@ -0,0 +1,80 @@
+import streamlit as st
+import pandas as pd
+
+
+def render(app):
+    st.title("Table Management")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Add New Table")
+        with st.form("add_table_form"):
+            seating_capacity = st.number_input(
+                "Seating Capacity",
+                min_value=1,
+                value=4
+            )
+            status = st.selectbox(
+                "Initial Status",
+                ["AVAILABLE", "RESERVED", "OCCUPIED"]
+            )
+            
+            if st.form_submit_button("Add Table"):
+                try:
+                    app.db.add_table(seating_capacity, status)
+                    st.success("Table added successfully!")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+    
+    with col2:
+        st.subheader("Current Table Status")
+        tables = app.db.get_all_tables()
+        if tables:
+            # Display each table as a card with status update option
+            st.write("Update Table Status:")
+            cols = st.columns(3)  # Create 3 columns for layout
+            for idx, table in enumerate(tables):
+                col = cols[idx % 3]  # Distribute tables across columns
+                with col:
+                    with st.container():
+                        st.write(f"**Table {table.table_number}**")
+                        st.write(f"Seats: {table.seating_capacity}")
+                        new_status = st.selectbox(
+                            "Status",
+                            ["AVAILABLE", "OCCUPIED", "RESERVED"],
+                            index=["AVAILABLE", "OCCUPIED", "RESERVED"].index(table.booking_status),
+                            key=f"table_status_{table.table_number}"
+                        )
+                        if new_status != table.booking_status:
+                            if st.button("Update", key=f"update_table_{table.table_number}"):
+                                try:
+                                    app.db.update_table_status(table.table_number, new_status)
+                                    st.success(f"Table {table.table_number} status updated!")
+                                    st.rerun()
+                                except Exception as e:
+                                    st.error(f"Error updating table: {str(e)}")
+                        st.markdown("---")
+            
+            # Show table summary in a dataframe
+            st.subheader("Tables Overview")
+            df = pd.DataFrame(tables, columns=[
+                'Table Number', 'Booking ID', 
+                'Seating Capacity', 'Status'
+            ])
+            
+            # Color-code the status
+            def color_status(val):
+                colors = {
+                    'AVAILABLE': 'green',
+                    'OCCUPIED': 'red',
+                    'RESERVED': 'orange'
+                }
+                return f'color: {colors.get(val, "black")}'
+            
+            st.dataframe(df.style.map(
+                color_status,
+                subset=['Status']
+            ))
+        else:
+            st.info("No tables found in the database.")
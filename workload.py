@@ -0,0 +1,129 @@
+"""The app's database workload: every DatabaseOperations read and write,
+with ids and dates taken from the database it runs on.
+
+benchmarks.suite times it and index_advisor explains every statement it
+runs. PAGE_QUERIES lists what each page of the app reads when it opens.
+"""
+from datetime import date, datetime, timedelta
+
+# Reads that load whole tables; callers skip them above UNBOUNDED_LIMIT orders
+UNBOUNDED = {'get_all_orders', 'get_sales_report', 'iter_sales_report'}
+UNBOUNDED_LIMIT = 1_000_000
+
+
+class Fixture:
+    """Ids and arguments the workload needs, read from the database"""
+
+    def __init__(self, db):
+        self.db = db
+        self.today = date.today()
+        self.start = (self.today - timedelta(days=30)).isoformat()
+        self.end = self.today.isoformat()
+        self.tables = [t.table_number for t in db.get_all_tables() if t.seating_capacity >= 2]
+        self.menu = [m.menuitem_number for m in db.get_all_menu_items()]
+        # None on a database without rows of that kind (the cases using it fail)
+        customers, _ = db.get_customers_page(limit=1)
+        self.customer_id = customers[0].customer_id if customers else None
+        orders, _ = db.get_orders_page(limit=1)
+        self.order_id = orders[0].order_id if orders else None
+        reservations = db.get_reservations(limit=1)
+        self.reservation_id = reservations[0]['RESERVATION_ID'] if reservations else None
+        self.serial = 0
+
+    def next(self):
+        self.serial += 1
+        return self.serial
+
+    def items(self):
+        n = self.next()
+        return [(self.menu[n % len(self.menu)], 1), (self.menu[(n + 7) % len(self.menu)], 2)]
+
+    def table(self):
+        return self.tables[self.next() % len(self.tables)]
+
+    def reservation_time(self):
+        # A fresh slot far enough out that it never collides with the dataset
+        return datetime.combine(self.today + timedelta(days=400 + self.next()),
+                                datetime.min.time()).replace(hour=19)
+
+    def free_table(self):
+        self.db.update_table_status(self.tables[0], 'AVAILABLE')
+
+    def new_order(self):
+        return self.db.create_order(self.customer_id, self.table(), self.items())
+
+
+def _drain(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+# name: fn(db, fixture)
+READS = {
+    'get_all_customers': lambda db, f: db.get_all_customers(),
+    'get_customers_page': lambda db, f: db.get_customers_page(None, 50),
+    'get_all_tables': lambda db, f: db.get_all_tables(),
+    'get_available_tables': lambda db, f: db.get_available_tables(2),
+    'suggest_table': lambda db, f: db.suggest_table(4),
+    'get_all_menu_items': lambda db, f: db.get_all_menu_items(),
+    'get_menu_items_by_category': lambda db, f: db.get_menu_items_by_category('MAIN COURSE'),
+    'get_all_orders': lambda db, f: db.get_all_orders(),
+    'get_pending_orders': lambda db, f: db.get_pending_orders(),
+    'get_orders_page': lambda db, f: db.get_orders_page(None, 50, {'status': 'COMPLETED'}),
+    'get_order_details': lambda db, f: db.get_order_details(f.order_id),
+    'get_dashboard_snapshot': lambda db, f: db.get_dashboard_snapshot(),
+    'get_revenue_metrics': lambda db, f: db.get_revenue_metrics('Last 30 Days'),
+    'get_daily_revenue': lambda db, f: db.get_daily_revenue(f.start, f.end),
+    'get_sales_summary': lambda db, f: db.get_sales_summary(f.start, f.end),
+    'get_sales_report': lambda db, f: db.get_sales_report(f.start, f.end),
+    'iter_sales_report': lambda db, f: _drain(db.iter_sales_report(f.start, f.end)),
+    'get_sales_report_page': lambda db, f: db.get_sales_report_page(f.start, f.end, None, 50),
+    'get_menu_performance': lambda db, f: db.get_menu_performance(f.start, f.end),
+    'iter_menu_performance': lambda db, f: _drain(db.iter_menu_performance(f.start, f.end)),
+    'get_analytics': lambda db, f: db.get_analytics(f.start, f.end),
+    'get_reservation': lambda db, f: db.get_reservation(f.reservation_id),
+    'get_reservations': lambda db, f: db.get_reservations(upcoming_only=True),
+    'find_available_tables': lambda db, f: db.find_available_tables(
+        2, datetime.combine(f.today + timedelta(days=1), datetime.min.time()).replace(hour=19)),
+    'get_kitchen_tickets': lambda db, f: db.get_kitchen_tickets(),
+    'wait_kitchen_events': lambda db, f: db.wait_kitchen_events(None, None, 0),
+    'get_events': lambda db, f: db.get_events(None, None, 500),
+}
+
+# name: (setup(fixture) -> arg or None, fn(db, fixture, arg)); setup is not timed
+WRITES = {
+    'add_customer': (None, lambda db, f, _: db.add_customer(
+        'Bench', None, 'Run', f'555-BENCH-{f.next()}', None, None)),
+    'add_table': (None, lambda db, f, _: db.add_table(4)),
+    'update_table_status': (None, lambda db, f, _: db.update_table_status(
+        f.table(), 'AVAILABLE')),
+    'add_menu_item': (None, lambda db, f, _: db.add_menu_item(
+        f'Bench Special {f.next()}', 'MAIN COURSE', 12.5)),
+    'update_menu_item': (None, lambda db, f, _: db.update_menu_item(f.menu[0], status='AVAILABLE')),
+    'create_order': (None, lambda db, f, _: db.create_order(f.customer_id, f.table(), f.items())),
+    'create_orders': (None, lambda db, f, _: db.create_orders(
+        [(f.customer_id, f.table(), f.items()) for _ in range(50)])),
+    'seat_party': (Fixture.free_table, lambda db, f, _: db.seat_party(f.customer_id, 2, f.items())),
+    'process_payment': (Fixture.new_order, lambda db, f, order_id: db.process_payment(
+        order_id, 'CARD', 10)),
+    'process_payments': (
+        lambda f: [f.new_order() for _ in range(50)],
+        lambda db, f, order_ids: db.process_payments([(o, 'CASH', 10) for o in order_ids])),
+    'create_reservation': (None, lambda db, f, _: db.create_reservation(
+        f.customer_id, 2, f.reservation_time())),
+    'cancel_reservation': (
+        lambda f: f.db.create_reservation(f.customer_id, 2, f.reservation_time())[0],
+        lambda db, f, reservation_id: db.cancel_reservation(reservation_id)),
+}
+
+# What each page reads when it is opened (see views/)
+PAGE_QUERIES = {
+    'Dashboard': ['get_dashboard_snapshot'],
+    'Customers': ['get_customers_page'],
+    'Tables': ['get_all_tables'],
+    'Reservations': ['get_all_customers', 'find_available_tables', 'get_reservations'],
+    'Menu': ['get_all_menu_items'],
+    'Orders': ['get_all_customers', 'get_available_tables', 'get_all_menu_items', 'get_orders_page'],
+    'Payments': ['get_pending_orders'],
+    'Reports': ['get_sales_summary', 'get_sales_report_page', 'get_menu_performance'],
+    'Analytics': ['get_revenue_metrics', 'get_analytics'],
+}